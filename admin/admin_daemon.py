@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Glasgow GitOps Admin Daemon
+Keeps kubectl results and per-host SSH sessions warm behind a Unix socket
+
+The admin scripts (quick_check.py, cluster_manager.py status, choose_master.py)
+ask the daemon first and fall back to running kubectl/ssh themselves when it
+is not running. `kubectl get` output is cached per command and invalidated by
+a `kubectl get --watch-only` stream for that resource kind, so a cached answer
+is never older than the last event the API server sent us.
+
+Usage:
+    ./admin/admin_daemon.py start     # run in the foreground (or as a user unit)
+    ./admin/admin_daemon.py status
+    ./admin/admin_daemon.py stop
+"""
+
+import argparse
+import json
+import os
+import shlex
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+
+from common import PASSWORD, USERNAME, WORKERS
+
+RUNTIME_DIR = os.path.expanduser("~/.cache/glasgow-admin")
+SOCKET_PATH = os.environ.get(
+    "GLASGOW_ADMIN_SOCKET", os.path.join(RUNTIME_DIR, "admind.sock")
+)
+CONTROL_PATH = os.path.join(RUNTIME_DIR, "ssh-%r@%h:%p")
+CLIENT_TIMEOUT = 30
+CACHEABLE_OUTPUTS = ("name", "json", "yaml")
+VALUE_FLAGS = ("-n", "--namespace", "-l", "--selector", "--field-selector", "-o", "--output")
+CACHEABLE_FLAGS = VALUE_FLAGS + ("-A", "--all-namespaces")
+REFRESH_DEBOUNCE = 0.5
+
+
+def query(op, **params):
+    """Send one request to the daemon, return its result or None if unavailable"""
+    if not os.path.exists(SOCKET_PATH):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CLIENT_TIMEOUT)
+            sock.connect(SOCKET_PATH)
+            sock.sendall(json.dumps({"op": op, **params}).encode() + b"\n")
+            data = b""
+            while not data.endswith(b"\n"):
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+        response = json.loads(data)
+    except (OSError, ValueError):
+        return None
+    if not response.get("ok"):
+        return None
+    return response.get("result")
+
+
+def kubectl_get(cmd):
+    """Cached `kubectl get` via the daemon: (success, stdout, stderr) or None"""
+    # Anything outside the allow-list is cheaper to run directly than to
+    # forward and wait on the daemon
+    if resource_kind(cmd) is None:
+        return None
+    result = query("kubectl", cmd=cmd)
+    return tuple(result) if result is not None else None
+
+
+def ssh(ip, cmd):
+    """Run cmd on ip over the daemon's warm SSH session, or None"""
+    return query("ssh", ip=ip, cmd=cmd)
+
+
+def ssh_argv(ip, cmd, timeout=3):
+    """sshpass/ssh argv that multiplexes over a persistent ControlMaster"""
+    return [
+        "sshpass",
+        "-p",
+        PASSWORD,
+        "ssh",
+        "-o",
+        f"ConnectTimeout={timeout}",
+        "-o",
+        "StrictHostKeyChecking=no",
+        "-o",
+        "ControlMaster=auto",
+        "-o",
+        f"ControlPath={CONTROL_PATH}",
+        "-o",
+        "ControlPersist=10m",
+        f"{USERNAME}@{ip}",
+        cmd,
+    ]
+
+
+def resource_kind(cmd):
+    """Return the resource kind of a cacheable `kubectl get`, else None
+
+    Only plain machine-readable reads are cacheable: no pipes or redirects,
+    no watches, and an explicit -o name/json/yaml/jsonpath (tables carry an
+    AGE column that goes stale in the cache).
+    """
+    if any(c in cmd for c in "|;&<>$`"):
+        return None
+    try:
+        tokens = shlex.split(cmd)
+    except ValueError:
+        return None
+    if len(tokens) < 3 or tokens[:2] != ["kubectl", "get"]:
+        return None
+    kind = tokens[2]
+    if kind.startswith("-") or "," in kind or "/" in kind or kind == "all":
+        return None
+    output = None
+    rest = iter(tokens[3:])
+    for token in rest:
+        flag, has_value, value = token.partition("=")
+        if flag in CACHEABLE_FLAGS:
+            if flag in VALUE_FLAGS and not has_value:
+                value = next(rest, None)
+            if flag in ("-o", "--output"):
+                output = value
+        elif token.startswith("-"):
+            return None
+    if output is None or not (output in CACHEABLE_OUTPUTS or output.startswith("jsonpath=")):
+        return None
+    return kind
+
+
+class KubectlCache:
+    """`kubectl get` output cache, invalidated by one watch stream per kind"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}  # cmd -> (generation, result)
+        self.generations = {}  # kind -> event counter
+        self.watching = set()
+        self.dirty = set()
+        self.changed = threading.Event()
+        threading.Thread(target=self._refresher, daemon=True).start()
+
+    def get(self, cmd):
+        kind = resource_kind(cmd)
+        if kind is None:
+            return run_shell(cmd)
+        self._ensure_watch(kind)
+        with self.lock:
+            generation = self.generations.get(kind, 0)
+            entry = self.entries.get(cmd)
+            if entry and entry[0] == generation and kind in self.watching:
+                return entry[1]
+        return self._fill(cmd, generation)
+
+    def _fill(self, cmd, generation):
+        result = run_shell(cmd)
+        with self.lock:
+            self.entries[cmd] = (generation, result)
+        return result
+
+    def _ensure_watch(self, kind):
+        with self.lock:
+            if kind in self.watching:
+                return
+            self.watching.add(kind)
+        threading.Thread(target=self._watch, args=(kind,), daemon=True).start()
+
+    def _watch(self, kind):
+        """Bump the kind's generation on every watch event, restart on exit"""
+        while True:
+            proc = subprocess.Popen(
+                ["kubectl", "get", kind, "-A", "--watch-only", "-o", "name"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+            )
+            # Anything cached before the watch connected may already be stale
+            threading.Timer(2, self._invalidate, args=(kind,)).start()
+            for _ in proc.stdout:
+                self._invalidate(kind)
+            proc.wait()
+            # Events may have been missed while reconnecting
+            self._invalidate(kind)
+            time.sleep(1)
+
+    def _invalidate(self, kind):
+        with self.lock:
+            self.generations[kind] = self.generations.get(kind, 0) + 1
+            self.dirty.add(kind)
+        self.changed.set()
+
+    def _refresher(self):
+        """Re-run invalidated commands in the background so reads stay instant"""
+        while True:
+            self.changed.wait()
+            time.sleep(REFRESH_DEBOUNCE)
+            self.changed.clear()
+            with self.lock:
+                kinds, self.dirty = self.dirty, set()
+                stale = []
+                for cmd in self.entries:
+                    kind = resource_kind(cmd)
+                    if kind in kinds:
+                        stale.append((cmd, self.generations.get(kind, 0)))
+            for cmd, generation in stale:
+                self._fill(cmd, generation)
+
+
+def run_shell(cmd):
+    """Run a shell command, return [success, stdout, stderr]"""
+    try:
+        result = subprocess.run(
+            cmd, shell=True, capture_output=True, text=True, timeout=CLIENT_TIMEOUT - 5
+        )
+        return [result.returncode == 0, result.stdout.strip(), result.stderr.strip()]
+    except Exception as e:
+        return [False, "", str(e)]
+
+
+def run_ssh(ip, cmd):
+    """Run cmd on ip through the multiplexed SSH connection"""
+    try:
+        output = subprocess.check_output(
+            ssh_argv(ip, cmd), stderr=subprocess.DEVNULL, timeout=CLIENT_TIMEOUT
+        )
+        return output.decode().strip()
+    except Exception:
+        return None
+
+
+def warm_ssh_sessions():
+    """Open a ControlMaster to every host so the first query is already fast"""
+    for _, ip in WORKERS:
+        threading.Thread(target=run_ssh, args=(ip, "true"), daemon=True).start()
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            op = request.get("op")
+            if op == "ping":
+                result = {"pid": os.getpid(), "cached": len(self.server.cache.entries)}
+            elif op == "kubectl":
+                result = self.server.cache.get(request["cmd"])
+            elif op == "ssh":
+                result = run_ssh(request["ip"], request["cmd"])
+            elif op == "shutdown":
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                result = True
+            else:
+                raise ValueError(f"unknown op {op!r}")
+            response = {"ok": True, "result": result}
+        except Exception as e:
+            response = {"ok": False, "error": str(e)}
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve():
+    """Run the daemon in the foreground until stopped"""
+    os.makedirs(RUNTIME_DIR, mode=0o700, exist_ok=True)
+    if query("ping") is not None:
+        print(f"⚠️  Daemon already running on {SOCKET_PATH}")
+        return
+    if os.path.exists(SOCKET_PATH):
+        os.unlink(SOCKET_PATH)
+
+    server = Server(SOCKET_PATH, Handler)
+    os.chmod(SOCKET_PATH, 0o600)
+    server.cache = KubectlCache()
+    warm_ssh_sessions()
+    print(f"🚀 Admin daemon listening on {SOCKET_PATH}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(SOCKET_PATH):
+            os.unlink(SOCKET_PATH)
+        print("🛑 Admin daemon stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Glasgow GitOps Admin Daemon")
+    parser.add_argument("action", choices=["start", "stop", "status"])
+    args = parser.parse_args()
+
+    if args.action == "start":
+        serve()
+    elif args.action == "stop":
+        if query("shutdown") is None:
+            print("ℹ️  Daemon is not running")
+        else:
+            print("✅ Daemon stopping")
+    elif args.action == "status":
+        info = query("ping")
+        if info is None:
+            print("❌ Daemon is not running")
+            sys.exit(1)
+        print(f"✅ Daemon running (pid {info['pid']}, {info['cached']} cached queries)")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,604 @@
+"""
+Streaming Backup and Restore for Postgres and MinIO
+Used by `cluster_manager.py backup` / `restore`
+
+Every database is dumped with pg_dump (plain SQL, --clean --if-exists) and
+every MinIO object is downloaded, each streamed through gzip straight into
+the target: a local directory or an S3-compatible bucket (multipart uploads
+from an in-memory part buffer). Nothing is staged on local disk. Databases
+and objects are spread over --workers threads.
+
+Target layout:
+
+    snapshots/<id>.json              manifest: sha256, size and blob of every item
+    postgres/<db>/<id>.sql.gz
+    minio/<bucket>/<key>@<etag>.gz
+
+Backups are incremental against the latest manifest: objects whose ETag
+and size are unchanged are not downloaded again, and a dump whose sha256
+matches the previous one is dropped in favour of the existing blob. Items
+that fail are listed in the manifest, so restore reports what the snapshot
+lacks, and are copied again next time. An s3:// target on the MinIO being
+backed up is left out of the backup. Restore streams blobs back through
+gunzip into psql and parallel MinIO uploads, checking each sha256 on the way.
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+import subprocess
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from minio_bench import NAMESPACE, S3Client
+
+CHUNK = 1 << 20
+PART_SIZE = 8 << 20
+
+
+def format_bytes(size):
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024 or unit == "GiB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def check(status, body, what):
+    if status >= 300:
+        raise RuntimeError(f"{what}: HTTP {status} {body[:200].decode(errors='replace')}")
+
+
+def list_buckets(client):
+    status, _, body, _ = client.request("GET", "/")
+    check(status, body, "list buckets")
+    return [html.unescape(b) for b in re.findall(r"<Name>([^<]*)</Name>", body.decode())]
+
+
+def create_bucket(client, bucket):
+    status, _, body, _ = client.request("PUT", f"/{bucket}")
+    if status >= 300 and b"BucketAlreadyOwnedByYou" not in body:
+        check(status, body, f"create bucket {bucket}")
+
+
+def list_objects(client, bucket, prefix=""):
+    """Yield (key, etag, size) for every object under prefix (ListObjectsV2)"""
+    token = None
+    while True:
+        query = {"list-type": "2", "prefix": prefix}
+        if token:
+            query["continuation-token"] = token
+        status, _, body, _ = client.request("GET", f"/{bucket}", query)
+        check(status, body, f"list {bucket}")
+        text = body.decode()
+        for entry in re.findall(r"<Contents>(.*?)</Contents>", text, re.S):
+            key = html.unescape(re.search(r"<Key>([^<]*)</Key>", entry).group(1))
+            etag = html.unescape(re.search(r"<ETag>([^<]*)</ETag>", entry).group(1)).strip('"')
+            size = int(re.search(r"<Size>(\d+)</Size>", entry).group(1))
+            yield key, etag, size
+        match = re.search(r"<NextContinuationToken>([^<]+)</NextContinuationToken>", text)
+        if "<IsTruncated>true</IsTruncated>" not in text or not match:
+            return
+        token = html.unescape(match.group(1))
+
+
+class S3Writer:
+    """File-like sink that uploads in multipart parts from an in-memory buffer"""
+
+    def __init__(self, client, path, part_size=PART_SIZE):
+        self.client = client
+        self.path = path
+        self.part_size = part_size
+        self.buffer = bytearray()
+        self.upload_id = None
+        self.etags = []
+
+    def write(self, data):
+        self.buffer += data
+        while len(self.buffer) >= self.part_size:
+            self._put_part(bytes(self.buffer[: self.part_size]))
+            del self.buffer[: self.part_size]
+
+    def _put_part(self, data):
+        if self.upload_id is None:
+            status, _, body, _ = self.client.request("POST", self.path, {"uploads": ""})
+            check(status, body, f"initiate {self.path}")
+            self.upload_id = re.search(rb"<UploadId>([^<]+)</UploadId>", body).group(1).decode()
+        number = len(self.etags) + 1
+        status, headers, body, _ = self.client.request(
+            "PUT", self.path, {"partNumber": str(number), "uploadId": self.upload_id}, data
+        )
+        check(status, body, f"PUT {self.path} part {number}")
+        self.etags.append(headers.get("ETag") or headers.get("etag", ""))
+
+    def close(self):
+        if self.upload_id is None:
+            status, _, body, _ = self.client.request("PUT", self.path, body=bytes(self.buffer))
+            check(status, body, f"PUT {self.path}")
+            return
+        if self.buffer:
+            self._put_part(bytes(self.buffer))
+        listing = "".join(
+            f"<Part><PartNumber>{n}</PartNumber><ETag>{etag}</ETag></Part>"
+            for n, etag in enumerate(self.etags, 1)
+        )
+        body = f"<CompleteMultipartUpload>{listing}</CompleteMultipartUpload>".encode()
+        status, _, data, _ = self.client.request("POST", self.path, {"uploadId": self.upload_id}, body)
+        check(status, data, f"complete {self.path}")
+
+    def abort(self):
+        if self.upload_id:
+            self.client.request("DELETE", self.path, {"uploadId": self.upload_id})
+
+
+class S3Reader:
+    """Streams one object; drops the connection if abandoned half-way"""
+
+    def __init__(self, client, path):
+        self.client = client
+        self.response = client.stream(path)
+        if self.response.status != 200:
+            body = self.response.read()
+            raise RuntimeError(f"GET {path}: HTTP {self.response.status} {body[:200]!r}")
+
+    def read(self, size):
+        return self.response.read(size)
+
+    def close(self):
+        if not self.response.isclosed():
+            self.client.reset()
+
+
+class LocalWriter:
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.file = open(path, "wb")
+
+    def write(self, data):
+        self.file.write(data)
+
+    def close(self):
+        self.file.close()
+
+    def abort(self):
+        self.file.close()
+        os.remove(self.path)
+
+
+class LocalTarget:
+    def __init__(self, root):
+        self.root = root
+
+    def __str__(self):
+        return self.root
+
+    def _path(self, name):
+        return os.path.join(self.root, *name.split("/"))
+
+    def prepare(self):
+        os.makedirs(self.root, exist_ok=True)
+
+    def writer(self, name):
+        return LocalWriter(self._path(name))
+
+    def reader(self, name):
+        return open(self._path(name), "rb")
+
+    def put(self, name, data):
+        f = self.writer(name)
+        f.write(data)
+        f.close()
+
+    def get(self, name):
+        with self.reader(name) as f:
+            return f.read()
+
+    def delete(self, name):
+        os.remove(self._path(name))
+
+    def list(self, prefix):
+        directory = self._path(prefix)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(f"{prefix}/{name}" for name in os.listdir(directory))
+
+
+class S3Target:
+    def __init__(self, client, bucket, prefix):
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+
+    def __str__(self):
+        return f"s3://{self.bucket}/{self.prefix}"
+
+    def _key(self, name):
+        return f"{self.prefix}/{name}" if self.prefix else name
+
+    def prepare(self):
+        create_bucket(self.client, self.bucket)
+
+    def writer(self, name):
+        return S3Writer(self.client, f"/{self.bucket}/{self._key(name)}")
+
+    def reader(self, name):
+        return S3Reader(self.client, f"/{self.bucket}/{self._key(name)}")
+
+    def put(self, name, data):
+        status, _, body, _ = self.client.request("PUT", f"/{self.bucket}/{self._key(name)}", body=data)
+        check(status, body, f"PUT {name}")
+
+    def get(self, name):
+        status, _, body, _ = self.client.request("GET", f"/{self.bucket}/{self._key(name)}")
+        check(status, body, f"GET {name}")
+        return body
+
+    def delete(self, name):
+        self.client.request("DELETE", f"/{self.bucket}/{self._key(name)}")
+
+    def list(self, prefix):
+        strip = len(self.prefix) + 1 if self.prefix else 0
+        keys = list_objects(self.client, self.bucket, self._key(prefix) + "/")
+        return sorted(key[strip:] for key, _, _ in keys)
+
+
+def open_target(value, endpoint=None):
+    """Directory path, or s3://bucket/prefix with AWS_* credentials"""
+    if not value.startswith("s3://"):
+        return LocalTarget(os.path.abspath(value))
+    bucket, _, prefix = value[5:].partition("/")
+    client = S3Client(
+        endpoint or os.environ.get("AWS_ENDPOINT_URL", "https://s3.amazonaws.com"),
+        os.environ.get("AWS_ACCESS_KEY_ID", ""),
+        os.environ.get("AWS_SECRET_ACCESS_KEY", ""),
+        region=os.environ.get("AWS_REGION", "us-east-1"),
+    )
+    return S3Target(client, bucket, prefix)
+
+
+class Postgres:
+    """pg_dump/psql inside the postgres pod, or locally against --pg-host"""
+
+    def __init__(self, host=None):
+        self.host = host
+
+    def _argv(self, tool, *args):
+        if self.host:
+            return [tool, "-h", self.host, *args]
+        return [
+            "kubectl", "exec", "-i", "-n", NAMESPACE, "deploy/postgres", "--",
+            "sh", "-c", f'{tool} -U "$POSTGRES_USER" "$@"', "_", *args,
+        ]
+
+    def databases(self):
+        output = subprocess.check_output(
+            self._argv(
+                "psql", "-At", "-d", "postgres", "-c",
+                "SELECT datname FROM pg_database WHERE NOT datistemplate AND datname <> 'postgres'",
+            ),
+            timeout=30,
+        )
+        return output.decode().split()
+
+    def dump(self, db):
+        return subprocess.Popen(
+            self._argv("pg_dump", "--clean", "--if-exists", "-d", db),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+
+    def restore(self, db):
+        subprocess.run(
+            self._argv("psql", "-q", "-d", "postgres", "-c", f'CREATE DATABASE "{db}"'),
+            capture_output=True,
+            timeout=30,
+        )
+        return subprocess.Popen(
+            self._argv("psql", "-q", "-v", "ON_ERROR_STOP=1", "-d", db),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+
+
+class Progress:
+    """Thread-safe counters with a periodic one-line report"""
+
+    def __init__(self, total, interval=5):
+        self.total = total
+        self.done = 0
+        self.raw = 0
+        self.stored = 0
+        self.start = time.time()
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self._report, args=(interval,), daemon=True)
+        self.thread.start()
+
+    def add(self, raw, stored):
+        with self.lock:
+            self.raw += raw
+            self.stored += stored
+
+    def finish_item(self):
+        with self.lock:
+            self.done += 1
+
+    def rate(self):
+        return self.raw / max(time.time() - self.start, 1e-6)
+
+    def _report(self, interval):
+        while not self.stop.wait(interval):
+            print(
+                f"   ⏳ {self.done}/{self.total} items, {format_bytes(self.raw)} read, "
+                f"{format_bytes(self.stored)} stored, {format_bytes(self.rate())}/s"
+            )
+
+    def close(self):
+        self.stop.set()
+        self.thread.join()
+
+
+def compress_into(read, writer, progress, level):
+    """Stream read() -> gzip -> writer; returns (sha256, raw size)"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while True:
+            chunk = read(CHUNK)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+            out = compressor.compress(chunk)
+            writer.write(out)
+            progress.add(len(chunk), len(out))
+        out = compressor.flush()
+        writer.write(out)
+        progress.add(0, len(out))
+        writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+    return digest.hexdigest(), size
+
+
+def decompress_into(reader, write, progress):
+    """Stream reader -> gunzip -> write(); returns (sha256, raw size)"""
+    decompressor = zlib.decompressobj(31)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while True:
+            chunk = reader.read(CHUNK)
+            if not chunk:
+                break
+            out = decompressor.decompress(chunk)
+            digest.update(out)
+            size += len(out)
+            write(out)
+            progress.add(len(out), len(chunk))
+        out = decompressor.flush()
+        digest.update(out)
+        size += len(out)
+        write(out)
+    finally:
+        reader.close()
+    return digest.hexdigest(), size
+
+
+def task_label(kind, name, args):
+    return f"{kind} {name}/{args[0]}" if kind == "minio" else f"{kind} {name}"
+
+
+def run_tasks(tasks, handlers, workers, progress):
+    """Run (kind, name, args) tasks on a pool; returns (kind, name, args, error) per failure"""
+    failures = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(handlers[kind], name, *args): (kind, name, args)
+            for kind, name, args in tasks
+        }
+        for future in as_completed(futures):
+            kind, name, args = futures[future]
+            progress.finish_item()
+            if future.exception():
+                failures.append((kind, name, args, future.exception()))
+    progress.close()
+    return failures
+
+
+def latest_snapshot(target):
+    snapshots = target.list("snapshots")
+    return snapshots[-1] if snapshots else None
+
+
+def target_area(target, minio):
+    """(bucket, prefix) the target writes to when it is on the MinIO being backed up"""
+    if not minio or not isinstance(target, S3Target):
+        return None
+    client = target.client
+    if (client.https, client.host, client.port) != (minio.https, minio.host, minio.port):
+        return None
+    return target.bucket, target.prefix
+
+
+def backup(target, minio=None, postgres=None, workers=8, level=3):
+    """Back up into target; returns True when every item succeeded"""
+    target.prepare()
+    latest = latest_snapshot(target)
+    snapshot_id = time.strftime("%Y%m%d-%H%M%S")
+    while latest and f"snapshots/{snapshot_id}.json" <= latest:
+        # Ids must sort after the previous snapshot, and blobs are named by id
+        time.sleep(1)
+        snapshot_id = time.strftime("%Y%m%d-%H%M%S")
+    previous = json.loads(target.get(latest)) if latest else {"postgres": {}, "minio": {}}
+    manifest = {
+        "id": snapshot_id,
+        "created": time.time(),
+        "postgres": {},
+        "minio": {},
+        "failed": {"postgres": {}, "minio": {}},
+    }
+    print(f"💾 Backup {snapshot_id} -> {target}" + (f" (incremental on {latest})" if latest else ""))
+
+    tasks = []
+    if postgres:
+        for db in postgres.databases():
+            tasks.append(("postgres", db, ()))
+    skipped = 0
+    own = target_area(target, minio)
+    if own:
+        # Never back up earlier snapshots into the next one
+        print(f"   Skipping {target} itself: it lives on the MinIO being backed up")
+    if minio:
+        for bucket in list_buckets(minio):
+            if own and bucket == own[0] and not own[1]:
+                continue
+            known = previous["minio"].get(bucket, {})
+            manifest["minio"][bucket] = {}
+            for key, etag, size in list_objects(minio, bucket):
+                if own and bucket == own[0] and key.startswith(own[1] + "/"):
+                    continue
+                entry = known.get(key)
+                if entry and entry["etag"] == etag and entry["size"] == size:
+                    manifest["minio"][bucket][key] = entry
+                    skipped += 1
+                else:
+                    tasks.append(("minio", bucket, (key, etag, size)))
+    print(f"   {len(tasks)} item(s) to copy, {skipped} unchanged object(s) skipped")
+
+    progress = Progress(len(tasks))
+    lock = threading.Lock()
+
+    def dump_database(db):
+        blob = f"postgres/{db}/{snapshot_id}.sql.gz"
+        process = postgres.dump(db)
+        try:
+            sha, size = compress_into(process.stdout.read, target.writer(blob), progress, level)
+        finally:
+            process.stdout.close()
+            error = process.stderr.read().decode(errors="replace")
+            process.wait()
+        if process.returncode != 0:
+            target.delete(blob)
+            raise RuntimeError(f"pg_dump {db}: {error.strip()[-300:]}")
+        old = previous["postgres"].get(db)
+        if old and old["sha256"] == sha:
+            target.delete(blob)
+            entry = old
+        else:
+            entry = {"blob": blob, "sha256": sha, "size": size}
+        with lock:
+            manifest["postgres"][db] = entry
+
+    def copy_object(bucket, key, etag, size):
+        blob = f"minio/{bucket}/{key}@{etag}.gz"
+        source = S3Reader(minio, f"/{bucket}/{key}")
+        try:
+            sha, _ = compress_into(source.read, target.writer(blob), progress, level)
+        finally:
+            source.close()
+        with lock:
+            manifest["minio"][bucket][key] = {"blob": blob, "etag": etag, "size": size, "sha256": sha}
+
+    failures = run_tasks(tasks, {"postgres": dump_database, "minio": copy_object}, workers, progress)
+    # Recorded so restore can say what this snapshot is missing; the next
+    # backup finds no entry for them and copies them again
+    for kind, name, args, error in failures:
+        if kind == "minio":
+            manifest["failed"]["minio"].setdefault(name, {})[args[0]] = str(error)
+        else:
+            manifest["failed"]["postgres"][name] = str(error)
+
+    target.put(f"snapshots/{snapshot_id}.json", json.dumps(manifest, indent=1).encode())
+    elapsed = time.time() - progress.start
+    ratio = progress.raw / progress.stored if progress.stored else 0
+    print(
+        f"\n📊 {len(tasks) - len(failures)} copied, {skipped} skipped, "
+        f"{format_bytes(progress.raw)} -> {format_bytes(progress.stored)} (x{ratio:.1f}) "
+        f"in {elapsed:.1f}s, {format_bytes(progress.rate())}/s"
+    )
+    for kind, name, args, error in failures:
+        print(f"   ❌ {task_label(kind, name, args)}: {error}")
+    print(
+        f"✅ Snapshot {snapshot_id} written" if not failures
+        else f"⚠️  Snapshot {snapshot_id} written without {len(failures)} failed item(s)"
+    )
+    return not failures
+
+
+def restore(target, snapshot=None, minio=None, postgres=None, workers=8):
+    """Restore a snapshot (latest by default); returns True when every item succeeded"""
+    name = f"snapshots/{snapshot}.json" if snapshot else latest_snapshot(target)
+    if not name:
+        print(f"❌ No snapshots in {target}")
+        return False
+    manifest = json.loads(target.get(name))
+    print(f"♻️  Restoring {manifest['id']} from {target}")
+
+    tasks = []
+    if postgres:
+        tasks += [("postgres", db, (entry,)) for db, entry in manifest["postgres"].items()]
+    if minio:
+        for bucket, objects in manifest["minio"].items():
+            create_bucket(minio, bucket)
+            tasks += [("minio", bucket, (key, entry)) for key, entry in objects.items()]
+    failed = manifest.get("failed", {"postgres": {}, "minio": {}})
+    missing = []
+    if postgres:
+        missing += [(f"postgres {db}", error) for db, error in failed["postgres"].items()]
+    if minio:
+        missing += [
+            (f"minio {bucket}/{key}", error)
+            for bucket, objects in failed["minio"].items()
+            for key, error in objects.items()
+        ]
+    print(f"   {len(tasks)} item(s) to restore")
+    if missing:
+        print(f"   ⚠️  {len(missing)} item(s) failed during backup and are not in this snapshot:")
+        for label, error in missing:
+            print(f"      ❌ {label}: {error}")
+    progress = Progress(len(tasks))
+
+    def restore_database(db, entry):
+        process = postgres.restore(db)
+        try:
+            sha, _ = decompress_into(target.reader(entry["blob"]), process.stdin.write, progress)
+        finally:
+            process.stdin.close()
+            error = process.stderr.read().decode(errors="replace")
+            process.wait()
+        if process.returncode != 0:
+            raise RuntimeError(f"psql {db}: {error.strip()[-300:]}")
+        if sha != entry["sha256"]:
+            raise RuntimeError(f"{db}: checksum mismatch")
+
+    def restore_object(bucket, key, entry):
+        writer = S3Writer(minio, f"/{bucket}/{key}")
+        try:
+            sha, _ = decompress_into(target.reader(entry["blob"]), writer.write, progress)
+            writer.close()
+        except BaseException:
+            writer.abort()
+            raise
+        if sha != entry["sha256"]:
+            raise RuntimeError(f"{bucket}/{key}: checksum mismatch")
+
+    failures = run_tasks(tasks, {"postgres": restore_database, "minio": restore_object}, workers, progress)
+
+    print(
+        f"\n📊 {len(tasks) - len(failures)}/{len(tasks)} restored, {format_bytes(progress.raw)} "
+        f"in {time.time() - progress.start:.1f}s, {format_bytes(progress.rate())}/s"
+    )
+    for kind, name, args, error in failures:
+        print(f"   ❌ {task_label(kind, name, args)}: {error}")
+    if missing:
+        print(f"   ⚠️  {len(missing)} item(s) missing from the snapshot were not restored")
+    print(f"{'✅' if not failures and not missing else '⚠️ '} Restore of {manifest['id']} finished")
+    return not failures and not missing
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Offline Capacity Planner
+Simulates scheduling every workload in components/ onto the cluster's nodes
+
+Reads each component's kustomization resources (local files only; remote
+URLs are listed as skipped), collects Deployments, StatefulSets, DaemonSets
+and Knative Services with their resource requests, and the HPA maxReplicas
+targeting them. Pods are then bin-packed onto the nodes the way the default
+scheduler would (nodeSelector, requests vs. allocatable, least-allocated
+node first) for two scenarios:
+
+  steady      declared replicas, Knative services at min-scale
+  worst-case  every HPA at maxReplicas, every Knative service awake
+
+Node allocatable comes from a snapshot, no cluster access needed:
+    kubectl get nodes -o json > nodes.json
+or a small YAML file:
+    nodes:
+      - name: boomer
+        cpu: "4"
+        memory: 16Gi
+        pods: 110
+        labels: {node-role.kubernetes.io/worker: worker}
+
+Usage:
+    ./admin/capacity_planner.py --nodes nodes.json
+    ./admin/capacity_planner.py --nodes nodes.yaml --scenario worst-case --json plan.json
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+
+try:
+    import yaml
+except ImportError:
+    print("❌ PyYAML is required: pip install pyyaml")
+    sys.exit(1)
+
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMPONENTS_DIR = os.path.join(REPO_ROOT, "components")
+WORKLOAD_KINDS = ("Deployment", "StatefulSet", "DaemonSet")
+MEMORY_UNITS = {
+    "Ki": 2**10,
+    "Mi": 2**20,
+    "Gi": 2**30,
+    "Ti": 2**40,
+    "k": 10**3,
+    "K": 10**3,
+    "M": 10**6,
+    "G": 10**9,
+    "T": 10**12,
+}
+
+
+def parse_cpu(value):
+    """Kubernetes CPU quantity -> cores"""
+    value = str(value)
+    if value.endswith("m"):
+        return float(value[:-1]) / 1000
+    return float(value)
+
+
+def parse_memory(value):
+    """Kubernetes memory quantity -> bytes"""
+    match = re.fullmatch(r"([0-9.eE+-]+)([A-Za-z]*)", str(value))
+    number, unit = match.groups()
+    return float(number) * MEMORY_UNITS.get(unit, 1)
+
+
+def load_documents(path):
+    with open(path) as f:
+        return [doc for doc in yaml.load_all(f, Loader=Loader) if isinstance(doc, dict)]
+
+
+def kustomization_documents(directory, skipped):
+    """Documents from a kustomization's local resources (patches excluded)"""
+    kustomization = os.path.join(directory, "kustomization.yaml")
+    if not os.path.exists(kustomization):
+        return []
+    with open(kustomization) as f:
+        config = yaml.load(f, Loader=Loader) or {}
+    documents = []
+    for resource in config.get("resources", []):
+        if "://" in resource:
+            skipped.append(f"{os.path.relpath(directory, REPO_ROOT)}: {resource}")
+            continue
+        path = os.path.join(directory, resource)
+        if os.path.isdir(path):
+            documents += kustomization_documents(path, skipped)
+        elif os.path.exists(path):
+            documents += load_documents(path)
+    return documents
+
+
+def pod_requests(pod_spec):
+    """(cpu cores, memory bytes) requested by a pod spec"""
+
+    def container_requests(container):
+        requests = container.get("resources", {}).get("requests", {})
+        return (
+            parse_cpu(requests.get("cpu", 0)),
+            parse_memory(requests.get("memory", 0)),
+        )
+
+    cpu = mem = 0.0
+    for container in pod_spec.get("containers", []):
+        c, m = container_requests(container)
+        cpu, mem = cpu + c, mem + m
+    # Init containers run one at a time before the app containers
+    for container in pod_spec.get("initContainers", []):
+        c, m = container_requests(container)
+        cpu, mem = max(cpu, c), max(mem, m)
+    return cpu, mem
+
+
+def collect_workloads(documents):
+    """Workload dicts: name, kind, cpu, memory, replicas, max_replicas, selector"""
+    hpas = {}
+    for doc in documents:
+        if doc.get("kind") == "HorizontalPodAutoscaler":
+            target = doc["spec"]["scaleTargetRef"]
+            hpas[(target["kind"], target["name"])] = doc["spec"]
+
+    workloads = []
+    for doc in documents:
+        kind = doc.get("kind")
+        name = doc.get("metadata", {}).get("name", "?")
+        if kind in WORKLOAD_KINDS:
+            spec = doc.get("spec", {})
+            pod_spec = spec.get("template", {}).get("spec", {})
+            if not pod_spec.get("containers"):
+                continue
+            replicas = spec.get("replicas", 1)
+            hpa = hpas.get((kind, name))
+            max_replicas = hpa["maxReplicas"] if hpa else replicas
+            if hpa:
+                replicas = max(replicas, hpa.get("minReplicas", 1))
+        elif kind == "Service" and doc.get("apiVersion", "").startswith(
+            "serving.knative.dev"
+        ):
+            template = doc["spec"]["template"]
+            pod_spec = template["spec"]
+            annotations = template.get("metadata", {}).get("annotations", {})
+            replicas = int(annotations.get("autoscaling.knative.dev/min-scale", 0))
+            # Waking up means at least one pod, or initial-scale if set higher
+            initial = int(annotations.get("autoscaling.knative.dev/initial-scale", 1))
+            max_replicas = max(1, replicas, initial)
+        else:
+            continue
+        cpu, mem = pod_requests(pod_spec)
+        workloads.append(
+            {
+                "name": name,
+                "kind": "KnativeService" if kind == "Service" else kind,
+                "cpu": cpu,
+                "memory": mem,
+                "replicas": replicas,
+                "max_replicas": max_replicas,
+                "node_selector": pod_spec.get("nodeSelector", {}),
+            }
+        )
+    return workloads
+
+
+def load_nodes(path):
+    """Nodes from `kubectl get nodes -o json` or the simple YAML format"""
+    with open(path) as f:
+        data = yaml.load(f, Loader=Loader)
+    nodes = []
+    if "items" in data:
+        for item in data["items"]:
+            allocatable = item["status"]["allocatable"]
+            unschedulable = item.get("spec", {}).get("unschedulable", False)
+            nodes.append(
+                {
+                    "name": item["metadata"]["name"],
+                    "cpu": parse_cpu(allocatable["cpu"]),
+                    "memory": parse_memory(allocatable["memory"]),
+                    "pods": int(allocatable.get("pods", 110)),
+                    "labels": item["metadata"].get("labels", {}),
+                    "unschedulable": unschedulable,
+                }
+            )
+    else:
+        for item in data["nodes"]:
+            nodes.append(
+                {
+                    "name": item["name"],
+                    "cpu": parse_cpu(item["cpu"]),
+                    "memory": parse_memory(item["memory"]),
+                    "pods": int(item.get("pods", 110)),
+                    "labels": item.get("labels", {}),
+                    "unschedulable": item.get("unschedulable", False),
+                }
+            )
+    return nodes
+
+
+def matches(node, selector):
+    return all(node["labels"].get(k) == str(v) for k, v in selector.items())
+
+
+def simulate(workloads, nodes, scenario):
+    """Bin-pack pods; return per-node usage and the unschedulable pods"""
+    usage = {n["name"]: {"cpu": 0.0, "memory": 0.0, "pods": 0} for n in nodes}
+    placements = []
+    pending = []
+
+    def place(pod, node):
+        used = usage[node["name"]]
+        used["cpu"] += pod["cpu"]
+        used["memory"] += pod["memory"]
+        used["pods"] += 1
+        placements.append((pod["name"], node["name"]))
+
+    def shortfall(pod, node):
+        """Resources pod doesn't fit on node for, empty when it fits"""
+        used = usage[node["name"]]
+        missing = []
+        if used["cpu"] + pod["cpu"] > node["cpu"] + 1e-9:
+            missing.append("cpu")
+        if used["memory"] + pod["memory"] > node["memory"]:
+            missing.append("memory")
+        if used["pods"] + 1 > node["pods"]:
+            missing.append("pods")
+        return missing
+
+    schedulable = [n for n in nodes if not n["unschedulable"]]
+    pods = []
+    for w in workloads:
+        if w["kind"] == "DaemonSet":
+            for node in schedulable:
+                if matches(node, w["node_selector"]):
+                    pod = dict(w, name=f"{w['name']}@{node['name']}")
+                    if shortfall(pod, node):
+                        pending.append((pod, shortfall(pod, node)))
+                    else:
+                        place(pod, node)
+            continue
+        pods += [dict(w, name=f"{w['name']}#{i + 1}") for i in range(w["replicas"])]
+
+    # Steady-state pods biggest first, the usual way to pack them
+    pods.sort(key=lambda p: (p["memory"], p["cpu"]), reverse=True)
+    if scenario == "worst-case":
+        # Then scale out one replica at a time, round-robin across workloads,
+        # so the first pod that fails shows which resource runs out first
+        extra = {w["name"]: w["max_replicas"] - w["replicas"] for w in workloads}
+        while any(n > 0 for n in extra.values()):
+            for w in workloads:
+                if w["kind"] != "DaemonSet" and extra[w["name"]] > 0:
+                    replica = w["max_replicas"] - extra[w["name"]] + 1
+                    pods.append(dict(w, name=f"{w['name']}#{replica}"))
+                    extra[w["name"]] -= 1
+
+    for pod in pods:
+        candidates = [n for n in schedulable if matches(n, pod["node_selector"])]
+        if not candidates:
+            pending.append((pod, ["no node matches nodeSelector"]))
+            continue
+        fitting = [n for n in candidates if not shortfall(pod, n)]
+        if not fitting:
+            reasons = sorted({r for n in candidates for r in shortfall(pod, n)})
+            pending.append((pod, reasons))
+            continue
+        # LeastAllocated: prefer the node with the most free memory+cpu share
+        best = max(
+            fitting,
+            key=lambda n: (n["cpu"] - usage[n["name"]]["cpu"]) / n["cpu"]
+            + (n["memory"] - usage[n["name"]]["memory"]) / n["memory"],
+        )
+        place(pod, best)
+    return usage, pending
+
+
+def first_exhausted(nodes, usage):
+    """Resource with the least cluster-wide headroom"""
+    ratios = {}
+    for resource in ("cpu", "memory", "pods"):
+        total = sum(n[resource] for n in nodes if not n["unschedulable"])
+        used = sum(usage[n["name"]][resource] for n in nodes if not n["unschedulable"])
+        ratios[resource] = used / total if total else 1
+    resource = max(ratios, key=ratios.get)
+    return resource, ratios[resource]
+
+
+def format_memory(value):
+    return f"{value / 2**30:.1f}Gi"
+
+
+def report(nodes, usage, pending, scenario):
+    print(f"\n📐 Scenario: {scenario}")
+    print(f"{'Node':<12} {'CPU used/alloc':<20} {'Memory used/alloc':<24} {'Pods':<8}")
+    print("-" * 66)
+    for node in nodes:
+        used = usage[node["name"]]
+        flag = " (cordoned)" if node["unschedulable"] else ""
+        cpu = f"{used['cpu']:.2f}/{node['cpu']:.2f} ({used['cpu'] / node['cpu'] * 100:.0f}%)"
+        mem = (
+            f"{format_memory(used['memory'])}/{format_memory(node['memory'])} "
+            f"({used['memory'] / node['memory'] * 100:.0f}%)"
+        )
+        print(f"{node['name']:<12} {cpu:<20} {mem:<24} {used['pods']:<8}{flag}")
+
+    resource, ratio = first_exhausted(nodes, usage)
+    print(f"\n   🔋 Tightest resource: {resource} at {ratio * 100:.0f}% of allocatable")
+    if pending:
+        print(f"   ❌ {len(pending)} pod(s) cannot be scheduled:")
+        for pod, reasons in pending:
+            print(
+                f"      • {pod['name']} ({pod['cpu']:.2f} CPU, "
+                f"{format_memory(pod['memory'])}): {', '.join(reasons)}"
+            )
+        # Placement constraints (nodeSelector) are not a resource running out
+        exhausted = []
+        for _, reasons in pending:
+            exhausted = [r for r in reasons if r in ("cpu", "memory", "pods")]
+            if exhausted:
+                break
+        if exhausted:
+            print(f"   ⚠️  First to run out: {', '.join(exhausted)}")
+        else:
+            print("   ⚠️  No resource runs out: only placement constraints keep pods pending")
+    else:
+        print("   ✅ Every pod fits")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline capacity planner")
+    parser.add_argument("--nodes", required=True, help="Node snapshot JSON/YAML")
+    parser.add_argument(
+        "--scenario",
+        choices=["steady", "worst-case", "both"],
+        default="both",
+    )
+    parser.add_argument(
+        "--components", default=COMPONENTS_DIR, help="Directory of components"
+    )
+    parser.add_argument("--json", help="Write the plan as JSON")
+    args = parser.parse_args()
+
+    skipped = []
+    documents = []
+    for name in sorted(os.listdir(args.components)):
+        directory = os.path.join(args.components, name)
+        if os.path.isdir(directory):
+            documents += kustomization_documents(directory, skipped)
+    workloads = collect_workloads(documents)
+    nodes = load_nodes(args.nodes)
+
+    print("🧮 Glasgow Capacity Planner")
+    print(
+        f"   {len(documents)} manifests, {len(workloads)} workloads, {len(nodes)} nodes"
+    )
+    for source in skipped:
+        print(f"   ⏭️  Skipped remote resource {source}")
+
+    scenarios = ["steady", "worst-case"] if args.scenario == "both" else [args.scenario]
+    plan = {}
+    for scenario in scenarios:
+        usage, pending = simulate(workloads, nodes, scenario)
+        report(nodes, usage, pending, scenario)
+        resource, ratio = first_exhausted(nodes, usage)
+        plan[scenario] = {
+            "usage": usage,
+            "tightest_resource": resource,
+            "tightest_ratio": round(ratio, 3),
+            "unschedulable": [
+                {"pod": pod["name"], "reasons": reasons} for pod, reasons in pending
+            ],
+        }
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"workloads": workloads, "plan": plan}, f, indent=2)
+        print(f"\n💾 Plan written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
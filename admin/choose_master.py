@@ -3,52 +3,40 @@
 Choose Master Node - Compare worker nodes to select best master candidate
 """
 
+import argparse
+import json
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
-USERNAME = "bsg"
-PASSWORD = "mlop!"
-WORKERS = [
-    ("boomer", "192.168.1.21"),
-    ("apollo", "192.168.1.22"),
-    ("starbuck", "192.168.1.23"),
-]
+import admin_daemon
+import node_metrics
+import result_cache
+from common import LOCAL_HOSTS, WORKERS, parse_hosts, percentile, ssh_command
 
-
-def ssh_command(ip, cmd):
-    """Execute SSH command and return output"""
-    try:
-        result = subprocess.check_output(
-            [
-                "sshpass",
-                "-p",
-                PASSWORD,
-                "ssh",
-                "-o",
-                "ConnectTimeout=3",
-                "-o",
-                "StrictHostKeyChecking=no",
-                f"{USERNAME}@{ip}",
-                cmd,
-            ],
-            stderr=subprocess.DEVNULL,
-            timeout=5,
-        )
-        return result.decode().strip()
-    except Exception:
-        return None
+# k3s keeps its datastore (sqlite/etcd) under here on servers; agents have it too
+DATASTORE_DIR = "/var/lib/rancher/k3s"
+IPERF_IMAGE = "networkstatic/iperf3"
 
 
+@result_cache.cached("uptime", skip=(0,))
 def get_uptime(ip):
     """Get system uptime in seconds"""
+    sample = node_metrics.latest(ip)
+    if sample:
+        return sample["uptime"]
     output = ssh_command(ip, "cat /proc/uptime")
     if output:
         return float(output.split()[0])
     return 0
 
 
+@result_cache.cached("cpu", skip=(0,))
 def get_cpu_usage(ip):
     """Get current CPU usage percentage"""
+    sample = node_metrics.latest(ip)
+    if sample:
+        return sample["cpu_percent"]
     output = ssh_command(ip, "top -bn1 | grep 'Cpu(s)' | awk '{print $2 + $4}'")
     if output:
         try:
@@ -58,8 +46,12 @@ def get_cpu_usage(ip):
     return 0
 
 
+@result_cache.cached("memory", skip=((0, 0),))
 def get_memory_info(ip):
     """Get memory usage (used, total in MB)"""
+    sample = node_metrics.latest(ip)
+    if sample:
+        return sample["mem_used_mb"], sample["mem_total_mb"]
     output = ssh_command(ip, "free -m | awk '/Mem:/ {print $3,$2}'")
     if output:
         parts = output.split()
@@ -67,8 +59,12 @@ def get_memory_info(ip):
     return 0, 0
 
 
+@result_cache.cached("disk", skip=(0,))
 def get_disk_usage(ip):
     """Get root disk usage percentage"""
+    sample = node_metrics.latest(ip)
+    if sample:
+        return round(sample["disk_percent"])
     output = ssh_command(ip, "df -h / | awk 'NR==2 {print $5}' | tr -d '%'")
     if output:
         try:
@@ -78,8 +74,12 @@ def get_disk_usage(ip):
     return 0
 
 
+@result_cache.cached("temperature", skip=(0,))
 def get_temperature(ip):
     """Get CPU temperature in Celsius"""
+    sample = node_metrics.latest(ip)
+    if sample and sample["temperature"] is not None:
+        return sample["temperature"]
     output = ssh_command(ip, "cat /sys/class/thermal/thermal_zone0/temp 2>/dev/null")
     if output:
         try:
@@ -89,6 +89,7 @@ def get_temperature(ip):
     return 0
 
 
+@result_cache.cached("errors", skip=(0,))
 def get_error_count(ip):
     """Get system error count from last 7 days"""
     output = ssh_command(
@@ -102,25 +103,26 @@ def get_error_count(ip):
     return 0
 
 
+@result_cache.cached("pods", skip=((0, 0),))
 def get_pod_count(hostname):
     """Get number of pods running on this node"""
+    cmd = [
+        "kubectl",
+        "get",
+        "pods",
+        "--all-namespaces",
+        "--field-selector",
+        f"spec.nodeName={hostname}",
+        "-o",
+        "json",
+    ]
     try:
-        output = subprocess.check_output(
-            [
-                "kubectl",
-                "get",
-                "pods",
-                "--all-namespaces",
-                "--field-selector",
-                f"spec.nodeName={hostname}",
-                "-o",
-                "json",
-            ],
-            stderr=subprocess.DEVNULL,
-        )
-        import json
-
-        pods_data = json.loads(output.decode())
+        cached = admin_daemon.kubectl_get(" ".join(cmd))
+        if cached is not None:
+            output = cached[1]
+        else:
+            output = subprocess.check_output(cmd, stderr=subprocess.DEVNULL).decode()
+        pods_data = json.loads(output)
         running = sum(
             1
             for pod in pods_data.get("items", [])
@@ -131,7 +133,189 @@ def get_pod_count(hostname):
         return 0, 0
 
 
-def score_node(hostname, ip):
+FSYNC_SCRIPT = """
+import json, os, sys, time
+path = os.path.join(sys.argv[1], ".choose-master-fsync-%d" % os.getpid())
+block = b"x" * 2300  # roughly one etcd WAL entry
+latencies = []
+fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+try:
+    for _ in range(int(sys.argv[2])):
+        start = time.perf_counter()
+        os.write(fd, block)
+        os.fdatasync(fd)
+        latencies.append((time.perf_counter() - start) * 1000)
+finally:
+    os.close(fd)
+    os.unlink(path)
+print(json.dumps(latencies))
+"""
+
+
+def bench_fsync(ip, datastore_dir=DATASTORE_DIR, count=200):
+    """Sequential write+fdatasync latency on the datastore disk (p50/p99 in ms)"""
+    sudo = "" if ip in LOCAL_HOSTS else "sudo "
+    output = ssh_command(
+        ip,
+        f"{sudo}python3 - {datastore_dir} {count}",
+        timeout=60,
+        input_data=FSYNC_SCRIPT,
+    )
+    if not output:
+        return None
+    try:
+        latencies = json.loads(output.splitlines()[-1])
+    except ValueError:
+        return None
+    return {"p50": percentile(latencies, 50), "p99": percentile(latencies, 99)}
+
+
+def bench_rtt(src_ip, dst_ip, count=20):
+    """Ping dst from src and return p50/p99 round-trip time in ms"""
+    output = ssh_command(
+        src_ip, f"ping -c {count} -i 0.2 -W 1 {dst_ip}", timeout=count + 10
+    )
+    if not output:
+        return None
+    rtts = []
+    for line in output.splitlines():
+        if "time=" in line:
+            try:
+                rtts.append(float(line.split("time=")[1].split()[0]))
+            except ValueError:
+                continue
+    if not rtts:
+        return None
+    return {"p50": percentile(rtts, 50), "p99": percentile(rtts, 99)}
+
+
+def kubectl(args, timeout=60):
+    """Run kubectl and return stdout, or None on failure"""
+    try:
+        return subprocess.check_output(
+            ["kubectl"] + args, stderr=subprocess.DEVNULL, timeout=timeout
+        ).decode()
+    except Exception:
+        return None
+
+
+def start_iperf_server(hostname):
+    """Start a standalone iperf3 server pod pinned to a node, return its pod IP"""
+    name = f"iperf3-server-{hostname}"
+    overrides = json.dumps({"spec": {"nodeName": hostname}})
+    kubectl(
+        ["delete", "pod", name, "--ignore-not-found", "--grace-period=0", "--force"]
+    )
+    kubectl(
+        [
+            "run",
+            name,
+            f"--image={IPERF_IMAGE}",
+            "--restart=Never",
+            f"--overrides={overrides}",
+            "--",
+            "-s",
+        ]
+    )
+    if (
+        kubectl(["wait", "--for=condition=Ready", f"pod/{name}", "--timeout=60s"], 90)
+        is None
+    ):
+        return None
+    return kubectl(["get", "pod", name, "-o", "jsonpath={.status.podIP}"])
+
+
+def bench_throughput(src_hostname, server_ip, seconds=5):
+    """Run an iperf3 client pod on src node against a server pod, return Mbit/s"""
+    name = f"iperf3-client-{src_hostname}"
+    overrides = json.dumps({"spec": {"nodeName": src_hostname}})
+    output = kubectl(
+        [
+            "run",
+            name,
+            f"--image={IPERF_IMAGE}",
+            "--restart=Never",
+            "--rm",
+            "-i",
+            "--quiet",
+            f"--overrides={overrides}",
+            "--",
+            "-c",
+            server_ip,
+            "-t",
+            str(seconds),
+            "-J",
+        ],
+        timeout=seconds + 90,
+    )
+    if not output:
+        return None
+    try:
+        report = json.loads(output[output.index("{") :])
+        return report["end"]["sum_received"]["bits_per_second"] / 1e6
+    except (ValueError, KeyError):
+        return None
+
+
+def cleanup_iperf_pods(hostnames):
+    """Delete the standalone iperf3 pods created by the benchmark"""
+    names = [f"iperf3-server-{h}" for h in hostnames]
+    names += [f"iperf3-client-{h}" for h in hostnames]
+    kubectl(
+        ["delete", "pod", "--ignore-not-found", "--grace-period=0", "--force"] + names
+    )
+
+
+def run_benchmarks(nodes, datastore_dir=DATASTORE_DIR, throughput=False):
+    """Benchmark fsync on every node and RTT across the full mesh, in parallel"""
+    print("⏱️  Running control-plane benchmarks (fsync + network mesh)...")
+    pairs = [(a, b) for a in nodes for b in nodes if a != b]
+    results = {
+        hostname: {"fsync": None, "rtt": {}, "mbps": {}} for hostname, _ in nodes
+    }
+
+    with ThreadPoolExecutor(max_workers=len(nodes) + len(pairs)) as pool:
+        fsync_jobs = {
+            hostname: pool.submit(bench_fsync, ip, datastore_dir)
+            for hostname, ip in nodes
+        }
+        rtt_jobs = {(a[0], b[0]): pool.submit(bench_rtt, a[1], b[1]) for a, b in pairs}
+        for hostname, job in fsync_jobs.items():
+            results[hostname]["fsync"] = job.result()
+        for (src, dst), job in rtt_jobs.items():
+            results[src]["rtt"][dst] = job.result()
+
+    if throughput:
+        hostnames = [hostname for hostname, _ in nodes]
+        try:
+            with ThreadPoolExecutor(max_workers=len(nodes)) as pool:
+                server_ips = dict(
+                    zip(hostnames, pool.map(start_iperf_server, hostnames))
+                )
+            # One pair at a time so parallel streams don't share a NIC
+            for (src, _), (dst, _) in pairs:
+                if server_ips.get(dst):
+                    results[src]["mbps"][dst] = bench_throughput(src, server_ips[dst])
+        finally:
+            cleanup_iperf_pods(hostnames)
+
+    for hostname, bench in results.items():
+        fsync = bench["fsync"]
+        fsync_text = (
+            f"p50 {fsync['p50']:.2f}ms / p99 {fsync['p99']:.2f}ms" if fsync else "N/A"
+        )
+        print(f"   💽 {hostname}: fsync {fsync_text}")
+        for peer, rtt in bench["rtt"].items():
+            rtt_text = (
+                f"p50 {rtt['p50']:.2f}ms / p99 {rtt['p99']:.2f}ms" if rtt else "N/A"
+            )
+            mbps = bench["mbps"].get(peer)
+            mbps_text = f", {mbps:.0f} Mbit/s" if mbps else ""
+            print(f"      🌐 → {peer}: rtt {rtt_text}{mbps_text}")
+    return results
+
+
+def score_node(hostname, ip, bench=None):
     """Calculate a score for each node (higher = better candidate)"""
     print(f"\n{'='*50}")
     print(f"📊 Analyzing: {hostname} ({ip})")
@@ -212,6 +396,30 @@ def score_node(hostname, ip):
         score -= 5
         reasons.append(f"Many pods ({running_pods})")
 
+    if bench:
+        # fsync p99 is what etcd/kine commits wait on (etcd wants < 10ms)
+        fsync = bench.get("fsync")
+        if fsync:
+            print(f"💽 Fsync p99: {fsync['p99']:.2f}ms")
+            if fsync["p99"] < 10:
+                score += 10
+                reasons.append(f"Fast fsync (p99 {fsync['p99']:.1f}ms)")
+            elif fsync["p99"] > 25:
+                score -= 15
+                reasons.append(f"Slow fsync (p99 {fsync['p99']:.1f}ms)")
+
+        # Worst p99 RTT to any peer (API server <-> agents)
+        rtts = [rtt["p99"] for rtt in bench.get("rtt", {}).values() if rtt]
+        if rtts:
+            worst_rtt = max(rtts)
+            print(f"🌐 Peer RTT p99: {worst_rtt:.2f}ms")
+            if worst_rtt < 2:
+                score += 5
+                reasons.append(f"Low peer latency (p99 {worst_rtt:.1f}ms)")
+            elif worst_rtt > 10:
+                score -= 10
+                reasons.append(f"High peer latency (p99 {worst_rtt:.1f}ms)")
+
     # IP address bonus (lower IP = easier to remember)
     if ip == "192.168.1.21":
         score += 5
@@ -227,15 +435,50 @@ def score_node(hostname, ip):
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Choose the best master candidate")
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="Measure datastore fsync latency and inter-node RTT",
+    )
+    parser.add_argument(
+        "--throughput",
+        action="store_true",
+        help="With --benchmark, also run iperf3 pods between every node pair",
+    )
+    parser.add_argument(
+        "--datastore-dir",
+        default=DATASTORE_DIR,
+        help=f"Directory to fsync-test on each node (default: {DATASTORE_DIR})",
+    )
+    parser.add_argument(
+        "--hosts",
+        type=parse_hosts,
+        default=WORKERS,
+        help="Override candidates as name=ip,... (127.0.0.1 runs locally)",
+    )
+    parser.add_argument(
+        "--fresh", action="store_true", help="Ignore cached probe results"
+    )
+    args = parser.parse_args()
+    result_cache.set_fresh(args.fresh)
+
     print("=" * 50)
     print("🔍 Master Node Candidate Evaluation")
     print("=" * 50)
     print("\nAnalyzing all worker nodes...\n")
 
+    # Warm the node-agent samples for every candidate in one concurrent pass
+    node_metrics.fetch_all(args.hosts)
+
+    benchmarks = {}
+    if args.benchmark:
+        benchmarks = run_benchmarks(args.hosts, args.datastore_dir, args.throughput)
+
     results = []
 
-    for hostname, ip in WORKERS:
-        score, reasons = score_node(hostname, ip)
+    for hostname, ip in args.hosts:
+        score, reasons = score_node(hostname, ip, benchmarks.get(hostname))
         results.append((hostname, ip, score, reasons))
 
     # Sort by score (highest first)
@@ -276,4 +519,3 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"\n❌ Error: {e}")
         sys.exit(1)
-
@@ -8,6 +8,17 @@ import subprocess
 import sys
 import time
 import argparse
+import heapq
+import json
+import os
+import re
+import shlex
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import admin_daemon
+import common
 
 
 def run_command(cmd, show_output=True):
@@ -15,6 +26,15 @@ def run_command(cmd, show_output=True):
     if show_output:
         print(f"🔧 Running: {cmd}")
 
+    # Read-only queries are answered from the admin daemon's cache when it runs
+    cached = admin_daemon.kubectl_get(cmd) if cmd.startswith("kubectl get ") else None
+    if cached is not None:
+        success, stdout, stderr = cached
+        if show_output:
+            print(stdout if success else stderr)
+            return success
+        return cached
+
     try:
         result = subprocess.run(
             cmd, shell=True, capture_output=not show_output, text=True
@@ -133,12 +153,611 @@ def reset_namespace():
 def uncordon_all_nodes():
     """Uncordon all nodes to allow scheduling"""
     print("🔓 Uncordoning all nodes...")
-    nodes = ["adama", "apollo", "boomer", "starbuck"]
-    cmd = f"kubectl uncordon {' '.join(nodes)}"
-    run_command(cmd)
+    # Ask the API rather than hard-coding names: retired nodes make uncordon fail
+    success, output, error = run_command("kubectl get nodes -o name", show_output=False)
+    if not success or not output:
+        print(f"❌ Could not list nodes: {error}")
+        return
+    run_command(f"kubectl uncordon {' '.join(output.split())}")
     print("✅ Nodes uncordoned and ready for scheduling")
 
 
+# Brought up tier by tier: each tier only needs the ones before it
+STARTUP_TIERS = [
+    ["postgres", "minio"],
+    ["fastapi", "fastapi-msv2-api", "n8n"],
+    ["msv2-webapp", "home-assistant", "wireguard"],
+]
+LONGHORN_TRANSITIONS = {"creating", "attaching", "detaching"}
+
+
+class Watch(threading.Thread):
+    """Mirror of one API collection, kept current by list + watch"""
+
+    def __init__(self, source, collection, changed):
+        super().__init__(daemon=True)
+        self.source = source
+        self.collection = collection
+        self.changed = changed
+        self.objects = {}
+        self.initial = {}
+        self.synced = False
+        self.missing = False
+        self.stopped = threading.Event()
+
+    def update(self, obj):
+        name = obj["metadata"]["name"]
+        self.objects[name] = obj
+        self.initial.setdefault(name, obj)
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                listing = self.source.get(self.collection)
+                with self.changed:
+                    self.objects = {}
+                    for item in listing.get("items", []):
+                        self.update(item)
+                    self.synced = True
+                    self.changed.notify_all()
+                path = (
+                    f"{self.collection}?watch=1&timeoutSeconds=300"
+                    f"&resourceVersion={listing['metadata']['resourceVersion']}"
+                )
+                for change in self.source.watch(path):
+                    if self.stopped.is_set():
+                        return
+                    if change.get("type") == "ERROR":
+                        break  # usually 410 Gone: relist
+                    with self.changed:
+                        if change.get("type") == "DELETED":
+                            self.objects.pop(change["object"]["metadata"]["name"], None)
+                        else:
+                            self.update(change["object"])
+                        self.changed.notify_all()
+            except (OSError, ValueError, KeyError, subprocess.SubprocessError) as e:
+                stderr = getattr(e, "stderr", None) or b""
+                if getattr(e, "code", None) == 404 or b"NotFound" in stderr:
+                    with self.changed:
+                        self.missing = True
+                        self.changed.notify_all()
+                    return
+                # The API server is not up yet, or the stream broke
+                self.stopped.wait(2)
+
+    def stop(self):
+        self.stopped.set()
+
+
+def wait_until(changed, check, deadline):
+    """Re-evaluate check() after every watch event until it holds or the deadline passes"""
+    with changed:
+        while not check():
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            changed.wait(min(remaining, 5))
+        return True
+
+
+def node_ready(node):
+    for condition in node.get("status", {}).get("conditions", []):
+        if condition["type"] == "Ready":
+            return condition["status"] == "True"
+    return False
+
+
+def deployment_ready(deployment):
+    replicas = deployment["spec"].get("replicas", 1)
+    status = deployment.get("status", {})
+    return (
+        status.get("observedGeneration", 0) >= deployment["metadata"].get("generation", 0)
+        and status.get("updatedReplicas", 0) == replicas
+        and status.get("readyReplicas", 0) == replicas
+        and status.get("availableReplicas", 0) == replicas
+    )
+
+
+def crash_looping(pod):
+    return any(
+        (c.get("state", {}).get("waiting") or {}).get("reason") == "CrashLoopBackOff"
+        for c in pod.get("status", {}).get("containerStatuses", [])
+    )
+
+
+def format_elapsed(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}m{seconds:02d}s" if minutes else f"{seconds}s"
+
+
+def startup(hosts=None, namespace="glasgow-prod", timeout=900, api=None):
+    """Bring the cluster up after a power-on and time it until fully healthy"""
+    import event_recorder
+
+    expected = [name for name, _ in (hosts or common.WORKERS)]
+    start = time.time()
+    deadline = start + timeout
+    source = event_recorder.Source(api)
+    changed = threading.Condition()
+    nodes = Watch(source, "/api/v1/nodes", changed)
+    leases = Watch(source, "/apis/coordination.k8s.io/v1/namespaces/kube-node-lease/leases", changed)
+    managers = Watch(source, "/apis/apps/v1/namespaces/longhorn-system/daemonsets", changed)
+    volumes = Watch(source, "/apis/longhorn.io/v1beta2/namespaces/longhorn-system/volumes", changed)
+    deployments = Watch(source, f"/apis/apps/v1/namespaces/{namespace}/deployments", changed)
+    pods = Watch(source, f"/api/v1/namespaces/{namespace}/pods", changed)
+    watches = [nodes, leases, managers, volumes, deployments, pods]
+    for watch in watches:
+        watch.start()
+    phases = []
+
+    def phase(name):
+        elapsed = time.time() - start
+        phases.append((name, elapsed))
+        return format_elapsed(elapsed)
+
+    def finish(ok):
+        for watch in watches:
+            watch.stop()
+        print(f"\n{'PHASE':<34}{'at':>8}")
+        print("-" * 42)
+        for name, elapsed in phases:
+            print(f"{name:<34}{format_elapsed(elapsed):>8}")
+        total = format_elapsed(time.time() - start)
+        if ok:
+            print(f"\n🎉 Cluster fully healthy in {total}")
+        else:
+            print(f"\n❌ Not healthy after {total} (--timeout {timeout}s)")
+        return ok
+
+    print(f"🚀 Starting up: waiting for {', '.join(expected)}")
+    print("⏳ Waiting for the API server...")
+    if not wait_until(changed, lambda: nodes.synced and leases.synced, deadline):
+        return finish(False)
+    print(f"✅ API server answering after {phase('API server')}")
+
+    # A Ready condition can be left over from before the power cut, so a node
+    # only counts once its kubelet has renewed its lease while we watch
+    pool = ThreadPoolExecutor(max_workers=max(1, len(expected)))
+    up = {}
+    uncordons = []
+
+    def uncordon(name):
+        result = subprocess.run(["kubectl", "uncordon", name], capture_output=True, text=True)
+        if result.returncode == 0:
+            print(f"   🔓 {name} uncordoned")
+        else:
+            print(f"   ⚠️  {name}: uncordon failed: {result.stderr.strip()}")
+
+    def nodes_up():
+        for name in expected:
+            node, lease = nodes.objects.get(name), leases.objects.get(name)
+            if name in up or not node or not lease or not node_ready(node):
+                continue
+            if lease["spec"].get("renewTime") == leases.initial[name]["spec"].get("renewTime"):
+                continue
+            up[name] = time.time() - start
+            print(f"   ✅ {name} Ready, heartbeat after {format_elapsed(up[name])}")
+            if node["spec"].get("unschedulable"):
+                uncordons.append(pool.submit(uncordon, name))
+        return len(up) == len(expected)
+
+    print("⏳ Waiting for node heartbeats...")
+    all_up = wait_until(changed, nodes_up, deadline)
+    for future in uncordons:
+        future.result()
+    pool.shutdown()
+    if not all_up:
+        print(f"   ❌ No heartbeat from: {', '.join(n for n in expected if n not in up)}")
+        return finish(False)
+    extra = sorted(set(nodes.objects) - set(expected))
+    if extra:
+        print(f"   ℹ️  Also registered (not expected): {', '.join(extra)}")
+    print(f"✅ All {len(expected)} nodes Ready and schedulable after {phase('Nodes ready + uncordoned')}")
+
+    faulted = set()
+
+    def longhorn_settled():
+        if managers.missing or volumes.missing:
+            return True
+        manager = managers.objects.get("longhorn-manager")
+        if not manager or not volumes.synced:
+            return False
+        status = manager.get("status", {})
+        if not status.get("desiredNumberScheduled") or status.get("numberReady") != status["desiredNumberScheduled"]:
+            return False
+        for name, volume in volumes.objects.items():
+            status = volume.get("status", {})
+            if status.get("robustness") == "faulted" and name not in faulted:
+                faulted.add(name)
+                print(f"   ⚠️  Longhorn volume {name} is faulted")
+            if status.get("state") in LONGHORN_TRANSITIONS:
+                return False
+        return True
+
+    print("⏳ Waiting for Longhorn volumes to reattach...")
+    if not wait_until(changed, longhorn_settled, deadline):
+        busy = [n for n, v in volumes.objects.items() if v.get("status", {}).get("state") in LONGHORN_TRANSITIONS]
+        print(f"   ❌ Still settling: {', '.join(busy) or 'longhorn-manager'}")
+        return finish(False)
+    if volumes.missing:
+        print(f"⚠️  No Longhorn volumes API, skipped after {phase('Longhorn skipped')}")
+    else:
+        states = {}
+        for volume in volumes.objects.values():
+            state = volume.get("status", {}).get("state", "unknown")
+            states[state] = states.get(state, 0) + 1
+        summary = ", ".join(f"{count} {state}" for state, count in sorted(states.items()))
+        print(f"✅ Longhorn settled ({summary or 'no volumes'}) after {phase('Longhorn volumes settled')}")
+
+    # Dependants started before their dependencies sit in CrashLoopBackOff for
+    # up to 5 minutes; once a tier is up, the next tier's crashed pods are recycled
+    kicked = set()
+
+    def kick_crashed(apps):
+        for name, pod in list(pods.objects.items()):
+            if name in kicked or pod["metadata"].get("labels", {}).get("app") not in apps:
+                continue
+            if crash_looping(pod):
+                kicked.add(name)
+                print(f"   ♻️  {name} was crash-looping before its dependencies, restarting")
+                subprocess.run(
+                    ["kubectl", "delete", "pod", name, "-n", namespace, "--wait=false"],
+                    capture_output=True,
+                )
+
+    for index, tier in enumerate(STARTUP_TIERS):
+        present = [app for app in tier if app in deployments.objects]
+        idle = [app for app in present if deployments.objects[app]["spec"].get("replicas", 1) == 0]
+        apps = [app for app in present if app not in idle]
+        if idle:
+            print(f"   ℹ️  Scaled to 0, not waiting for: {', '.join(idle)}")
+        if not apps:
+            continue
+        if index:
+            with changed:
+                kick_crashed(apps)
+        print(f"⏳ Tier {index + 1}: {', '.join(apps)}")
+        ready = {}
+
+        def tier_ready():
+            for app in apps:
+                if app not in ready and deployment_ready(deployments.objects.get(app, {"spec": {}, "metadata": {}})):
+                    ready[app] = format_elapsed(time.time() - start)
+                    print(f"   ✅ {app} available after {ready[app]}")
+            if index:
+                kick_crashed(apps)
+            return len(ready) == len(apps)
+
+        if not wait_until(changed, tier_ready, deadline):
+            print(f"   ❌ Not available: {', '.join(a for a in apps if a not in ready)}")
+            return finish(False)
+        phase(f"Tier {index + 1} available")
+
+    others = [name for name in deployments.objects if not any(name in tier for tier in STARTUP_TIERS)]
+    if others:
+        print(f"⏳ Remaining deployments: {', '.join(others)}")
+        def others_ready():
+            return all(deployment_ready(d) for n, d in deployments.objects.items() if n in others)
+
+        if not wait_until(changed, others_ready, deadline):
+            return finish(False)
+        phase("Remaining deployments available")
+    return finish(True)
+
+
+class LogStream:
+    """Follows one container with `kubectl logs -f` into a bounded ring buffer"""
+
+    def __init__(self, namespace, pod, container, buffer_size, tail=None, since_time=None):
+        self.namespace = namespace
+        self.pod = pod
+        self.container = container
+        self.label = f"{pod}/{container}"
+        self.lines = deque(maxlen=buffer_size)
+        self.dropped = 0
+        self.last_timestamp = since_time
+        # --since-time is inclusive; skip lines we already printed
+        self.skip_until = sortable_timestamp(since_time) if since_time else ""
+        cmd = ["kubectl", "logs", "-f", "--timestamps", pod, "-c", container, "-n", namespace]
+        if since_time:
+            cmd.append(f"--since-time={since_time}")
+        elif tail is not None:
+            cmd.append(f"--tail={tail}")
+        self.process = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=1 << 16
+        )
+        self.thread = threading.Thread(target=self._read, daemon=True)
+        self.thread.start()
+
+    def _read(self):
+        for raw in self.process.stdout:
+            timestamp, _, text = raw.decode("utf-8", "replace").rstrip("\n").partition(" ")
+            sortable = sortable_timestamp(timestamp)
+            if sortable <= self.skip_until:
+                continue
+            if len(self.lines) == self.lines.maxlen:
+                # The printer is behind; the oldest line of this stream is lost
+                self.dropped += 1
+            self.lines.append((sortable, text))
+            self.last_timestamp = timestamp
+
+    def alive(self):
+        return self.thread.is_alive()
+
+    def stop(self):
+        self.process.kill()
+
+
+def sortable_timestamp(timestamp):
+    """Pad RFC3339Nano fractions so timestamps compare correctly as strings"""
+    seconds, _, fraction = timestamp.rstrip("Z").partition(".")
+    return f"{seconds}.{fraction:0<9}"
+
+
+def list_running_containers(namespace, selector):
+    """(pod, container) pairs whose container is currently running"""
+    cmd = ["kubectl", "get", "pods", "-n", namespace, "-o", "json"]
+    if selector:
+        cmd += ["-l", selector]
+    try:
+        pods = json.loads(subprocess.check_output(cmd, stderr=subprocess.DEVNULL, timeout=15))
+    except Exception:
+        return None
+    running = []
+    for pod in pods.get("items", []):
+        for status in pod.get("status", {}).get("containerStatuses") or []:
+            if "running" in (status.get("state") or {}):
+                running.append((pod["metadata"]["name"], status["name"]))
+    return running
+
+
+def tail_logs(namespace, selector=None, pattern=None, tail=10, buffer_size=2000, window=0.5):
+    """Follow every running container, merging lines by timestamp"""
+    target = namespace + (f" ({selector})" if selector else "")
+    print(f"📜 Following logs in {target}" + (f" matching /{pattern}/" if pattern else ""))
+    matcher = re.compile(pattern) if pattern else None
+    streams = {}
+    pending = []
+    sequence = 0
+    next_discovery = 0
+    initial = True
+
+    def drain(stream, now):
+        nonlocal sequence
+        lines = stream.lines
+        while lines:
+            timestamp, text = lines.popleft()
+            if matcher and not matcher.search(text):
+                continue
+            sequence += 1
+            heapq.heappush(pending, (timestamp, sequence, now, stream.label, text))
+
+    try:
+        while True:
+            now = time.monotonic()
+            if now >= next_discovery:
+                next_discovery = now + 3
+                running = list_running_containers(namespace, selector)
+                for key in running or []:
+                    old = streams.get(key)
+                    if old and old.alive():
+                        continue
+                    if old:
+                        # kubectl logs ended while the container still runs: resume
+                        drain(old, now)
+                    else:
+                        print(f"➕ {key[0]}/{key[1]}")
+                    streams[key] = LogStream(
+                        namespace,
+                        *key,
+                        buffer_size,
+                        tail=tail if initial else None,
+                        since_time=old.last_timestamp if old else None,
+                    )
+                initial = False
+                if running is not None:
+                    for key in [k for k in streams if k not in running]:
+                        if not streams[key].alive():
+                            drain(streams.pop(key), now)
+                            print(f"➖ {key[0]}/{key[1]}")
+
+            for stream in streams.values():
+                drain(stream, now)
+
+            # Hold lines for a short window so late lines from other streams sort in
+            batch = []
+            while pending and pending[0][2] <= now - window:
+                timestamp, _, _, label, text = heapq.heappop(pending)
+                batch.append(f"{timestamp[11:23]} [{label}] {text}\n")
+            if batch:
+                sys.stdout.write("".join(batch))
+                sys.stdout.flush()
+            time.sleep(0.05)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for stream in streams.values():
+            stream.stop()
+    dropped = {s.label: s.dropped for s in streams.values() if s.dropped}
+    if dropped:
+        print(f"\n⚠️  Lines dropped by full buffers (raise --buffer): {dropped}")
+
+
+# Runs on each node as root: check the containerd store, pull what is missing
+# (in parallel), then report per-layer sizes from the image manifests. Tags
+# without a digit (latest, stable, main) move, so those are always re-pulled;
+# containerd only fetches the manifest when the tag still points at the same
+# image, and a changed image id is reported as updated.
+PREPULL_SCRIPT = """
+import json, platform, subprocess, sys, time
+from concurrent.futures import ThreadPoolExecutor
+wanted, parallel = json.loads(sys.argv[1]), int(sys.argv[2])
+ARCH = {"aarch64": "arm64", "x86_64": "amd64", "armv7l": "arm"}.get(platform.machine(), platform.machine())
+
+def run(*args):
+    return subprocess.run(["k3s", *args], capture_output=True, text=True)
+
+def normalize(ref):
+    name, _, digest = ref.partition("@")
+    last = name.rsplit("/", 1)[-1]
+    if ":" not in last and not digest:
+        name += ":latest"
+    first = name.split("/", 1)[0]
+    if "/" not in name:
+        name = "docker.io/library/" + name
+    elif "." not in first and ":" not in first and first != "localhost":
+        name = "docker.io/" + name
+    return name + ("@" + digest if digest else "")
+
+def blob(digest):
+    return json.loads(run("ctr", "-n", "k8s.io", "content", "get", digest).stdout)
+
+def layers(ref):
+    listing = run("ctr", "-n", "k8s.io", "images", "ls", "name==" + ref).stdout.splitlines()
+    if len(listing) < 2:
+        return []
+    manifest = blob(listing[1].split()[2])
+    for entry in manifest.get("manifests", []):
+        if entry.get("platform", {}).get("architecture") == ARCH:
+            manifest = blob(entry["digest"])
+            break
+    return [layer["size"] for layer in manifest.get("layers", [])]
+
+def image_ids():
+    ids = {}
+    for image in json.loads(run("crictl", "images", "-o", "json").stdout or '{"images": []}')["images"]:
+        for ref in (image.get("repoTags") or []) + (image.get("repoDigests") or []):
+            ids[ref] = image["id"]
+    return ids
+
+def mutable(ref):
+    if "@" in ref:
+        return False
+    tag = ref.rsplit("/", 1)[-1].partition(":")[2]
+    return not any(c.isdigit() for c in tag)
+
+present = image_ids()
+
+def pull(ref):
+    start = time.time()
+    result = run("crictl", "pull", ref)
+    return ref, result.returncode == 0, time.time() - start, result.stderr.strip()[-200:]
+
+results = {}
+missing = []
+for image in wanted:
+    ref = normalize(image)
+    if ref in present and not mutable(ref):
+        results[image] = {"status": "present"}
+    else:
+        missing.append((image, ref))
+with ThreadPoolExecutor(max_workers=parallel) as pool:
+    for (image, _), (ref, ok, seconds, error) in zip(missing, pool.map(pull, [r for _, r in missing])):
+        results[image] = {"status": "pulled" if ok else "failed", "seconds": round(seconds, 1)}
+        if not ok:
+            results[image]["error"] = error
+after = image_ids() if missing else present
+for image, ref in missing:
+    if ref in present and results[image]["status"] == "pulled":
+        results[image]["status"] = "present" if after.get(ref) == present[ref] else "updated"
+for image, result in results.items():
+    if result["status"] != "failed":
+        try:
+            result["layers"] = layers(normalize(image))
+        except Exception:
+            result["layers"] = []
+print(json.dumps(results))
+"""
+
+
+def prepull_node(ip, images, parallel, timeout):
+    """One remote session: check the containerd store and pull what is missing"""
+    sudo = "" if ip in common.LOCAL_HOSTS else "sudo "
+    output = common.ssh_command(
+        ip,
+        f"{sudo}python3 - {shlex.quote(json.dumps(images))} {parallel}",
+        timeout=timeout,
+        input_data=PREPULL_SCRIPT,
+    )
+    try:
+        return json.loads(output.splitlines()[-1])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+
+
+def prepull_images(apps=None, images=None, hosts=None, parallel=3, timeout=1800):
+    """Pull the rendered manifests' images on every node concurrently"""
+    import drift_check
+
+    hosts = hosts or common.WORKERS
+    images = images or drift_check.rendered_images(apps)
+    if not images:
+        print("❌ No images found")
+        return
+    print(f"📦 Pre-pulling {len(images)} image(s) on {len(hosts)} node(s)...")
+    with ThreadPoolExecutor(max_workers=len(hosts)) as pool:
+        results = list(
+            pool.map(lambda h: prepull_node(h[1], images, parallel, timeout), hosts)
+        )
+
+    pulled_bytes = 0
+    slowest = None
+    for (hostname, ip), result in zip(hosts, results):
+        print(f"\n🖥️  {hostname} ({ip})")
+        if result is None:
+            print("   ❌ Node unreachable or script failed")
+            continue
+        for image in images:
+            r = result.get(image, {})
+            layers = r.get("layers") or []
+            size = f"{format_bytes(sum(layers))} in {len(layers)} layers" if layers else ""
+            if layers:
+                size += f", largest {format_bytes(max(layers))}"
+            if r.get("status") == "present":
+                print(f"   ✅ {image} cached {size}")
+            elif r.get("status") in ("pulled", "updated"):
+                pulled_bytes += sum(layers)
+                rate = f" ({format_bytes(sum(layers) / r['seconds'])}/s)" if layers and r["seconds"] else ""
+                verb = "updated to the tag's new image" if r["status"] == "updated" else "pulled"
+                print(f"   ⬇️  {image} {verb} in {r['seconds']}s{rate} {size}")
+                if not slowest or r["seconds"] > slowest[2]:
+                    slowest = (hostname, image, r["seconds"])
+            else:
+                print(f"   ❌ {image} {r.get('error', 'not checked')}")
+
+    print(f"\n📊 Pulled {format_bytes(pulled_bytes)} (compressed) across the cluster")
+    if slowest:
+        print(f"🐢 Slowest pull: {slowest[1]} on {slowest[0]} ({slowest[2]}s)")
+    print("✅ Rollouts and failovers now start from a warm image cache")
+
+
+def backup_or_restore(args):
+    """Stream postgres and minio to or from args.target"""
+    import backup
+    import minio_bench
+
+    target = backup.open_target(args.target, args.target_endpoint)
+    postgres = backup.Postgres(args.pg_host) if args.only != "minio" else None
+    minio = None
+    if args.only != "postgres":
+        access_key = os.environ.get("MINIO_ROOT_USER") or common.secret_value("minio-secret", "MINIO_ROOT_USER")
+        secret_key = os.environ.get("MINIO_ROOT_PASSWORD") or common.secret_value("minio-secret", "MINIO_ROOT_PASSWORD")
+        if not access_key or not secret_key:
+            print("❌ No MinIO credentials: set MINIO_ROOT_USER/MINIO_ROOT_PASSWORD")
+            return False
+        minio = minio_bench.S3Client(args.minio_endpoint or minio_bench.ENDPOINT, access_key, secret_key)
+    if args.action == "backup":
+        return backup.backup(target, minio, postgres, args.workers)
+    return backup.restore(target, args.snapshot, minio, postgres, args.workers)
+
+
 def show_status():
     """Show current cluster status"""
     print("📊 Current Cluster Status")
@@ -164,10 +783,35 @@ def main():
     parser = argparse.ArgumentParser(description="Glasgow GitOps Cluster Management")
     parser.add_argument(
         "action",
-        choices=["stop", "start", "restart", "restart-app", "sync", "reset", "status", "uncordon"],
+        choices=["stop", "start", "restart", "restart-app", "sync", "reset", "status", "uncordon", "logs", "prepull", "backup", "restore", "startup"],
         help="Action to perform",
     )
     parser.add_argument("--app", help="Specific app name for restart-app")
+    parser.add_argument("--namespace", default="glasgow-prod", help="Namespace for logs")
+    parser.add_argument("-l", "--selector", help="Label selector for logs, e.g. app=fastapi")
+    parser.add_argument("--grep", help="Only show log lines matching this regex")
+    parser.add_argument("--tail", type=int, default=10, help="Initial lines per container")
+    parser.add_argument(
+        "--buffer", type=int, default=2000, help="Ring buffer size per log stream"
+    )
+    parser.add_argument(
+        "--image", action="append", help="Image to pre-pull (default: rendered manifests)"
+    )
+    parser.add_argument(
+        "--hosts",
+        type=common.parse_hosts,
+        help="Nodes for prepull/startup as name=ip,... (default: all nodes)",
+    )
+    parser.add_argument("--parallel", type=int, default=3, help="Concurrent pulls per node")
+    parser.add_argument("--target", help="Backup location: a directory or s3://bucket/prefix")
+    parser.add_argument("--target-endpoint", help="S3 endpoint for an s3:// target")
+    parser.add_argument("--snapshot", help="Snapshot id to restore (default: latest)")
+    parser.add_argument("--only", choices=["postgres", "minio"], help="Back up or restore one side")
+    parser.add_argument("--workers", type=int, default=8, help="Parallel backup/restore streams")
+    parser.add_argument("--minio-endpoint", help="MinIO S3 endpoint for backup/restore")
+    parser.add_argument("--pg-host", help="Run pg_dump/psql locally against this host")
+    parser.add_argument("--timeout", type=int, default=900, help="Seconds startup may take to become healthy")
+    parser.add_argument("--api", help="API base URL for startup (default: kubectl get --raw)")
 
     args = parser.parse_args()
 
@@ -193,6 +837,20 @@ def main():
         show_status()
     elif args.action == "uncordon":
         uncordon_all_nodes()
+    elif args.action == "logs":
+        tail_logs(args.namespace, args.selector, args.grep, args.tail, args.buffer)
+    elif args.action == "prepull":
+        apps = [args.app] if args.app else None
+        prepull_images(apps, args.image, args.hosts, args.parallel)
+    elif args.action in ("backup", "restore"):
+        if not args.target:
+            print(f"❌ --target required for {args.action}")
+            sys.exit(1)
+        if not backup_or_restore(args):
+            sys.exit(1)
+    elif args.action == "startup":
+        if not startup(args.hosts, args.namespace, args.timeout, args.api):
+            sys.exit(1)
 
 
 if __name__ == "__main__":
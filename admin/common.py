@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Helpers shared by the admin scripts: node list, SSH, secrets, percentiles
+
+Standard library only, so probes that run inside a pod can ship this file
+alongside their own source.
+"""
+
+import base64
+import math
+import os
+import subprocess
+
+USERNAME = "bsg"
+PASSWORD = "mlop!"
+WORKERS = [
+    ("boomer", "192.168.1.21"),
+    ("apollo", "192.168.1.22"),
+    ("starbuck", "192.168.1.23"),
+]
+
+LOCAL_HOSTS = ("127.0.0.1", "localhost")
+
+# Registers an inlined copy of this module before a shipped script runs
+BOOTSTRAP = """
+import sys, types
+common = types.ModuleType("common")
+exec(compile({source!r}, "common.py", "exec"), common.__dict__)
+sys.modules["common"] = common
+"""
+
+
+def ssh_argv(ip, cmd):
+    """argv running cmd on ip (directly for fake/local hosts, handy for testing)"""
+    if ip in LOCAL_HOSTS:
+        return ["sh", "-c", cmd]
+    return [
+        "sshpass",
+        "-p",
+        PASSWORD,
+        "ssh",
+        "-o",
+        "ConnectTimeout=3",
+        "-o",
+        "StrictHostKeyChecking=no",
+        f"{USERNAME}@{ip}",
+        cmd,
+    ]
+
+
+def ssh_command(ip, cmd, timeout=5, input_data=None):
+    """Execute SSH command and return output"""
+    if ip not in LOCAL_HOSTS and input_data is None:
+        # Warm multiplexed session from admin_daemon.py, if it is running
+        import admin_daemon
+
+        output = admin_daemon.ssh(ip, cmd)
+        if output is not None:
+            return output
+    argv = ssh_argv(ip, cmd)
+    try:
+        result = subprocess.check_output(
+            argv,
+            stderr=subprocess.DEVNULL,
+            timeout=timeout,
+            input=input_data.encode() if input_data else None,
+        )
+        return result.decode().strip()
+    except Exception:
+        return None
+
+
+def bundled_source(path):
+    """Source of the script at path with this module inlined ahead of it
+
+    For scripts run remotely as `python3 -` or `python3 -c`, where there is
+    no common.py next to them to import.
+    """
+    with open(os.path.abspath(__file__)) as f:
+        source = BOOTSTRAP.format(source=f.read())
+    with open(path) as f:
+        return source + "\n" + f.read()
+
+
+def parse_hosts(value):
+    """Parse a 'name=ip,name=ip' host list"""
+    hosts = []
+    for item in value.split(","):
+        hostname, _, ip = item.partition("=")
+        hosts.append((hostname.strip(), ip.strip()))
+    return hosts
+
+
+def percentile(values, pct):
+    """Return the pct-th percentile (nearest rank) of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def secret_value(secret, key, namespace="glasgow-prod"):
+    """Decode one key of a Kubernetes secret via kubectl, or None"""
+    try:
+        output = subprocess.check_output(
+            [
+                "kubectl",
+                "get",
+                "secret",
+                secret,
+                "-n",
+                namespace,
+                "-o",
+                f"jsonpath={{.data.{key}}}",
+            ],
+            stderr=subprocess.DEVNULL,
+            timeout=10,
+        )
+        return base64.b64decode(output).decode() or None
+    except Exception:
+        return None
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Per-Node Disk Usage Breakdown
+Shows what fills each node's disk and reclaims what is safe to remove
+
+quick_check/choose_master only report `df /`. Here every node is scanned
+concurrently with one SSH session running a small script as root. It sizes
+the usual suspects by allocated blocks, so sparse Longhorn replica files
+count for what they really use and hard-linked containerd layers count once.
+Mounted volumes are not descended into. The categories are:
+
+    containerd   /var/lib/rancher/k3s/agent/containerd (images + snapshots)
+    longhorn     every Longhorn disk (default /var/lib/longhorn), per replica
+    pod logs     /var/log/pods, per pod
+    journal      /var/log/journal
+    kubelet      /var/lib/kubelet (emptyDirs, plugins)
+    k3s server   /var/lib/rancher/k3s/server (datastore, manifests)
+
+The same session lists the containerd images that no container on the node
+references. Of those, images still referenced anywhere else (a pod,
+workload or job on any node, or the rendered manifests of any ArgoCD app)
+are kept too, so the standby copies `cluster_manager.py prepull` leaves for
+failover survive. Pinned and pause images are kept. Longhorn replica directories are matched
+against the replicas.longhorn.io objects of their node, and those no replica
+points at are flagged as orphans. An orphan is only removed through its
+orphans.longhorn.io object, which makes Longhorn delete the data itself. A
+directory Longhorn has not confirmed as an orphan is reported but never
+touched.
+
+--reclaim removes the unused images (`crictl rmi`) and deletes the confirmed
+orphans, on all nodes concurrently, after showing what would go. Use
+--dry-run to stop after that preview. --journal-max also vacuums the
+journal down to the given size.
+
+Usage:
+    ./admin/disk_usage.py
+    ./admin/disk_usage.py --reclaim --dry-run
+    ./admin/disk_usage.py --reclaim --journal-max 500M --yes
+    ./admin/disk_usage.py --hosts local=127.0.0.1 --root /tmp/fake-node   # testing
+"""
+
+import argparse
+import json
+import shlex
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import common
+
+CATEGORIES = ("containerd", "longhorn", "pod logs", "journal", "kubelet", "k3s server")
+
+# Runs on the node as root. opts: root, longhorn disk paths, and for reclaim
+# the image ids to remove and an optional journal size limit
+DISK_SCRIPT = r"""
+import json, os, subprocess, sys
+opts = json.loads(sys.argv[1])
+root = opts["root"].rstrip("/")
+seen = set()
+
+def size(path, dev=None):
+    # Allocated bytes under path, staying on its filesystem, hard links once
+    try:
+        top = os.lstat(path)
+    except OSError:
+        return 0
+    dev = top.st_dev if dev is None else dev
+    total, stack = top.st_blocks * 512, [path]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if st.st_dev != dev:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif st.st_nlink > 1:
+                    if (st.st_dev, st.st_ino) in seen:
+                        continue
+                    seen.add((st.st_dev, st.st_ino))
+                total += st.st_blocks * 512
+    return total
+
+def children(path):
+    try:
+        return sorted(e.path for e in os.scandir(path) if e.is_dir(follow_symlinks=False))
+    except OSError:
+        return []
+
+def disk(path):
+    try:
+        st = os.statvfs(path)
+    except OSError:
+        return None
+    return {"path": path[len(root):] or "/", "size": st.f_blocks * st.f_frsize,
+            "used": (st.f_blocks - st.f_bfree) * st.f_frsize, "free": st.f_bavail * st.f_frsize,
+            "dev": os.stat(path).st_dev}
+
+def crictl(*args):
+    try:
+        result = subprocess.run(["k3s", "crictl", *args], capture_output=True, text=True, timeout=120)
+    except (OSError, subprocess.SubprocessError) as e:
+        return False, str(e)
+    return result.returncode == 0, result.stdout if result.returncode == 0 else result.stderr.strip()
+
+report = {"categories": {}, "longhorn": [], "pod_logs": [], "errors": []}
+if opts.get("prune") is not None or opts.get("journal_max"):
+    removed, failed = [], []
+    for image in opts.get("prune") or []:
+        ok, output = crictl("rmi", image)
+        (removed if ok else failed).append(image if ok else [image, output[-200:]])
+    if opts.get("journal_max"):
+        result = subprocess.run(["journalctl", "--vacuum-size=" + opts["journal_max"]], capture_output=True, text=True)
+        report["journal"] = (result.stderr or result.stdout).strip().splitlines()[-1:]
+    report.update(removed=removed, failed=failed, disks=[disk(root + "/")])
+    print(json.dumps(report))
+    sys.exit()
+
+disks = [disk(root + "/")]
+for path in opts["longhorn"]:
+    d = disk(root + path)
+    if d and d["dev"] not in [x["dev"] for x in disks if x]:
+        disks.append(d)
+report["disks"] = [d for d in disks if d]
+
+c = report["categories"]
+c["containerd"] = size(root + "/var/lib/rancher/k3s/agent/containerd")
+c["journal"] = size(root + "/var/log/journal") + size(root + "/run/log/journal")
+c["k3s server"] = size(root + "/var/lib/rancher/k3s/server")
+c["kubelet"] = size(root + "/var/lib/kubelet")
+c["pod logs"] = 0
+for path in children(root + "/var/log/pods"):
+    used = size(path)
+    c["pod logs"] += used
+    report["pod_logs"].append([os.path.basename(path), used])
+c["longhorn"] = 0
+for base in opts["longhorn"]:
+    c["longhorn"] += size(root + base)
+    for path in children(root + base.rstrip("/") + "/replicas"):
+        report["longhorn"].append({"disk": base, "dir": os.path.basename(path), "bytes": size(path),
+                                   "mtime": int(os.stat(path).st_mtime)})
+
+ok, output = crictl("images", "-o", "json")
+images = json.loads(output)["images"] if ok else []
+ok2, output2 = crictl("ps", "-a", "-o", "json")
+if not ok or not ok2:
+    report["errors"].append("crictl: " + (output if not ok else output2)[-200:])
+used = set()
+for container in (json.loads(output2).get("containers", []) if ok2 else []):
+    used.add(container.get("imageRef", ""))
+    used.add(container.get("image", {}).get("image", ""))
+report["images"] = len(images)
+report["unused_images"] = [
+    {"id": image["id"], "tags": image.get("repoTags") or image.get("repoDigests") or [],
+     "refs": (image.get("repoTags") or []) + (image.get("repoDigests") or []), "bytes": int(image.get("size", 0))}
+    for image in images
+    if not image.get("pinned")
+    and not any("pause" in tag for tag in image.get("repoTags") or [])
+    and not used & {image["id"], *(image.get("repoTags") or []), *(image.get("repoDigests") or [])}
+]
+print(json.dumps(report))
+"""
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if abs(size) < 1024 or unit == "TB":
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+
+
+def kubectl_items(*args):
+    """Items of a kubectl get, or None when the API (or the CRD) is unavailable"""
+    try:
+        output = subprocess.check_output(
+            ["kubectl", "get", *args, "-o", "json"], stderr=subprocess.DEVNULL, timeout=30
+        )
+        return json.loads(output)["items"]
+    except (OSError, ValueError, KeyError, subprocess.SubprocessError):
+        return None
+
+
+def longhorn_state():
+    """Disk paths, referenced replica dirs and confirmed orphans, per node"""
+    disks, referenced, orphans = {}, {}, {}
+    for node in kubectl_items("nodes.longhorn.io", "-n", "longhorn-system") or []:
+        paths = [d["path"] for d in node["spec"].get("disks", {}).values()]
+        disks[node["metadata"]["name"]] = paths
+    replicas = kubectl_items("replicas.longhorn.io", "-n", "longhorn-system")
+    for replica in replicas or []:
+        spec = replica["spec"]
+        referenced.setdefault(spec.get("nodeID"), set()).add(spec.get("dataDirectoryName"))
+    for orphan in kubectl_items("orphans.longhorn.io", "-n", "longhorn-system") or []:
+        spec = orphan["spec"]
+        if spec.get("type", "replica") == "replica":
+            data = spec.get("parameters", {}).get("DataName")
+            orphans.setdefault(spec.get("nodeID"), {})[data] = orphan["metadata"]["name"]
+    return disks, (referenced if replicas is not None else None), orphans
+
+
+def normalize_ref(ref):
+    """Image reference as containerd names it (nginx -> docker.io/library/nginx:latest)"""
+    name, _, digest = ref.partition("@")
+    if ":" not in name.rsplit("/", 1)[-1] and not digest:
+        name += ":latest"
+    first = name.split("/", 1)[0]
+    if "/" not in name:
+        name = "docker.io/library/" + name
+    elif "." not in first and ":" not in first and first != "localhost":
+        name = "docker.io/" + name
+    return name + ("@" + digest if digest else "")
+
+
+def referenced_images():
+    """Every image the cluster may need on some node, or None if it cannot be listed
+
+    Pods, workloads and jobs on every node plus the rendered manifests of all
+    ArgoCD apps: an image only this node's containers leave unused may be a
+    standby copy for failover.
+    """
+    import drift_check
+
+    items = kubectl_items("pods,deployments,statefulsets,daemonsets,replicasets,jobs,cronjobs", "-A")
+    rendered = drift_check.rendered_images(namespace=None)
+    if items is None or not rendered:
+        return None
+    images = drift_check.pod_template_images(items, set(rendered))
+    for item in items:
+        status = item.get("status", {})
+        for container in status.get("containerStatuses", []) + status.get("initContainerStatuses", []):
+            images.update(filter(None, (container.get("image"), container.get("imageID"))))
+    return {image if image.startswith("sha256:") else normalize_ref(image) for image in images}
+
+
+def run_remote(ip, opts, timeout):
+    sudo = "" if ip in common.LOCAL_HOSTS else "sudo "
+    output = common.ssh_command(
+        ip, f"{sudo}python3 - {shlex.quote(json.dumps(opts))}", timeout=timeout, input_data=DISK_SCRIPT
+    )
+    try:
+        return json.loads(output.splitlines()[-1])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def classify(name, report, referenced, orphans):
+    """Mark each replica dir as in use, a confirmed orphan, or unreferenced"""
+    for replica in report["longhorn"]:
+        if referenced is None:
+            replica["status"] = "unknown"
+        elif replica["dir"] in referenced.get(name, set()):
+            replica["status"] = "in use"
+        elif replica["dir"] in orphans.get(name, {}):
+            replica["status"] = "orphan"
+            replica["orphan"] = orphans[name][replica["dir"]]
+        else:
+            replica["status"] = "unreferenced"
+
+
+def print_breakdown(hosts, reports, top):
+    print(f"\n{'NODE':<10}" + "".join(f"{c:>12}" for c in CATEGORIES) + f"{'other':>10}{'used':>18}")
+    print("-" * (10 + 12 * len(CATEGORIES) + 28))
+    for (name, ip), report in zip(hosts, reports):
+        if report is None:
+            print(f"{name:<10}   ❌ unreachable or scan failed")
+            continue
+        c = report["categories"]
+        used = sum(d["used"] for d in report["disks"])
+        size = sum(d["size"] for d in report["disks"])
+        other = max(0, used - sum(c.values()))
+        print(
+            f"{name:<10}" + "".join(f"{format_bytes(c.get(k, 0)):>12}" for k in CATEGORIES)
+            + f"{format_bytes(other):>10}{format_bytes(used):>10}/{format_bytes(size):<7}"
+        )
+
+    for (name, ip), report in zip(hosts, reports):
+        if report is None:
+            continue
+        print(f"\n🖥️  {name} ({ip})")
+        for d in report["disks"]:
+            pct = d["used"] * 100 / d["size"] if d["size"] else 0
+            icon = "🔴" if pct >= 90 else "🟡" if pct >= 80 else "🟢"
+            print(f"   {icon} {d['path']}: {pct:.0f}% used, {format_bytes(d['free'])} free")
+        for error in report["errors"]:
+            print(f"   ⚠️  {error}")
+        replicas = sorted(report["longhorn"], key=lambda r: r["bytes"], reverse=True)
+        for r in replicas[:top]:
+            mark = {"in use": "  ", "orphan": "🗑️ ", "unreferenced": "❓", "unknown": "  "}[r["status"]]
+            print(f"   {mark} replica {r['dir']:<48}{format_bytes(r['bytes']):>10}  {r['status']}")
+        if len(replicas) > top:
+            print(f"      … {len(replicas) - top} more replicas")
+        logs = sorted(report["pod_logs"], key=lambda p: p[1], reverse=True)
+        for pod, used in logs[: min(top, 3)]:
+            print(f"      pod logs {pod[:48]:<48}{format_bytes(used):>10}")
+        unused = report["unused_images"]
+        if unused:
+            total = sum(i["bytes"] for i in unused)
+            print(f"   🗑️  {len(unused)}/{report['images']} images unused by any workload or manifest ({format_bytes(total)})")
+
+
+def reclaimable(report):
+    orphans = [r for r in report["longhorn"] if r["status"] == "orphan"]
+    return report["unused_images"], orphans
+
+
+def reclaim_node(name, ip, report, args):
+    """One remote call to remove images (and vacuum), plus the node's orphan objects"""
+    images, orphans = reclaimable(report)
+    result = {"removed": [], "failed": [], "orphans": []}
+    if orphans:
+        ok = subprocess.run(
+            ["kubectl", "delete", "orphans.longhorn.io", "-n", "longhorn-system", *[o["orphan"] for o in orphans]],
+            capture_output=True,
+        ).returncode == 0
+        result["orphans"] = orphans if ok else []
+        if not ok:
+            result["failed"].append(["orphans", "kubectl delete failed"])
+    if images or args.journal_max:
+        opts = {"root": args.root, "longhorn": [], "prune": [i["id"] for i in images], "journal_max": args.journal_max}
+        remote = run_remote(ip, opts, args.timeout)
+        if remote is None:
+            result["failed"].append(["node", "unreachable or prune failed"])
+        else:
+            result.update(removed=remote["removed"], disks=remote["disks"], journal=remote.get("journal"))
+            result["failed"] += remote["failed"]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-node disk usage breakdown and reclaim")
+    parser.add_argument("--hosts", type=common.parse_hosts, help="name=ip,... (default: all workers)")
+    parser.add_argument("--reclaim", action="store_true", help="Remove unused images and orphaned replicas")
+    parser.add_argument("--dry-run", action="store_true", help="With --reclaim, only show what would be removed")
+    parser.add_argument("--yes", action="store_true", help="With --reclaim, do not ask for confirmation")
+    parser.add_argument("--journal-max", help="With --reclaim, vacuum the journal to this size (e.g. 500M)")
+    parser.add_argument("--top", type=int, default=5, help="Largest replicas listed per node")
+    parser.add_argument("--timeout", type=int, default=600, help="Seconds per remote scan")
+    parser.add_argument("--json", help="Also write the raw reports to this file")
+    parser.add_argument("--root", default="/", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    hosts = args.hosts or common.WORKERS
+    disks, referenced, orphans = longhorn_state()
+    if referenced is None:
+        print("⚠️  Longhorn replicas unavailable: replica directories are not classified")
+
+    print(f"💽 Scanning {len(hosts)} node(s) in parallel...")
+
+    def scan(host):
+        name, ip = host
+        opts = {"root": args.root, "longhorn": disks.get(name) or ["/var/lib/longhorn"]}
+        return run_remote(ip, opts, args.timeout)
+
+    with ThreadPoolExecutor(max_workers=len(hosts)) as pool:
+        reports = list(pool.map(scan, hosts))
+    keep = referenced_images()
+    if keep is None:
+        print("⚠️  Cluster workloads or rendered manifests unavailable: no image is treated as unused")
+    for (name, _), report in zip(hosts, reports):
+        if report:
+            classify(name, report, referenced, orphans)
+            report["unused_images"] = [
+                image
+                for image in report["unused_images"]
+                if keep is not None and not keep & {image["id"], *map(normalize_ref, image["refs"])}
+            ]
+    print_breakdown(hosts, reports, args.top)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({name: report for (name, _), report in zip(hosts, reports)}, f, indent=2)
+
+    total_images = total_orphans = 0
+    unconfirmed = 0
+    for report in filter(None, reports):
+        images, orphaned = reclaimable(report)
+        total_images += sum(i["bytes"] for i in images)
+        total_orphans += sum(r["bytes"] for r in orphaned)
+        unconfirmed += sum(r["bytes"] for r in report["longhorn"] if r["status"] == "unreferenced")
+    print(
+        f"\n♻️  Reclaimable: {format_bytes(total_images)} in unused images, "
+        f"{format_bytes(total_orphans)} in orphaned Longhorn replicas"
+    )
+    if unconfirmed:
+        print(
+            f"❓ {format_bytes(unconfirmed)} in replica dirs no replica references but Longhorn has not "
+            "flagged as orphans (left alone)"
+        )
+    if not args.reclaim:
+        return
+
+    print("\n📋 Reclaim plan" + (" (dry run)" if args.dry_run else ""))
+    planned = False
+    for (name, _), report in zip(hosts, reports):
+        if report is None:
+            continue
+        images, orphaned = reclaimable(report)
+        for image in images:
+            print(f"   {name}: rmi {(image['tags'] or [image['id']])[0]} ({format_bytes(image['bytes'])})")
+        for r in orphaned:
+            print(f"   {name}: orphan {r['orphan']} -> {r['dir']} ({format_bytes(r['bytes'])})")
+        if args.journal_max:
+            print(f"   {name}: vacuum journal to {args.journal_max} ({format_bytes(report['categories']['journal'])} now)")
+        planned = planned or images or orphaned or args.journal_max
+    if not planned:
+        print("✅ Nothing to reclaim")
+        return
+    if args.dry_run:
+        print("\n💡 Dry run: nothing removed")
+        return
+    if not args.yes and input("\n⚠️  Proceed? (yes/no): ").lower() != "yes":
+        print("❌ Reclaim cancelled")
+        return
+
+    targets = [(h, r) for h, r in zip(hosts, reports) if r is not None]
+    with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+        results = list(pool.map(lambda t: reclaim_node(t[0][0], t[0][1], t[1], args), targets))
+    print()
+    for ((name, _), report), result in zip(targets, results):
+        images = {i["id"]: i["bytes"] for i in report["unused_images"]}
+        freed = sum(images.get(i, 0) for i in result["removed"]) + sum(o["bytes"] for o in result["orphans"])
+        line = f" {name}: {len(result['removed'])} images, {len(result['orphans'])} orphans, ~{format_bytes(freed)}"
+        before = report["disks"][0]["free"]
+        if result.get("disks"):
+            line += f"; / free {format_bytes(before)} -> {format_bytes(result['disks'][0]['free'])}"
+        print(("✅" if not result["failed"] else "⚠️ ") + line)
+        for item, error in result["failed"]:
+            print(f"      ❌ {item[:40]}: {error}")
+        for message in result.get("journal") or []:
+            print(f"      journal: {message}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n❌ Cancelled by user")
+        sys.exit(1)
@@ -0,0 +1,630 @@
+#!/usr/bin/env python3
+"""
+DNS Resolution Probe
+Measures CoreDNS latency and cache efficiency, and tunes its Corefile
+
+Internal (svc.cluster.local) and external names are queried over UDP at a
+steady --rate for --duration seconds (open loop, so a slow answer does not
+delay the next query), and per-name p50/p95/p99, timeouts and rcodes are
+reported. Short names are then resolved the way a pod's resolver does it
+(the resolv.conf search list is tried first while the name has fewer than
+ndots dots), to show what the ndots:5 expansion costs against an FQDN.
+Each forward upstream is also queried directly.
+
+CoreDNS :9153 metrics are scraped before and after the run for the cache
+hit ratio, and recommendations for the `cache` and `forward` lines of
+components/coredns/patch-coredns-forwarder.yaml are printed.
+
+--in-cluster runs the measurement in a throwaway pod, so it sees the
+cluster's resolv.conf; otherwise it uses this machine's (or --server).
+
+Usage:
+    ./admin/dns_probe.py --in-cluster
+    ./admin/dns_probe.py --in-cluster --rate 50 --duration 60
+    ./admin/dns_probe.py standin --port 5353 --metrics-port 9153 &      # local stand-in
+    ./admin/dns_probe.py --server 127.0.0.1:5353 --metrics-url http://127.0.0.1:9153/metrics \\
+        --search glasgow-prod.svc.cluster.local,svc.cluster.local,cluster.local --ndots 5
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import select
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import common
+from common import percentile
+
+# The measurement also runs as `python3 -c` in a pod, where __file__ is unset
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(globals().get("__file__", "."))))
+COREFILE = os.path.join(REPO_ROOT, "components", "coredns", "patch-coredns-forwarder.yaml")
+PROBE_IMAGE = "python:3.11-alpine"
+INTERNAL = [
+    "msv2-clap-inference.glasgow-prod.svc.cluster.local",
+    "minio-service.glasgow-prod.svc.cluster.local",
+    "postgres-service.glasgow-prod.svc.cluster.local",
+    "kubernetes.default.svc.cluster.local",
+]
+EXTERNAL = ["github.com", "registry-1.docker.io", "huggingface.co"]
+SHORT = ["minio-service", "msv2-clap-inference", "postgres-service", "github.com", "huggingface.co"]
+RCODES = {0: "NOERROR", 1: "FORMERR", 2: "SERVFAIL", 3: "NXDOMAIN", 5: "REFUSED"}
+
+
+def parse_server(value):
+    host, _, port = value.rpartition(":") if value.count(":") == 1 else (value, "", "")
+    return host, int(port or 53)
+
+
+def encode_name(name):
+    return b"".join(
+        bytes([len(label)]) + label.encode() for label in name.rstrip(".").split(".") if label
+    ) + b"\0"
+
+
+def build_query(query_id, name):
+    """A-record query with recursion desired"""
+    return struct.pack(">HHHHHH", query_id, 0x0100, 1, 0, 0, 0) + encode_name(name) + struct.pack(">HH", 1, 1)
+
+
+def skip_name(data, offset):
+    while True:
+        length = data[offset]
+        if length == 0:
+            return offset + 1
+        if length & 0xC0 == 0xC0:
+            return offset + 2
+        offset += length + 1
+
+
+def parse_response(data):
+    """(id, rcode, answers, min_ttl) from a response packet"""
+    query_id, flags, qdcount, ancount = struct.unpack(">HHHH", data[:8])
+    offset = 12
+    for _ in range(qdcount):
+        offset = skip_name(data, offset) + 4
+    ttls = []
+    for _ in range(ancount):
+        offset = skip_name(data, offset)
+        _, _, ttl, length = struct.unpack(">HHIH", data[offset : offset + 10])
+        ttls.append(ttl)
+        offset += 10 + length
+    return query_id, flags & 0xF, ancount, min(ttls) if ttls else None
+
+
+def read_resolv_conf(path="/etc/resolv.conf"):
+    nameserver, search, ndots = None, [], 1
+    try:
+        with open(path) as f:
+            for line in f:
+                fields = line.split()
+                if not fields:
+                    continue
+                if fields[0] == "nameserver" and nameserver is None:
+                    nameserver = fields[1]
+                elif fields[0] == "search":
+                    search = fields[1:]
+                elif fields[0] == "options":
+                    for option in fields[1:]:
+                        if option.startswith("ndots:"):
+                            ndots = int(option[6:])
+    except OSError:
+        pass
+    return nameserver, search, ndots
+
+
+def query_once(server, name, timeout=2.0):
+    """One blocking query; returns (seconds, rcode, answers) or (None, 'timeout', 0)"""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(timeout)
+        query_id = random.randrange(1 << 16)
+        start = time.perf_counter()
+        sock.sendto(build_query(query_id, name), server)
+        try:
+            while True:
+                data = sock.recv(4096)
+                response_id, rcode, answers, _ = parse_response(data)
+                if response_id == query_id:
+                    return time.perf_counter() - start, rcode, answers
+        except socket.timeout:
+            return None, "timeout", 0
+
+
+def steady(server, names, rate, duration, timeout):
+    """Open-loop queries at a fixed rate, round-robin over names"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+    stats = {name: {"ms": [], "rcodes": {}, "timeouts": 0, "ttl": None} for name in names}
+    pending = {}
+    interval = 1 / rate
+    start = time.perf_counter()
+    next_send = start
+    sent = 0
+    end = start + duration
+    while True:
+        now = time.perf_counter()
+        if now >= next_send and now < end:
+            name = names[sent % len(names)]
+            query_id = random.randrange(1 << 16)
+            while query_id in pending:
+                query_id = random.randrange(1 << 16)
+            try:
+                sock.sendto(build_query(query_id, name), server)
+                pending[query_id] = (name, now)
+            except OSError:
+                stats[name]["rcodes"]["send error"] = stats[name]["rcodes"].get("send error", 0) + 1
+            sent += 1
+            next_send = start + sent * interval
+        for query_id, (name, sent_at) in list(pending.items()):
+            if now - sent_at > timeout:
+                stats[name]["timeouts"] += 1
+                del pending[query_id]
+        if now >= end and not pending:
+            break
+        wait = max(0, min(next_send, end + timeout) - time.perf_counter()) if now < end else 0.05
+        readable, _, _ = select.select([sock], [], [], wait)
+        while readable:
+            try:
+                data = sock.recv(4096)
+            except BlockingIOError:
+                break
+            received = time.perf_counter()
+            try:
+                query_id, rcode, _, ttl = parse_response(data)
+            except (struct.error, IndexError):
+                continue
+            if query_id not in pending:
+                continue
+            name, sent_at = pending.pop(query_id)
+            s = stats[name]
+            s["ms"].append((received - sent_at) * 1000)
+            label = RCODES.get(rcode, str(rcode))
+            s["rcodes"][label] = s["rcodes"].get(label, 0) + 1
+            if ttl is not None:
+                s["ttl"] = ttl
+    sock.close()
+    return stats
+
+
+def expand(name, search, ndots):
+    """Candidate FQDNs in the order a stub resolver tries them"""
+    absolute = name.rstrip(".") + "."
+    if name.endswith("."):
+        return [absolute]
+    suffixed = [f"{name}.{domain}." for domain in search]
+    return suffixed + [absolute] if name.count(".") < ndots else [absolute] + suffixed
+
+
+def ndots_cost(server, names, search, ndots, repeats, timeout):
+    """Time the search-path walk for each short name against its FQDN"""
+    results = []
+    for name in names:
+        walks, direct = [], []
+        answered = None
+        queries = 0
+        for _ in range(repeats):
+            start = time.perf_counter()
+            queries = 0
+            answered = None
+            for candidate in expand(name, search, ndots):
+                queries += 1
+                seconds, rcode, answers = query_once(server, candidate, timeout)
+                if rcode == 0 and answers:
+                    answered = candidate
+                    break
+            walks.append((time.perf_counter() - start) * 1000)
+            if answered:
+                seconds, _, _ = query_once(server, answered, timeout)
+                if seconds is not None:
+                    direct.append(seconds * 1000)
+        results.append(
+            {
+                "name": name,
+                "resolved_as": answered,
+                "queries": queries,
+                "walk_ms": round(percentile(walks, 50), 2),
+                "fqdn_ms": round(percentile(direct, 50), 2) if direct else None,
+            }
+        )
+    return results
+
+
+def measure(args):
+    """Everything that has to run next to the resolver; returns a JSON-able dict"""
+    nameserver, search, ndots = read_resolv_conf()
+    server = parse_server(args.server or nameserver or "127.0.0.1")
+    search = args.search.split(",") if args.search else search
+    ndots = args.ndots if args.ndots is not None else ndots
+    internal = args.internal or INTERNAL
+    external = args.external or EXTERNAL
+    fqdns = [n.rstrip(".") + "." for n in internal + external]
+
+    stats = steady(server, fqdns, args.rate, args.duration, args.timeout)
+    names = {}
+    for name, s in stats.items():
+        kind = "internal" if name.rstrip(".") in [n.rstrip(".") for n in internal] else "external"
+        names[name] = {
+            "kind": kind,
+            "count": len(s["ms"]),
+            "timeouts": s["timeouts"],
+            "rcodes": s["rcodes"],
+            "ttl": s["ttl"],
+            "p50": percentile(s["ms"], 50),
+            "p95": percentile(s["ms"], 95),
+            "p99": percentile(s["ms"], 99),
+            "samples": s["ms"],
+        }
+    upstreams = {}
+    for upstream in args.upstream or []:
+        samples = []
+        for name in external * 3:
+            seconds, _, _ = query_once(parse_server(upstream), name, args.timeout)
+            if seconds is not None:
+                samples.append(seconds * 1000)
+        upstreams[upstream] = {"p50": percentile(samples, 50), "p95": percentile(samples, 95), "ok": len(samples)}
+    return {
+        "server": f"{server[0]}:{server[1]}",
+        "search": search,
+        "ndots": ndots,
+        "names": names,
+        "ndots_cost": ndots_cost(server, args.short or SHORT, search, ndots, args.repeats, args.timeout),
+        "upstreams": upstreams,
+    }
+
+
+def corefile_settings(path=COREFILE):
+    with open(path) as f:
+        text = f.read()
+    cache = re.search(r"^\s*cache\b\s*(\d*)", text, re.M)
+    forward = re.search(r"^\s*forward\s+\.\s+([^{\n]+)", text, re.M)
+    return {
+        "cache": int(cache.group(1) or 3600) if cache else None,
+        "forward": forward.group(1).split() if forward else [],
+        "prefetch": "prefetch" in text,
+        "serve_stale": "serve_stale" in text,
+    }
+
+
+def scrape_metrics(url=None):
+    """Sum CoreDNS counters across all CoreDNS pods (or one --metrics-url)"""
+    texts = []
+    if url:
+        with urllib.request.urlopen(url, timeout=10) as response:
+            texts.append(response.read().decode())
+    else:
+        try:
+            pods = subprocess.check_output(
+                ["kubectl", "get", "pods", "-n", "kube-system", "-l", "k8s-app=kube-dns",
+                 "-o", "jsonpath={.items[*].metadata.name}"],
+                stderr=subprocess.DEVNULL, timeout=15, text=True,
+            ).split()
+            for pod in pods:
+                texts.append(
+                    subprocess.check_output(
+                        ["kubectl", "get", "--raw",
+                         f"/api/v1/namespaces/kube-system/pods/{pod}:9153/proxy/metrics"],
+                        stderr=subprocess.DEVNULL, timeout=15, text=True,
+                    )
+                )
+        except (OSError, subprocess.SubprocessError):
+            return None
+    totals = {}
+    for text in texts:
+        for line in text.splitlines():
+            match = re.match(r"(coredns_(?:cache_hits_total|cache_misses_total|cache_entries|"
+                             r"dns_requests_total|dns_responses_total|forward_requests_total|"
+                             r"proxy_request_duration_seconds_count))(\{[^}]*\})?\s+([0-9.eE+-]+)", line)
+            if not match:
+                continue
+            metric, labels, value = match.groups()
+            labels = labels or ""
+            key = metric
+            for label in ("type", "rcode"):
+                found = re.search(rf'{label}="([^"]*)"', labels)
+                if found:
+                    key += f":{found.group(1)}"
+            totals[key] = totals.get(key, 0) + float(value)
+    return totals
+
+
+def cache_ratio(metrics):
+    if not metrics:
+        return None
+    hits = sum(v for k, v in metrics.items() if k.startswith("coredns_cache_hits_total"))
+    misses = sum(v for k, v in metrics.items() if k.startswith("coredns_cache_misses_total"))
+    return hits / (hits + misses) if hits + misses else None
+
+
+def recommend(result, settings, before, after):
+    tips = []
+    delta = {k: after.get(k, 0) - before.get(k, 0) for k in after} if before and after else {}
+    during = cache_ratio(delta)
+    external = [n for n in result["names"].values() if n["kind"] == "external" and n["p95"]]
+    internal = [n for n in result["names"].values() if n["kind"] == "internal" and n["p95"]]
+
+    cache_ttl = settings["cache"]
+    ttls = [n["ttl"] for n in result["names"].values() if n["kind"] == "external" and n["ttl"]]
+    if cache_ttl is not None and cache_ttl <= 60 and external:
+        slow = max(n["p99"] for n in external)
+        fast = max(n["p50"] for n in internal) if internal else 1
+        if slow > 5 * max(fast, 1):
+            tips.append(
+                f"External p99 {slow:.1f}ms vs internal p50 {fast:.1f}ms: each `cache {cache_ttl}` expiry "
+                f"costs an upstream round trip. Raise it to `cache 300`"
+                + (f" (upstream TTLs seen: {min(ttls)}-{max(ttls)}s)" if ttls else "")
+            )
+    if not settings["prefetch"] and external:
+        tips.append("Add `prefetch 10 1m 10%` to the cache block so popular names refresh before expiry")
+    if not settings["serve_stale"]:
+        tips.append("Add `serve_stale 1h` so an upstream outage serves cached answers instead of SERVFAIL")
+    if during is not None and during < 0.8:
+        tips.append(f"Cache hit ratio during the run was {during:.0%}; above 90% is expected at steady rate")
+
+    nx = [c for c in result["ndots_cost"] if c["queries"] > 1]
+    if nx:
+        worst = max(nx, key=lambda c: c["walk_ms"] - (c["fqdn_ms"] or 0))
+        tips.append(
+            f"ndots:{result['ndots']} turns `{worst['name']}` into {worst['queries']} queries "
+            f"({worst['walk_ms']}ms vs {worst['fqdn_ms']}ms as FQDN). Use FQDNs with a trailing dot "
+            "in app config (e.g. minio-service.glasgow-prod.svc.cluster.local.) or set "
+            "dnsConfig.options ndots: 2 on chatty workloads"
+        )
+
+    upstreams = {u: s for u, s in result["upstreams"].items() if s["p50"] is not None}
+    if len(upstreams) > 1:
+        ordered = sorted(upstreams, key=lambda u: upstreams[u]["p50"])
+        best, worst = upstreams[ordered[0]], upstreams[ordered[-1]]
+        if worst["p50"] > 1.5 * best["p50"]:
+            tips.append(
+                f"{ordered[0]} answers in {best['p50']:.1f}ms vs {worst['p50']:.1f}ms for {ordered[-1]}: "
+                f"use `forward . {' '.join(ordered)} {{ policy sequential }}` to prefer it"
+            )
+    failing = [u for u, s in result["upstreams"].items() if not s["ok"]]
+    for upstream in failing:
+        tips.append(f"Upstream {upstream} did not answer; drop it from `forward` or check egress")
+    return tips, during
+
+
+def print_report(result, settings, before, after):
+    print(f"\n🧭 Resolver {result['server']}, ndots:{result['ndots']}, search {' '.join(result['search']) or '-'}")
+    header = f"{'NAME':<52} {'n':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'lost':>5}  rcodes"
+    print(f"\n{header}\n{'-' * (len(header) + 10)}")
+    for kind in ("internal", "external"):
+        for name, n in result["names"].items():
+            if n["kind"] != kind:
+                continue
+            cells = "".join(f"{n[p]:>8.2f}" if n[p] is not None else f"{'-':>8}" for p in ("p50", "p95", "p99"))
+            rcodes = ",".join(f"{k}:{v}" for k, v in n["rcodes"].items())
+            print(f"{name[:52]:<52} {n['count']:>5} {cells} {n['timeouts']:>5}  {rcodes}")
+        merged = [ms for n in result["names"].values() if n["kind"] == kind for ms in n["samples"]]
+        if merged:
+            print(
+                f"{'  all ' + kind:<52} {len(merged):>5} {percentile(merged, 50):>8.2f} "
+                f"{percentile(merged, 95):>8.2f} {percentile(merged, 99):>8.2f}"
+            )
+
+    print(f"\n🔎 Search-path expansion (ndots:{result['ndots']})")
+    for cost in result["ndots_cost"]:
+        if not cost["resolved_as"]:
+            print(f"   ❌ {cost['name']}: not resolved after {cost['queries']} queries ({cost['walk_ms']}ms)")
+            continue
+        extra = f" (+{cost['walk_ms'] - cost['fqdn_ms']:.1f}ms)" if cost["fqdn_ms"] is not None else ""
+        print(
+            f"   {cost['name']:<22} {cost['queries']} queries, {cost['walk_ms']}ms "
+            f"vs {cost['fqdn_ms']}ms as {cost['resolved_as']}{extra}"
+        )
+
+    if result["upstreams"]:
+        print("\n🌍 Forward upstreams (queried directly)")
+        for upstream, s in result["upstreams"].items():
+            if s["p50"] is None:
+                print(f"   ❌ {upstream}: no answers")
+            else:
+                print(f"   {upstream:<18} p50 {s['p50']:.1f}ms  p95 {s['p95']:.1f}ms")
+
+    tips, during = recommend(result, settings, before, after)
+    lifetime = cache_ratio(after)
+    if lifetime is not None:
+        entries = sum(v for k, v in after.items() if k.startswith("coredns_cache_entries"))
+        ratio = f"{during:.1%} during run, " if during is not None else ""
+        print(f"\n📦 CoreDNS cache hit ratio: {ratio}{lifetime:.1%} lifetime, {entries:.0f} entries")
+    else:
+        print("\n📦 CoreDNS metrics unavailable (pass --metrics-url or check kubectl access)")
+    print(f"\n⚙️  Corefile: cache {settings['cache']}, forward . {' '.join(settings['forward'])}")
+    for tip in tips:
+        print(f"💡 {tip}")
+    if not tips:
+        print("✅ Cache and forward settings look right for this traffic")
+
+
+def run_in_cluster(args, argv):
+    """Run this script's measurement in a throwaway pod and return its JSON"""
+    source = common.bundled_source(os.path.abspath(__file__))
+    pod = f"dns-probe-{uuid.uuid4().hex[:8]}"
+    # The JSON file is written here, not in the pod
+    kept, skip = [], False
+    for a in argv:
+        if skip:
+            skip = False
+        elif a == "--json":
+            skip = True
+        elif a != "--in-cluster" and not a.startswith("--json="):
+            kept.append(a)
+    argv = kept
+    command = [
+        "kubectl", "run", pod, "-n", args.namespace, "--rm", "-i", "--quiet", "--restart=Never",
+        f"--image={PROBE_IMAGE}", "--", "python3", "-c", source, "--raw", *argv,
+    ]
+    output = subprocess.run(command, capture_output=True, text=True,
+                            timeout=args.duration + 300)
+    lines = [line for line in output.stdout.splitlines() if line.startswith("{")]
+    if output.returncode != 0 or not lines:
+        print(f"❌ Probe pod failed: {(output.stderr or output.stdout).strip()[-300:]}")
+        sys.exit(1)
+    return json.loads(lines[-1])
+
+
+class Standin:
+    """Answers A queries like CoreDNS would for this cluster (no real forwarding)"""
+
+    services = {"msv2-clap-inference", "minio-service", "postgres-service", "fastapi-service", "kubernetes"}
+    upstream_delay = 0.02
+    ttl = 30
+
+    def __init__(self):
+        self.cache = {}
+        self.counts = {"hits": 0, "misses": 0, "requests": 0}
+        self.lock = threading.Lock()
+
+    def answer(self, name):
+        """(rcode, ips, ttl, delay)"""
+        name = name.lower().rstrip(".")
+        if name.endswith("cluster.local"):
+            labels = name.split(".")
+            if len(labels) >= 4 and labels[-3] == "svc" and labels[0] in self.services:
+                return 0, ["10.43.0.%d" % (hash(labels[0]) % 250 + 2)], 5, 0
+            return 3, [], 5, 0
+        if "." not in name:
+            return 3, [], 30, self.upstream_delay
+        if name.endswith(("github.com", "docker.io", "huggingface.co", "example.com")):
+            return 0, ["140.82.121.%d" % (hash(name) % 250 + 2)], 60, self.upstream_delay
+        return 3, [], 30, self.upstream_delay
+
+    def handle(self, data):
+        query_id = struct.unpack(">H", data[:2])[0]
+        end = skip_name(data, 12)
+        labels, offset = [], 12
+        while data[offset]:
+            labels.append(data[offset + 1 : offset + 1 + data[offset]].decode())
+            offset += data[offset] + 1
+        name = ".".join(labels)
+        now = time.time()
+        with self.lock:
+            self.counts["requests"] += 1
+            cached = self.cache.get(name)
+            if cached and cached[0] > now:
+                self.counts["hits"] += 1
+                expires, rcode, ips = cached
+                ttl, delay = int(expires - now), 0
+            else:
+                self.counts["misses"] += 1
+                rcode, ips, ttl, delay = self.answer(name)
+                ttl = min(ttl, self.ttl)
+                self.cache[name] = (now + ttl, rcode, ips)
+        if delay:
+            time.sleep(delay)
+        question = data[12 : end + 4]
+        header = struct.pack(">HHHHHH", query_id, 0x8180 | rcode, 1, len(ips), 0, 0)
+        answers = b"".join(
+            b"\xc0\x0c" + struct.pack(">HHIH", 1, 1, ttl, 4) + socket.inet_aton(ip) for ip in ips
+        )
+        return header + question + answers
+
+    def metrics(self):
+        with self.lock:
+            return (
+                f'coredns_cache_hits_total{{server="dns://:53",type="success"}} {self.counts["hits"]}\n'
+                f'coredns_cache_misses_total{{server="dns://:53"}} {self.counts["misses"]}\n'
+                f'coredns_cache_entries{{server="dns://:53",type="success"}} {len(self.cache)}\n'
+                f'coredns_dns_requests_total{{server="dns://:53"}} {self.counts["requests"]}\n'
+            )
+
+
+def standin(args):
+    resolver = Standin()
+
+    class Metrics(BaseHTTPRequestHandler):
+        def log_message(self, *a):
+            pass
+
+        def do_GET(self):
+            body = resolver.metrics().encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.metrics_port), Metrics)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", args.port))
+    print(f"🧪 DNS stand-in on 127.0.0.1:{args.port}, metrics on :{args.metrics_port} (Ctrl-C to stop)")
+
+    def reply(data, address):
+        try:
+            sock.sendto(resolver.handle(data), address)
+        except (IndexError, struct.error):
+            pass
+
+    while True:
+        data, address = sock.recvfrom(4096)
+        threading.Thread(target=reply, args=(data, address), daemon=True).start()
+
+
+def main():
+    argv = sys.argv[1:]
+    parser = argparse.ArgumentParser(description="CoreDNS latency and cache efficiency probe")
+    sub = parser.add_subparsers(dest="command")
+    p = sub.add_parser("standin", help="Run a local CoreDNS-like stand-in")
+    p.add_argument("--port", type=int, default=5353)
+    p.add_argument("--metrics-port", type=int, default=9153)
+    parser.add_argument("--server", help="Resolver host[:port] (default: resolv.conf nameserver)")
+    parser.add_argument("--search", help="Comma-separated search list (default: resolv.conf)")
+    parser.add_argument("--ndots", type=int, help="Default: resolv.conf")
+    parser.add_argument("--internal", action="append", help="Internal name to query")
+    parser.add_argument("--external", action="append", help="External name to query")
+    parser.add_argument("--short", action="append", help="Short name for the ndots test")
+    parser.add_argument("--upstream", action="append", help="Upstream to query directly (default: Corefile forward)")
+    parser.add_argument("--rate", type=float, default=20, help="Queries per second")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of steady load")
+    parser.add_argument("--repeats", type=int, default=5, help="Runs per ndots test")
+    parser.add_argument("--timeout", type=float, default=2)
+    parser.add_argument("--metrics-url", help="CoreDNS metrics URL (default: all CoreDNS pods via kubectl)")
+    parser.add_argument("--in-cluster", action="store_true", help="Measure from a pod in the cluster")
+    parser.add_argument("--namespace", default="glasgow-prod", help="Namespace for --in-cluster")
+    parser.add_argument("--json", help="Write results as JSON")
+    parser.add_argument("--raw", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.command == "standin":
+        standin(args)
+        return
+    if args.raw:
+        print(json.dumps(measure(args)))
+        return
+
+    settings = corefile_settings()
+    if args.upstream is None:
+        args.upstream = settings["forward"]
+        if "--upstream" not in argv:
+            argv += [a for u in settings["forward"] for a in ("--upstream", u)]
+    before = scrape_metrics(args.metrics_url)
+    print(f"📡 Querying {args.rate:g}/s for {args.duration:g}s...")
+    result = run_in_cluster(args, argv) if args.in_cluster else measure(args)
+    after = scrape_metrics(args.metrics_url)
+    print_report(result, settings, before, after)
+
+    if args.json:
+        for n in result["names"].values():
+            n.pop("samples")
+        result["coredns"] = {"before": before, "after": after}
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n❌ Cancelled by user")
+        sys.exit(1)
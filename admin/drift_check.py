@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Offline Drift Check
+Renders every ArgoCD app's kustomization and diffs it against a saved
+live-cluster snapshot, without syncing anything
+
+Renders are cached by a content hash of every file under the app's path
+(file hashes are memoised by mtime and size), so only changed components are
+rebuilt with `kustomize build` (or `kubectl kustomize`). Rendered objects are
+cached as JSON, which loads far faster than re-parsing the vendored knative
+upstream YAML. Comparison is one pass over the desired objects against an
+index of the snapshot: only fields we declare are compared (defaults and
+status are ignored), and each app's ignoreDifferences jsonPointers apply.
+Image overrides written back by argocd-image-updater
+(.argocd-source-<app>.yaml next to the kustomization) are applied the way
+ArgoCD applies them, through an overlay's `images:`.
+
+Usage:
+    ./admin/drift_check.py snapshot live.json      # capture the live objects
+    ./admin/drift_check.py diff live.json          # report drift per app
+    ./admin/drift_check.py diff live.json --app fastapi --app knative
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import yaml
+except ImportError:
+    print("❌ PyYAML is required: pip install pyyaml")
+    sys.exit(1)
+
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APPS_DIR = os.path.join(REPO_ROOT, "argocd", "apps")
+CACHE_DIR = os.path.expanduser("~/.cache/glasgow-admin/renders")
+INDEX_PATH = os.path.join(CACHE_DIR, "index.json")
+# Server-managed metadata that never appears in the repo
+IGNORED_METADATA = {
+    "annotations": {
+        "kubectl.kubernetes.io/last-applied-configuration",
+        "argocd.argoproj.io/tracking-id",
+    },
+    "labels": {"app.kubernetes.io/instance"},
+}
+QUANTITY = re.compile(r"^([0-9.]+)(m|Ki|Mi|Gi|Ti|k|M|G|T)?$")
+QUANTITY_SCALE = {
+    None: 1, "m": 1e-3, "k": 1e3, "M": 1e6, "G": 1e9, "T": 1e12,
+    "Ki": 2**10, "Mi": 2**20, "Gi": 2**30, "Ti": 2**40,
+}
+
+
+def load_apps():
+    """ArgoCD Applications in argocd/apps: name -> {path, namespace, ignore}"""
+    apps = {}
+    for name in sorted(os.listdir(APPS_DIR)):
+        if not name.endswith((".yaml", ".yml")):
+            continue
+        with open(os.path.join(APPS_DIR, name)) as f:
+            for doc in yaml.load_all(f, Loader=Loader):
+                if not doc or doc.get("kind") != "Application":
+                    continue
+                spec = doc["spec"]
+                apps[doc["metadata"]["name"]] = {
+                    "path": spec["source"]["path"],
+                    "images": spec["source"].get("kustomize", {}).get("images", []),
+                    "namespace": spec["destination"].get("namespace"),
+                    "ignore": spec.get("ignoreDifferences", []),
+                }
+    return apps
+
+
+def load_index():
+    try:
+        with open(INDEX_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"files": {}, "renders": {}}
+
+
+def save_index(index):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = INDEX_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp, INDEX_PATH)
+
+
+def tree_hash(directory, file_memo):
+    """Content hash of every file under directory (memoised by mtime/size)"""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            st = os.stat(path)
+            stamp = [st.st_mtime_ns, st.st_size]
+            memo = file_memo.get(path)
+            if not memo or memo[0] != stamp:
+                with open(path, "rb") as f:
+                    memo = [stamp, hashlib.sha256(f.read()).hexdigest()]
+                file_memo[path] = memo
+            digest.update(os.path.relpath(path, directory).encode())
+            digest.update(memo[1].encode())
+    return digest.hexdigest()
+
+
+def image_entry(override):
+    """kustomize `images:` entry for an ArgoCD override ([old=]new:tag or new@digest)"""
+    name, _, ref = override.rpartition("=")
+    tag = digest = None
+    if "@" in ref:
+        ref, digest = ref.split("@", 1)
+    else:
+        repo, sep, suffix = ref.rpartition(":")
+        if sep and "/" not in suffix:
+            ref, tag = repo, suffix
+    entry = {"name": name or ref}
+    if name and name != ref:
+        entry["newName"] = ref
+    if tag:
+        entry["newTag"] = tag
+    if digest:
+        entry["digest"] = digest
+    return entry
+
+
+def image_overrides(app, spec, directory):
+    """Image overrides ArgoCD applies to an app, later sources winning per image"""
+    overrides = {}
+    sources = [spec.get("images", [])]
+    for name in (".argocd-source.yaml", f".argocd-source-{app}.yaml"):
+        try:
+            with open(os.path.join(directory, name)) as f:
+                doc = yaml.load(f, Loader=Loader) or {}
+        except OSError:
+            continue
+        sources.append((doc.get("kustomize") or {}).get("images", []))
+    for images in sources:
+        for override in images:
+            entry = image_entry(override)
+            overrides[entry["name"]] = entry
+    return list(overrides.values())
+
+
+def kustomize(directory, images=()):
+    """Rendered YAML of a kustomization directory, with image overrides"""
+    if images:
+        # An overlay on the untouched directory, as ArgoCD does it
+        overlay = tempfile.mkdtemp(prefix="drift-check-")
+        try:
+            with open(os.path.join(overlay, "kustomization.yaml"), "w") as f:
+                yaml.safe_dump(
+                    {"resources": [os.path.relpath(directory, overlay)], "images": list(images)}, f
+                )
+            return kustomize(overlay)
+        finally:
+            shutil.rmtree(overlay, ignore_errors=True)
+    if shutil.which("kustomize"):
+        cmd = ["kustomize", "build", directory]
+    else:
+        cmd = ["kubectl", "kustomize", directory]
+    return subprocess.check_output(cmd, stderr=subprocess.PIPE, timeout=300).decode()
+
+
+def render(app, spec, index):
+    """Rendered objects for an app, rebuilt only if its inputs changed"""
+    directory = os.path.join(REPO_ROOT, spec["path"])
+    images = image_overrides(app, spec, directory)
+    # The tree walk covers the .argocd-source files; the app spec's own
+    # overrides live elsewhere, so they go into the key too
+    content_hash = hashlib.sha256(
+        (tree_hash(directory, index["files"]) + json.dumps(images, sort_keys=True)).encode()
+    ).hexdigest()
+    cache_file = os.path.join(CACHE_DIR, f"{app}-{content_hash[:16]}.json")
+    if index["renders"].get(app) == content_hash and os.path.exists(cache_file):
+        with open(cache_file) as f:
+            return json.load(f), False
+
+    objects = [
+        doc
+        for doc in yaml.load_all(kustomize(directory, images), Loader=Loader)
+        if isinstance(doc, dict) and doc.get("kind")
+    ]
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    for stale in os.listdir(CACHE_DIR):
+        if stale.startswith(f"{app}-") and stale.endswith(".json"):
+            os.unlink(os.path.join(CACHE_DIR, stale))
+    with open(cache_file, "w") as f:
+        json.dump(objects, f)
+    index["renders"][app] = content_hash
+    return objects, True
+
+
+def pod_template_images(obj, images):
+    """Collect container images from any pod template nested in obj"""
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if key in ("containers", "initContainers") and isinstance(value, list):
+                images.update(c["image"] for c in value if isinstance(c, dict) and c.get("image"))
+            else:
+                pod_template_images(value, images)
+    elif isinstance(obj, list):
+        for item in obj:
+            pod_template_images(item, images)
+    return images
+
+
+def rendered_images(apps=None, namespace="glasgow-prod"):
+    """Images referenced by the rendered manifests of the selected ArgoCD apps
+
+    Without apps, every app deploying to namespace (all apps if None).
+    """
+    index = load_index()
+    images = set()
+    for app, spec in load_apps().items():
+        if apps and app not in apps:
+            continue
+        if not apps and namespace and spec["namespace"] != namespace:
+            continue
+        try:
+            objects, _ = render(app, spec, index)
+        except Exception as e:
+            print(f"   ⚠️  Could not render {app}: {e}")
+            continue
+        pod_template_images(objects, images)
+    save_index(index)
+    return sorted(images)
+
+
+def object_key(obj, default_namespace=None):
+    group = obj.get("apiVersion", "").rpartition("/")[0]
+    metadata = obj.get("metadata", {})
+    return (group, obj.get("kind"), metadata.get("namespace", default_namespace), metadata.get("name"))
+
+
+def same_scalar(desired, live):
+    if desired == live or str(desired) == str(live):
+        return True
+    a, b = QUANTITY.match(str(desired)), QUANTITY.match(str(live))
+    if a and b:
+        return abs(
+            float(a.group(1)) * QUANTITY_SCALE[a.group(2)]
+            - float(b.group(1)) * QUANTITY_SCALE[b.group(2)]
+        ) < 1e-9
+    return False
+
+
+def pointer_matches(pointer, segments):
+    """Whether a parsed ignore pointer covers the path given as segments
+
+    Dict keys are plain strings; list items are (index, name) and match `*`,
+    their index, or their name.
+    """
+    if len(pointer) != len(segments):
+        return False
+    for want, have in zip(pointer, segments):
+        if isinstance(have, tuple):
+            if want != "*" and want != str(have[0]) and want != have[1]:
+                return False
+        elif want != have:
+            return False
+    return True
+
+
+def diff(desired, live, path, ignored, out, segments=()):
+    """Append (path, desired, live) for every declared field that differs"""
+    if any(pointer_matches(pointer, segments) for pointer in ignored):
+        return
+    if isinstance(desired, dict):
+        if not isinstance(live, dict):
+            out.append((path, desired, live))
+            return
+        for key, value in desired.items():
+            child = f"{path}/{key}"
+            if path.startswith("/metadata/") and key in IGNORED_METADATA.get(path[10:], ()):
+                continue
+            if key not in live:
+                if value not in (None, {}, [], ""):
+                    out.append((child, value, None))
+                continue
+            diff(value, live[key], child, ignored, out, segments + (key,))
+    elif isinstance(desired, list):
+        if not isinstance(live, list):
+            out.append((path, desired, live))
+        elif desired and all(isinstance(d, dict) and "name" in d for d in desired):
+            # Containers, env, ports, volumes... match by name, not position
+            by_name = {item.get("name"): item for item in live if isinstance(item, dict)}
+            for i, item in enumerate(desired):
+                child = f"{path}[{item['name']}]"
+                if item["name"] not in by_name:
+                    out.append((child, item, None))
+                else:
+                    diff(item, by_name[item["name"]], child, ignored, out, segments + ((i, item["name"]),))
+        elif len(desired) != len(live):
+            out.append((path, desired, live))
+        else:
+            for i, (d, l) in enumerate(zip(desired, live)):
+                diff(d, l, f"{path}/{i}", ignored, out, segments + ((i, None),))
+    elif not same_scalar(desired, live):
+        out.append((path, desired, live))
+
+
+def parse_pointer(pointer):
+    """Split a JSON pointer into unescaped segments ("" is the whole object)"""
+    if not pointer:
+        return ()
+    return tuple(s.replace("~1", "/").replace("~0", "~") for s in pointer.split("/")[1:])
+
+
+def ignored_pointers(obj, rules, default_namespace=None):
+    """Parsed jsonPointers of the ignoreDifferences rules that apply to obj"""
+    group, kind, namespace, name = object_key(obj, default_namespace)
+    pointers = set()
+    for rule in rules:
+        if rule.get("kind") != kind or rule.get("group", "") != group:
+            continue
+        if rule.get("name") and rule["name"] != name:
+            continue
+        if rule.get("namespace") and rule["namespace"] != namespace:
+            continue
+        pointers.update(parse_pointer(p) for p in rule.get("jsonPointers", []))
+    return pointers
+
+
+def load_snapshot(path):
+    """Index live objects by (group, kind, namespace, name)"""
+    with open(path) as f:
+        data = json.load(f)
+    items = data["items"] if isinstance(data, dict) else data
+    return {object_key(obj): obj for obj in items}
+
+
+def snapshot(args):
+    """Capture live objects for every kind the repo renders"""
+    index = load_index()
+    kinds = set()
+    for app, spec in load_apps().items():
+        try:
+            objects, _ = render(app, spec, index)
+        except subprocess.CalledProcessError as e:
+            print(f"   ⚠️  {app}: render failed: {e.stderr.decode().strip()[:200]}")
+            continue
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"❌ Cannot render {app}: {e}")
+            sys.exit(1)
+        for obj in objects:
+            group = obj.get("apiVersion", "").rpartition("/")[0]
+            kinds.add(f"{obj['kind'].lower()}.{group}" if group else obj["kind"].lower())
+    save_index(index)
+    print(f"📸 Capturing {len(kinds)} kinds...")
+    items = []
+    for kind in sorted(kinds):
+        try:
+            output = subprocess.check_output(
+                ["kubectl", "get", kind, "-A", "-o", "json"],
+                stderr=subprocess.DEVNULL,
+                timeout=120,
+            )
+            items += json.loads(output)["items"]
+        except Exception:
+            print(f"   ⚠️  Could not list {kind}")
+    with open(args.snapshot, "w") as f:
+        json.dump({"items": items}, f)
+    print(f"✅ {len(items)} live objects written to {args.snapshot}")
+
+
+def check(args):
+    started = time.perf_counter()
+    apps = load_apps()
+    if args.app:
+        apps = {name: apps[name] for name in args.app}
+    index = load_index()
+    live = load_snapshot(args.snapshot)
+
+    print(f"🔍 Drift check against {args.snapshot}")
+    drifted = failed = 0
+    for app, spec in apps.items():
+        try:
+            objects, rebuilt = render(app, spec, index)
+        except subprocess.CalledProcessError as e:
+            print(f"❌ {app}: render failed: {e.stderr.decode().strip()[:200]}")
+            failed += 1
+            continue
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"❌ {app}: render failed: {e}")
+            failed += 1
+            continue
+        problems = []
+        for obj in objects:
+            key = object_key(obj, spec["namespace"])
+            current = live.get(key) or live.get(key[:2] + (None, key[3]))
+            label = f"{obj['kind']}/{obj['metadata'].get('name')}"
+            if current is None:
+                problems.append(f"   ➕ {label}: missing from cluster")
+                continue
+            changes = []
+            ignored = ignored_pointers(obj, spec["ignore"], spec["namespace"])
+            diff(obj, current, "", ignored, changes)
+            for path, want, have in changes[: args.max_fields]:
+                problems.append(f"   ✏️  {label} {path}: repo={json.dumps(want)[:80]} live={json.dumps(have)[:80]}")
+            if len(changes) > args.max_fields:
+                problems.append(f"   … {len(changes) - args.max_fields} more fields on {label}")
+        tag = " (re-rendered)" if rebuilt else ""
+        if problems:
+            drifted += 1
+            print(f"⚠️  {app}: {len(problems)} difference(s){tag}")
+            print("\n".join(problems))
+        else:
+            print(f"✅ {app}: in sync ({len(objects)} objects){tag}")
+    save_index(index)
+    unrendered = f", {failed} not rendered" if failed else ""
+    print(f"\n📊 {drifted}/{len(apps)} apps drifted{unrendered} ({time.perf_counter() - started:.2f}s)")
+    sys.exit(1 if drifted or failed else 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline kustomize drift check")
+    sub = parser.add_subparsers(dest="action", required=True)
+    p = sub.add_parser("snapshot", help="Save live objects to a JSON file")
+    p.add_argument("snapshot")
+    p = sub.add_parser("diff", help="Compare renders with a saved snapshot")
+    p.add_argument("snapshot")
+    p.add_argument("--app", action="append", help="Limit to these apps")
+    p.add_argument("--max-fields", type=int, default=10, help="Per object")
+    args = parser.parse_args()
+
+    if args.action == "snapshot":
+        snapshot(args)
+    else:
+        check(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+Kubernetes Event Recorder
+Keeps glasgow-prod events (and OOMKills) past the API server's event TTL
+
+`record` lists events once, then follows them by resourceVersion (resuming
+from the last one stored, relisting on 410 Gone). Repeats of the same
+(object, reason, message) are folded into one row with a count and
+first/last seen. Pods are followed the same way so OOMKilled containers,
+which the kubelet reports in pod status rather than as events, are recorded
+too, with the node they ran on.
+
+Everything lives in one SQLite file indexed by namespace, object, reason,
+node and time, so `query` answers in milliseconds. `compact` drops rows past
+the retention window; `record` compacts on start.
+
+Usage:
+    ./admin/event_recorder.py record                    # follow until Ctrl-C
+    ./admin/event_recorder.py record --once             # relist, store new, exit (cron)
+    ./admin/event_recorder.py query --reason OOMKilled --node boomer --since 7d
+    ./admin/event_recorder.py query --object pod/postgres --type Warning   # postgres-*
+    ./admin/event_recorder.py compact --retention 30d
+    ./admin/event_recorder.py record --api http://127.0.0.1:8001   # kubectl proxy / stand-in
+"""
+
+import argparse
+import calendar
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+NAMESPACE = "glasgow-prod"
+DB_PATH = os.path.expanduser("~/.cache/glasgow-admin/events.db")
+DEFAULT_RETENTION = "30d"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    object TEXT NOT NULL,
+    node TEXT,
+    type TEXT,
+    reason TEXT NOT NULL,
+    message TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    first_seen INTEGER NOT NULL,
+    last_seen INTEGER NOT NULL,
+    UNIQUE (namespace, kind, object, reason, message)
+);
+CREATE INDEX IF NOT EXISTS events_ns_time ON events (namespace, last_seen);
+CREATE INDEX IF NOT EXISTS events_object ON events (object, last_seen);
+CREATE INDEX IF NOT EXISTS events_reason ON events (reason, last_seen);
+CREATE INDEX IF NOT EXISTS events_node ON events (node, last_seen);
+CREATE INDEX IF NOT EXISTS events_time ON events (last_seen);
+-- Count already recorded per source event uid, so updates only add the delta;
+-- checked is when the API last showed the uid, so live objects keep their row
+CREATE TABLE IF NOT EXISTS seen (uid TEXT PRIMARY KEY, count INTEGER, last_seen INTEGER, checked INTEGER);
+CREATE TABLE IF NOT EXISTS cursor (stream TEXT PRIMARY KEY, resource_version TEXT);
+"""
+
+
+def parse_duration(value):
+    """'90s', '15m', '12h', '7d' -> seconds"""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+    if value[-1] in units:
+        return float(value[:-1]) * units[value[-1]]
+    return float(value)
+
+
+def parse_time(value):
+    """RFC3339 timestamp from the API -> unix seconds"""
+    if not value:
+        return None
+    return calendar.timegm(time.strptime(value[:19], "%Y-%m-%dT%H:%M:%S"))
+
+
+def open_db(path=DB_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    db = sqlite3.connect(path, check_same_thread=False)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.executescript(SCHEMA)
+    if "checked" not in [row[1] for row in db.execute("PRAGMA table_info(seen)")]:
+        with db:
+            db.execute("ALTER TABLE seen ADD COLUMN checked INTEGER")
+            db.execute("UPDATE seen SET checked = last_seen")
+    return db
+
+
+class Store:
+    """Deduplicating writer; safe to share between follower threads"""
+
+    def __init__(self, db, retention=None):
+        self.db = db
+        self.lock = threading.Lock()
+        self.retention = retention
+
+    def add(self, uid, namespace, kind, obj, node, type_, reason, message, count, first, last):
+        """Fold one observation into its (object, reason, message) row"""
+        now = int(time.time())
+        with self.lock, self.db:
+            row = self.db.execute("SELECT count FROM seen WHERE uid = ?", (uid,)).fetchone()
+            delta = count - (row[0] if row else 0)
+            if delta <= 0:
+                self.db.execute("UPDATE seen SET checked = ? WHERE uid = ?", (now, uid))
+                return False
+            self.db.execute(
+                "INSERT OR REPLACE INTO seen (uid, count, last_seen, checked) VALUES (?, ?, ?, ?)",
+                (uid, count, last, now),
+            )
+            if self.retention and last < now - self.retention:
+                return False  # compact would drop it again; only remember the uid
+            self.db.execute(
+                """
+                INSERT INTO events (namespace, kind, object, node, type, reason, message,
+                                    count, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (namespace, kind, object, reason, message) DO UPDATE SET
+                    count = count + excluded.count,
+                    first_seen = min(first_seen, excluded.first_seen),
+                    last_seen = max(last_seen, excluded.last_seen),
+                    node = coalesce(excluded.node, node)
+                """,
+                (namespace, kind, obj, node, type_, reason, message, delta, first, last),
+            )
+            return True
+
+    def cursor(self, stream):
+        row = self.db.execute(
+            "SELECT resource_version FROM cursor WHERE stream = ?", (stream,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_cursor(self, stream, resource_version):
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO cursor VALUES (?, ?)", (stream, resource_version)
+            )
+
+
+def record_event(store, event):
+    """Store a core/v1 or events.k8s.io Event"""
+    metadata = event["metadata"]
+    involved = event.get("involvedObject") or event.get("regarding") or {}
+    source = event.get("source") or {}
+    node = source.get("host") or event.get("reportingInstance") or None
+    if involved.get("kind") == "Node":
+        node = involved.get("name")
+    series = event.get("series") or {}
+    count = series.get("count") or event.get("count") or 1
+    first = parse_time(event.get("firstTimestamp") or event.get("eventTime") or metadata.get("creationTimestamp"))
+    last = parse_time(
+        series.get("lastObservedTime") or event.get("lastTimestamp") or event.get("eventTime")
+    ) or first
+    return store.add(
+        metadata["uid"],
+        metadata.get("namespace") or involved.get("namespace") or "",
+        involved.get("kind", ""),
+        involved.get("name", ""),
+        node,
+        event.get("type"),
+        event.get("reason") or "",
+        (event.get("message") or event.get("note") or "").strip(),
+        count,
+        first or int(time.time()),
+        last or int(time.time()),
+    )
+
+
+def record_pod(store, pod):
+    """Store OOMKilled container terminations found in pod status"""
+    metadata = pod["metadata"]
+    node = pod.get("spec", {}).get("nodeName")
+    recorded = False
+    for status in pod.get("status", {}).get("containerStatuses") or []:
+        for state in (status.get("lastState") or {}, status.get("state") or {}):
+            terminated = state.get("terminated")
+            if not terminated or terminated.get("reason") != "OOMKilled":
+                continue
+            finished = parse_time(terminated.get("finishedAt")) or int(time.time())
+            # One observation per termination: uid + container + finish time
+            uid = f"{metadata['uid']}/{status['name']}/{finished}"
+            recorded |= store.add(
+                uid,
+                metadata.get("namespace", ""),
+                "Pod",
+                metadata["name"],
+                node,
+                "Warning",
+                "OOMKilled",
+                f"container {status['name']} OOMKilled (exit {terminated.get('exitCode')})",
+                1,
+                finished,
+                finished,
+            )
+    return recorded
+
+
+class Source:
+    """List/watch API paths via `kubectl get --raw` or a REST base URL"""
+
+    def __init__(self, api=None):
+        self.api = api.rstrip("/") if api else None
+
+    def get(self, path):
+        if self.api:
+            with urllib.request.urlopen(self.api + path, timeout=30) as response:
+                return json.load(response)
+        output = subprocess.check_output(
+            ["kubectl", "get", "--raw", path], stderr=subprocess.PIPE, timeout=60
+        )
+        return json.loads(output)
+
+    def watch(self, path):
+        """Yield watch events (one JSON object per line) until the stream ends"""
+        if self.api:
+            with urllib.request.urlopen(self.api + path, timeout=None) as response:
+                for line in response:
+                    if line.strip():
+                        yield json.loads(line)
+            return
+        process = subprocess.Popen(
+            ["kubectl", "get", "--raw", path],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            for line in process.stdout:
+                if line.strip():
+                    yield json.loads(line)
+        finally:
+            process.kill()
+            process.wait()
+
+
+class Gone(Exception):
+    """The stored resourceVersion is too old; relist"""
+
+
+def follow(source, store, stream, collection, handler, once, stop, counters):
+    """List once (or resume from the stored cursor), then watch by resourceVersion
+
+    With once, always relist: the stored cursor only says where a watch would
+    resume, and a one-shot run never watches. Already-recorded objects are
+    skipped by the handlers, so each cron run records just what is new.
+    """
+    resource_version = None if once else store.cursor(stream)
+    while not stop.is_set():
+        try:
+            if resource_version is None:
+                listing = source.get(collection)
+                for item in listing.get("items", []):
+                    if handler(store, item):
+                        counters[stream] += 1
+                resource_version = listing["metadata"]["resourceVersion"]
+                store.set_cursor(stream, resource_version)
+            if once:
+                return
+            path = (
+                f"{collection}?watch=1&allowWatchBookmarks=true"
+                f"&resourceVersion={resource_version}&timeoutSeconds=300"
+            )
+            for change in source.watch(path):
+                if stop.is_set():
+                    return
+                obj = change.get("object", {})
+                if change.get("type") == "ERROR":
+                    if obj.get("code") == 410:
+                        raise Gone()
+                    raise RuntimeError(obj.get("message", "watch error"))
+                if change.get("type") in ("ADDED", "MODIFIED") and handler(store, obj):
+                    counters[stream] += 1
+                resource_version = obj.get("metadata", {}).get("resourceVersion", resource_version)
+                store.set_cursor(stream, resource_version)
+        except Gone:
+            print(f"   ↻ {stream}: resourceVersion expired, relisting")
+            resource_version = None
+        except (OSError, ValueError, RuntimeError, subprocess.SubprocessError) as e:
+            if once:
+                print(f"❌ {stream}: {e}")
+                return
+            print(f"   ⚠️  {stream}: {e}; retrying in 5s")
+            stop.wait(5)
+
+
+def compact(db, retention):
+    cutoff = int(time.time() - retention)
+    with db:
+        removed = db.execute("DELETE FROM events WHERE last_seen < ?", (cutoff,)).rowcount
+        # A uid the API still lists keeps its row, or the next relist would count it again
+        db.execute("DELETE FROM seen WHERE max(last_seen, coalesce(checked, 0)) < ?", (cutoff,))
+    db.execute("VACUUM")
+    return removed
+
+
+def record(args):
+    db = open_db(args.db)
+    retention = parse_duration(args.retention)
+    removed = compact(db, retention)
+    if removed:
+        print(f"🧹 Compacted {removed} rows older than {args.retention}")
+    store = Store(db, retention)
+    source = Source(args.api)
+    stop = threading.Event()
+    ns = args.namespace
+    streams = [
+        (f"{ns}/events", f"/api/v1/namespaces/{ns}/events", record_event),
+        (f"{ns}/pods", f"/api/v1/namespaces/{ns}/pods", record_pod),
+    ]
+    counters = {stream: 0 for stream, _, _ in streams}
+    threads = [
+        threading.Thread(
+            target=follow,
+            args=(source, store, stream, path, handler, args.once, stop, counters),
+            daemon=True,
+        )
+        for stream, path, handler in streams
+    ]
+    print(f"📼 Recording {ns} events into {args.db}" + ("" if args.once else " (Ctrl-C to stop)"))
+    for thread in threads:
+        thread.start()
+    try:
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=10)
+            if not args.once:
+                print(f"   {time.strftime('%H:%M:%S')} new/updated: {counters}")
+    except KeyboardInterrupt:
+        stop.set()
+    print(f"✅ Recorded {sum(counters.values())} new or updated events")
+
+
+def query(args):
+    db = open_db(args.db)
+    clauses, params = [], []
+    if args.namespace:
+        clauses.append("namespace = ?")
+        params.append(args.namespace)
+    if args.object:
+        kind, _, name = args.object.rpartition("/")
+        # A workload name also matches its pods (postgres -> postgres-7d9c-abcde)
+        clauses.append("(object = ? OR object GLOB ?)")
+        params += [name, f"{name}-*"]
+        if kind:
+            clauses.append("lower(kind) = ?")
+            params.append(kind.lower())
+    for column in ("reason", "node", "type"):
+        value = getattr(args, column)
+        if value:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if args.since:
+        clauses.append("last_seen >= ?")
+        params.append(int(time.time() - parse_duration(args.since)))
+    if args.grep:
+        clauses.append("message LIKE ?")
+        params.append(f"%{args.grep}%")
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    started = time.perf_counter()
+    rows = db.execute(
+        f"""
+        SELECT last_seen, first_seen, count, type, reason, kind, object, node, message
+        FROM events {where} ORDER BY last_seen DESC LIMIT ?
+        """,
+        params + [args.limit],
+    ).fetchall()
+    elapsed = (time.perf_counter() - started) * 1000
+
+    if args.json:
+        columns = ["last_seen", "first_seen", "count", "type", "reason", "kind", "object", "node", "message"]
+        print(json.dumps([dict(zip(columns, row)) for row in rows], indent=2))
+        return
+    for last, first, count, type_, reason, kind, obj, node, message in rows:
+        icon = "⚠️ " if type_ == "Warning" else "ℹ️ "
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(last))
+        repeat = f" x{count}" if count > 1 else ""
+        print(f"{icon} {when} {reason}{repeat} {kind}/{obj}" + (f" on {node}" if node else ""))
+        print(f"      {message[:160]}")
+    print(f"\n📊 {len(rows)} row(s) in {elapsed:.1f}ms")
+
+
+def stats(args):
+    db = open_db(args.db)
+    total, events, oldest = db.execute(
+        "SELECT count(*), coalesce(sum(count), 0), min(first_seen) FROM events"
+    ).fetchone()
+    size = os.path.getsize(args.db)
+    print(f"📼 {args.db}: {total} rows covering {events} events, {size / 1024:.0f} KiB")
+    if oldest:
+        print(f"   Oldest: {time.strftime('%Y-%m-%d %H:%M', time.localtime(oldest))}")
+    for reason, n in db.execute(
+        "SELECT reason, sum(count) FROM events GROUP BY reason ORDER BY 2 DESC LIMIT 10"
+    ):
+        print(f"   {reason:<28} {n}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and query Kubernetes events")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--db", default=DB_PATH)
+    sub = parser.add_subparsers(dest="action", required=True)
+
+    p = sub.add_parser("record", parents=[common], help="List, then follow events by resourceVersion")
+    p.add_argument("--namespace", default=NAMESPACE)
+    p.add_argument("--api", help="Kubernetes REST base URL (kubectl proxy)")
+    p.add_argument("--once", action="store_true", help="List once and exit")
+    p.add_argument("--retention", default=DEFAULT_RETENTION)
+
+    p = sub.add_parser("query", parents=[common], help="Search recorded events")
+    p.add_argument("--namespace")
+    p.add_argument("--object", help="NAME or KIND/NAME, e.g. pod/postgres (also matches postgres-*)")
+    p.add_argument("--reason", help="e.g. OOMKilled, Evicted, FailedMount, BackOff")
+    p.add_argument("--node")
+    p.add_argument("--type", choices=["Normal", "Warning"])
+    p.add_argument("--since", help="e.g. 1h, 7d")
+    p.add_argument("--grep", help="Substring of the message")
+    p.add_argument("--limit", type=int, default=50)
+    p.add_argument("--json", action="store_true")
+
+    p = sub.add_parser("compact", parents=[common], help="Drop rows older than the retention window")
+    p.add_argument("--retention", default=DEFAULT_RETENTION)
+
+    sub.add_parser("stats", parents=[common], help="Store size and top reasons")
+    args = parser.parse_args()
+
+    if args.action == "record":
+        record(args)
+    elif args.action == "query":
+        query(args)
+    elif args.action == "compact":
+        removed = compact(open_db(args.db), parse_duration(args.retention))
+        print(f"🧹 Removed {removed} rows older than {args.retention}")
+    else:
+        stats(args)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n❌ Cancelled by user")
+        sys.exit(1)
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+GitOps Propagation Latency Tracker
+Follows ArgoCD Applications and times every rollout from commit to Healthy
+
+For each app, a new status.sync.revision starts a rollout, timed in phases:
+
+    detect   commit time -> ArgoCD reports the revision  (repo polling / webhook)
+    queue    revision seen -> sync operation started     (auto-sync, controller queue)
+    sync     sync started -> sync finished               (manifest generation, apply, hooks)
+    rollout  sync finished -> app Healthy                (image pulls, probes, rollout)
+
+Commit time comes from `git log` in this checkout (pushes and
+argocd-image-updater write-backs are both commits on main), so `git fetch`
+first. Completed rollouts are appended to a history file; `report` draws
+per-phase histograms and per-app percentiles from it and names the slowest
+stage. `watch --record` also saves the raw status stream, which `replay`
+feeds back through the same tracker.
+
+Usage:
+    ./admin/gitops_latency.py watch                          # follow until Ctrl-C
+    ./admin/gitops_latency.py watch --record argo-stream.jsonl
+    ./admin/gitops_latency.py replay argo-stream.jsonl
+    ./admin/gitops_latency.py report --since 7d --app fastapi
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from common import percentile
+from event_recorder import Gone, Source, parse_duration, parse_time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HISTORY_PATH = os.path.expanduser("~/.cache/glasgow-admin/gitops-latency.jsonl")
+COLLECTION = "/apis/argoproj.io/v1alpha1/namespaces/argocd/applications"
+PHASES = ("detect", "queue", "sync", "rollout")
+STAMPS = ("committed", "seen", "sync_started", "sync_finished", "healthy")
+BUCKETS = (1, 2, 5, 10, 20, 30, 60, 120, 300, 600, 1800)
+
+ADVICE = {
+    "detect": "ArgoCD polls the repo every timeout.reconciliation (180s default, in argocd-cm); "
+    "lower it or add a GitHub webhook to /api/webhook",
+    "queue": "raise controller.status.processors / controller.operation.processors "
+    "(argocd-cmd-params-cm) or check for sync windows",
+    "sync": "manifest generation is slow: raise reposerver.parallelism.limit, "
+    "check repo-server CPU limits and sync hooks",
+    "rollout": "pods are slow to become Ready: pre-pull images "
+    "(./admin/cluster_manager.py prepull) and check readiness probes",
+}
+
+
+def format_seconds(seconds):
+    if seconds is None:
+        return "-"
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.1f}m"
+    return f"{seconds / 3600:.1f}h"
+
+
+def slim(app):
+    """Keep only the Application fields the tracker reads (for recording)"""
+    status = app.get("status", {})
+    operation = status.get("operationState") or {}
+    return {
+        "metadata": {
+            "name": app["metadata"]["name"],
+            "resourceVersion": app["metadata"].get("resourceVersion"),
+        },
+        "status": {
+            "sync": status.get("sync", {}),
+            "health": status.get("health", {}),
+            "reconciledAt": status.get("reconciledAt"),
+            "operationState": {
+                key: operation[key]
+                for key in ("phase", "startedAt", "finishedAt", "operation", "syncResult")
+                if key in operation
+            },
+        },
+    }
+
+
+class CommitTimes:
+    """Commit timestamps from the local checkout, memoised per revision"""
+
+    def __init__(self, repo=REPO_ROOT):
+        self.repo = repo
+        self.cache = {}
+
+    def __call__(self, revision):
+        if revision not in self.cache:
+            try:
+                output = subprocess.check_output(
+                    ["git", "-C", self.repo, "log", "-1", "--format=%ct", revision],
+                    stderr=subprocess.DEVNULL,
+                    timeout=10,
+                )
+                self.cache[revision] = int(output)
+            except (OSError, ValueError, subprocess.SubprocessError):
+                self.cache[revision] = None
+        return self.cache[revision]
+
+
+class Tracker:
+    """Turns a stream of Application states into timed rollouts"""
+
+    def __init__(self, commit_time, on_complete):
+        self.commit_time = commit_time
+        self.on_complete = on_complete
+        self.revisions = {}
+        self.pending = {}
+        self.superseded = 0
+
+    def update(self, app, observed):
+        name = app["metadata"]["name"]
+        status = app.get("status", {})
+        sync = status.get("sync", {})
+        revision = sync.get("revision") or (sync.get("revisions") or [None])[0]
+        if not revision:
+            return
+        if name not in self.revisions:
+            # First sighting is the baseline, not a rollout
+            self.revisions[name] = revision
+            return
+        if revision != self.revisions[name]:
+            self.revisions[name] = revision
+            if name in self.pending:
+                self.superseded += 1
+            self.pending[name] = {
+                "app": name,
+                "revision": revision,
+                "committed": self.commit_time(revision),
+                "seen": parse_time(status.get("reconciledAt")) or observed,
+            }
+        rollout = self.pending.get(name)
+        if not rollout:
+            return
+
+        operation = status.get("operationState") or {}
+        target = (operation.get("syncResult") or {}).get("revision") or (
+            (operation.get("operation") or {}).get("sync", {}).get("revision")
+        )
+        if target == revision:
+            started = parse_time(operation.get("startedAt"))
+            if started and started >= rollout["seen"] - 1:
+                rollout["sync_started"] = started
+                if operation.get("phase") == "Succeeded":
+                    rollout["sync_finished"] = parse_time(operation.get("finishedAt")) or observed
+                elif operation.get("phase") in ("Failed", "Error"):
+                    rollout["failed"] = operation["phase"]
+                    self.finish(name, observed)
+                    return
+
+        health = status.get("health", {})
+        if "sync_started" in rollout and health.get("status") in ("Progressing", "Degraded", "Missing"):
+            rollout["assessed"] = True
+        if "sync_finished" not in rollout or health.get("status") != "Healthy":
+            return
+        # The update that marks the sync Succeeded can still carry the health
+        # from before it, so Healthy only counts once it was assessed after
+        # the sync: a transition since it started, a non-Healthy state seen
+        # in between, or a reconciliation after it finished
+        changed = parse_time(health.get("lastTransitionTime"))
+        reconciled = parse_time(status.get("reconciledAt"))
+        if changed and changed >= rollout["sync_started"]:
+            healthy = changed
+        elif rollout.get("assessed"):
+            healthy = observed
+        elif reconciled and reconciled > rollout["sync_finished"]:
+            healthy = reconciled
+        else:
+            return
+        rollout["healthy"] = max(healthy, rollout["sync_finished"])
+        self.finish(name, observed)
+
+    def finish(self, name, observed):
+        rollout = self.pending.pop(name)
+        rollout.pop("assessed", None)
+        rollout["recorded"] = observed
+        stamps = [rollout.get(stamp) for stamp in STAMPS]
+        rollout["phases"] = {
+            phase: max(0, end - start)
+            for phase, start, end in zip(PHASES, stamps, stamps[1:])
+            if start is not None and end is not None
+        }
+        self.on_complete(rollout)
+
+
+def describe(rollout):
+    phases = "  ".join(f"{p} {format_seconds(s)}" for p, s in rollout["phases"].items())
+    outcome = f"❌ sync {rollout['failed']}" if "failed" in rollout else "✅"
+    return f"{outcome} {rollout['app']} @ {rollout['revision'][:8]}  {phases}"
+
+
+def histogram(values, width=40):
+    """Bucketed counts of durations as text bars"""
+    counts = [0] * (len(BUCKETS) + 1)
+    for value in values:
+        index = next((i for i, edge in enumerate(BUCKETS) if value <= edge), len(BUCKETS))
+        counts[index] += 1
+    lines = []
+    peak = max(counts) or 1
+    last = max(i for i, n in enumerate(counts) if n) if any(counts) else -1
+    for i, n in enumerate(counts[: last + 1]):
+        label = f"≤{format_seconds(BUCKETS[i])}" if i < len(BUCKETS) else f">{format_seconds(BUCKETS[-1])}"
+        lines.append(f"      {label:>6} {'█' * round(n / peak * width):<{width}} {n}")
+    return lines
+
+
+def report(rollouts):
+    if not rollouts:
+        print("❌ No completed rollouts recorded")
+        return
+    ok = [r for r in rollouts if "failed" not in r]
+    failed = len(rollouts) - len(ok)
+    print(f"📊 {len(rollouts)} rollouts" + (f" ({failed} failed syncs)" if failed else ""))
+
+    by_phase = defaultdict(list)
+    by_app = defaultdict(lambda: defaultdict(list))
+    for rollout in ok:
+        for phase, seconds in rollout["phases"].items():
+            by_phase[phase].append(seconds)
+            by_app[rollout["app"]][phase].append(seconds)
+        if rollout.get("committed") and rollout.get("healthy"):
+            by_app[rollout["app"]]["total"].append(rollout["healthy"] - rollout["committed"])
+
+    for phase in PHASES:
+        values = by_phase.get(phase)
+        if not values:
+            continue
+        print(
+            f"\n   {phase}: p50 {format_seconds(percentile(values, 50))}, "
+            f"p95 {format_seconds(percentile(values, 95))}, "
+            f"max {format_seconds(max(values))} (n={len(values)})"
+        )
+        for line in histogram(values):
+            print(line)
+
+    columns = PHASES + ("total",)
+    print(f"\n{'APP':<22}" + "".join(f"{c:>16}" for c in columns) + f"{'slowest':>10}")
+    print(f"{'':<22}" + "".join(f"{'p50/p95':>16}" for _ in columns))
+    print("-" * (22 + 16 * len(columns) + 10))
+    for app in sorted(by_app):
+        phases = by_app[app]
+        cells = ""
+        for column in columns:
+            values = phases.get(column)
+            cell = (
+                f"{format_seconds(percentile(values, 50))}/{format_seconds(percentile(values, 95))}"
+                if values
+                else "-"
+            )
+            cells += f"{cell:>16}"
+        medians = {p: percentile(phases[p], 50) for p in PHASES if phases.get(p)}
+        slowest = max(medians, key=medians.get) if medians else "-"
+        print(f"{app:<22}{cells}{slowest:>10}")
+
+    medians = {p: percentile(v, 50) for p, v in by_phase.items()}
+    if medians:
+        slowest = max(medians, key=medians.get)
+        share = medians[slowest] / (sum(medians.values()) or 1) * 100
+        print(f"\n🐢 Slowest stage: {slowest} (p50 {format_seconds(medians[slowest])}, {share:.0f}% of the median path)")
+        print(f"💡 {ADVICE[slowest]}")
+    if not by_phase.get("detect"):
+        print("ℹ️  No commit times resolved; run `git fetch` so revisions are known locally")
+
+
+def load_history(path, since=None, app=None):
+    rollouts = []
+    if not os.path.exists(path):
+        return rollouts
+    cutoff = time.time() - since if since else 0
+    with open(path) as f:
+        for line in f:
+            rollout = json.loads(line)
+            if rollout["recorded"] >= cutoff and (not app or rollout["app"] == app):
+                rollouts.append(rollout)
+    return rollouts
+
+
+def watch(args):
+    os.makedirs(os.path.dirname(args.history), exist_ok=True)
+    history = open(args.history, "a")
+    stream = open(args.record, "a") if args.record else None
+
+    def complete(rollout):
+        history.write(json.dumps(rollout) + "\n")
+        history.flush()
+        print(f"   {time.strftime('%H:%M:%S')} {describe(rollout)}")
+
+    tracker = Tracker(CommitTimes(args.repo), complete)
+    source = Source(args.api)
+
+    def observe(app):
+        now = time.time()
+        if stream:
+            stream.write(json.dumps({"t": now, "object": slim(app)}) + "\n")
+            stream.flush()
+        tracker.update(app, now)
+
+    print(f"👀 Following ArgoCD applications, rollouts go to {args.history} (Ctrl-C to stop)")
+    resource_version = None
+    try:
+        while True:
+            try:
+                if resource_version is None:
+                    listing = source.get(COLLECTION)
+                    for app in listing.get("items", []):
+                        observe(app)
+                    resource_version = listing["metadata"]["resourceVersion"]
+                    print(f"   Tracking {len(tracker.revisions)} apps")
+                path = (
+                    f"{COLLECTION}?watch=1&allowWatchBookmarks=true"
+                    f"&resourceVersion={resource_version}&timeoutSeconds=300"
+                )
+                for change in source.watch(path):
+                    obj = change.get("object", {})
+                    if change.get("type") == "ERROR":
+                        if obj.get("code") == 410:
+                            raise Gone()
+                        raise RuntimeError(obj.get("message", "watch error"))
+                    if change.get("type") in ("ADDED", "MODIFIED"):
+                        observe(obj)
+                    resource_version = obj.get("metadata", {}).get("resourceVersion", resource_version)
+            except Gone:
+                resource_version = None
+            except (OSError, ValueError, RuntimeError, subprocess.SubprocessError) as e:
+                print(f"   ⚠️  {e}; retrying in 5s")
+                time.sleep(5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        history.close()
+        if stream:
+            stream.close()
+    if tracker.pending:
+        print(f"\n⏳ Still in flight: {', '.join(sorted(tracker.pending))}")
+    report(load_history(args.history, since=parse_duration("1d")))
+
+
+def replay(args):
+    rollouts = []
+
+    def complete(rollout):
+        rollouts.append(rollout)
+        print(f"   {describe(rollout)}")
+
+    tracker = Tracker(CommitTimes(args.repo), complete)
+    print(f"⏯️  Replaying {args.file}")
+    with open(args.file) as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                tracker.update(entry["object"], entry["t"])
+    if tracker.superseded:
+        print(f"   ↷ {tracker.superseded} rollout(s) superseded by a newer revision before Healthy")
+    if tracker.pending:
+        print(f"   ⏳ Never became Healthy: {', '.join(sorted(tracker.pending))}")
+    print()
+    report(rollouts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time GitOps rollouts from commit to Healthy")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--repo", default=REPO_ROOT, help="Checkout used to resolve commit times")
+    common.add_argument("--history", default=HISTORY_PATH, help="Rollout history file")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("watch", parents=[common], help="Follow Applications and record rollouts")
+    p.add_argument("--api", help="API base URL (kubectl proxy) instead of kubectl --raw")
+    p.add_argument("--record", help="Also append the raw status stream to this file")
+
+    p = sub.add_parser("replay", parents=[common], help="Run a recorded status stream through the tracker")
+    p.add_argument("file")
+
+    p = sub.add_parser("report", parents=[common], help="Histograms from recorded rollouts")
+    p.add_argument("--since", type=parse_duration, help="e.g. 24h, 7d")
+    p.add_argument("--app")
+
+    args = parser.parse_args()
+    if args.command == "watch":
+        watch(args)
+    elif args.command == "replay":
+        replay(args)
+    else:
+        report(load_history(args.history, args.since, args.app))
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n❌ Cancelled by user")
+        sys.exit(1)
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+HPA Scale-Up Harness
+Drives load at a Deployment and records latency, HPA replicas and pod
+readiness on one timeline
+
+While load_test.py drives the load profile, the HPA and the Deployment's pods
+are polled every --interval seconds. The report gives:
+  - threshold crossed: first poll where the HPA's CPU/memory utilization is
+    at or above its averageUtilization target
+  - scale decided:     first poll where desiredReplicas went up
+  - pod serving:       first poll with more Ready pods than at the start
+  - the p99 latency penalty between threshold and serving vs. the baseline
+
+Cluster state comes from kubectl, or from --api (a `kubectl proxy` URL, or any
+HTTP stand-in serving the same two REST paths for testing).
+
+Usage:
+    ./admin/hpa_harness.py http://fastapi.192.168.1.20.nip.io/health \\
+        --hpa fastapi-hpa --app fastapi --stage 60s:20 --stage 180s:150
+    ./admin/hpa_harness.py URL --hpa fastapi-msv2-api-hpa --app fastapi-msv2-api --json run.json
+"""
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+import urllib.request
+
+import load_test
+
+NAMESPACE = "glasgow-prod"
+
+
+class ClusterView:
+    """Reads HPA status and pod readiness via kubectl or a REST endpoint"""
+
+    def __init__(self, hpa, app, namespace=NAMESPACE, api=None):
+        self.hpa = hpa
+        self.app = app
+        self.namespace = namespace
+        self.api = api.rstrip("/") if api else None
+
+    def _get(self, kubectl_args, path):
+        if self.api:
+            with urllib.request.urlopen(self.api + path, timeout=5) as response:
+                return json.load(response)
+        output = subprocess.check_output(
+            ["kubectl"] + kubectl_args + ["-n", self.namespace, "-o", "json"],
+            stderr=subprocess.DEVNULL,
+            timeout=10,
+        )
+        return json.loads(output)
+
+    def snapshot(self):
+        """Return {desired, current, utilization: {metric: (current, target)}, ready}"""
+        hpa = self._get(
+            ["get", "hpa", self.hpa],
+            f"/apis/autoscaling/v2/namespaces/{self.namespace}"
+            f"/horizontalpodautoscalers/{self.hpa}",
+        )
+        pods = self._get(
+            ["get", "pods", "-l", f"app={self.app}"],
+            f"/api/v1/namespaces/{self.namespace}/pods?labelSelector=app%3D{self.app}",
+        )
+        targets = {
+            m["resource"]["name"]: m["resource"]["target"].get("averageUtilization")
+            for m in hpa["spec"].get("metrics", [])
+            if m.get("type") == "Resource"
+        }
+        utilization = {}
+        for m in hpa.get("status", {}).get("currentMetrics") or []:
+            if m.get("type") == "Resource":
+                name = m["resource"]["name"]
+                current = m["resource"]["current"].get("averageUtilization")
+                utilization[name] = (current, targets.get(name))
+        ready = 0
+        for pod in pods.get("items", []):
+            if pod["metadata"].get("deletionTimestamp"):
+                continue
+            conditions = pod.get("status", {}).get("conditions", [])
+            if any(c["type"] == "Ready" and c["status"] == "True" for c in conditions):
+                ready += 1
+        status = hpa.get("status", {})
+        return {
+            "desired": status.get("desiredReplicas", 0),
+            "current": status.get("currentReplicas", 0),
+            "utilization": utilization,
+            "ready": ready,
+        }
+
+
+class Timeline:
+    """Per-interval buckets of request latency plus the cluster snapshot"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.start = time.perf_counter()
+        self.buckets = {}
+
+    def bucket(self, at):
+        index = int((at - self.start) / self.interval)
+        if index not in self.buckets:
+            self.buckets[index] = {
+                "latency": load_test.LatencyHistogram(),
+                "errors": 0,
+                "cluster": None,
+            }
+        return self.buckets[index]
+
+    def observe(self, scheduled_at, latency):
+        bucket = self.bucket(scheduled_at)
+        if latency is None:
+            bucket["errors"] += 1
+        else:
+            bucket["latency"].record(latency)
+
+    def rows(self):
+        rows = []
+        last_cluster = None
+        for index in sorted(self.buckets):
+            bucket = self.buckets[index]
+            last_cluster = bucket["cluster"] or last_cluster
+            latency = bucket["latency"]
+            rows.append(
+                {
+                    "t": round(index * self.interval, 1),
+                    "requests": latency.count,
+                    "errors": bucket["errors"],
+                    "p50_ms": load_test.to_ms(latency.percentile(50)),
+                    "p99_ms": load_test.to_ms(latency.percentile(99)),
+                    "cluster": last_cluster,
+                }
+            )
+        return rows
+
+
+async def poll_cluster(view, timeline, stop):
+    """Snapshot the cluster every interval until stop is set"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            snapshot = await asyncio.to_thread(view.snapshot)
+        except Exception as e:
+            snapshot = {"error": str(e)}
+        timeline.bucket(started)["cluster"] = snapshot
+        await asyncio.sleep(max(0, timeline.interval - (time.perf_counter() - started)))
+
+
+def above_target(snapshot):
+    for current, target in snapshot.get("utilization", {}).values():
+        if current is not None and target and current >= target:
+            return True
+    return False
+
+
+def analyze(rows):
+    """Find threshold/decision/serving times and the latency penalty"""
+    snapshots = [(row["t"], row["cluster"]) for row in rows if row["cluster"]]
+    snapshots = [(t, s) for t, s in snapshots if "error" not in s]
+    if not snapshots:
+        return {}
+    initial = snapshots[0][1]
+    events = {"threshold": None, "scale_decided": None, "pod_serving": None}
+    for t, snapshot in snapshots:
+        if events["threshold"] is None and above_target(snapshot):
+            events["threshold"] = t
+        if events["scale_decided"] is None and snapshot["desired"] > initial["desired"]:
+            events["scale_decided"] = t
+        if events["pod_serving"] is None and snapshot["ready"] > initial["ready"]:
+            events["pod_serving"] = t
+
+    result = {"events": events, "initial_replicas": initial["current"]}
+    result["max_replicas_seen"] = max(s["current"] for _, s in snapshots)
+    threshold, serving = events["threshold"], events["pod_serving"]
+    if threshold is not None and serving is not None:
+        result["reaction_seconds"] = round(serving - threshold, 1)
+    if threshold is not None and events["scale_decided"] is not None:
+        result["decision_seconds"] = round(events["scale_decided"] - threshold, 1)
+
+    def p99_between(lo, hi):
+        merged = load_test.LatencyHistogram()
+        for row in rows:
+            if lo <= row["t"] < hi and row["_latency"].count:
+                merged.merge(row["_latency"])
+        return load_test.to_ms(merged.percentile(99))
+
+    if threshold is not None:
+        baseline = p99_between(0, threshold)
+        scaling = p99_between(threshold, serving if serving is not None else 1e9)
+        result["baseline_p99_ms"] = baseline
+        result["scaling_p99_ms"] = scaling
+        if baseline and scaling:
+            result["latency_penalty_ms"] = round(scaling - baseline, 2)
+    return result
+
+
+def format_cluster(cluster):
+    if not cluster:
+        return ""
+    if "error" in cluster:
+        return "cluster: N/A"
+    util = " ".join(
+        f"{name}={current}%/{target}%"
+        for name, (current, target) in cluster["utilization"].items()
+    )
+    return (
+        f"desired={cluster['desired']} current={cluster['current']} "
+        f"ready={cluster['ready']} {util}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure HPA scale-up latency")
+    parser.add_argument("url", help="URL to load, e.g. http://host/health")
+    parser.add_argument("--hpa", default="fastapi-hpa", help="HPA name")
+    parser.add_argument("--app", default="fastapi", help="Pod 'app' label")
+    parser.add_argument("--namespace", default=NAMESPACE)
+    parser.add_argument("--api", help="Kubernetes REST base URL (kubectl proxy)")
+    parser.add_argument(
+        "--stage",
+        type=load_test.parse_stage,
+        action="append",
+        help="DURATION:RATE load stage (repeatable), see load_test.py",
+    )
+    parser.add_argument("--interval", type=float, default=2, help="Poll seconds")
+    parser.add_argument("--connections", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--json", help="Write the timeline and summary as JSON")
+    args = parser.parse_args()
+
+    stages = args.stage or [(60, 20), (240, 150)]
+    view = ClusterView(args.hpa, args.app, args.namespace, args.api)
+    timeline = Timeline(args.interval)
+
+    async def run():
+        stop = asyncio.Event()
+        poller = asyncio.ensure_future(poll_cluster(view, timeline, stop))
+        try:
+            return await load_test.run_stages(
+                args.url,
+                stages,
+                args.connections,
+                args.timeout,
+                max_inflight=10000,
+                observer=timeline.observe,
+            )
+        finally:
+            stop.set()
+            await poller
+
+    print(f"📈 HPA harness: {args.hpa} ({args.namespace}) under load on {args.url}")
+    asyncio.run(run())
+
+    rows = timeline.rows()
+    for row, index in zip(rows, sorted(timeline.buckets)):
+        row["_latency"] = timeline.buckets[index]["latency"]
+    summary = analyze(rows)
+
+    print(f"\n{'t(s)':>6} {'req':>6} {'err':>4} {'p50ms':>8} {'p99ms':>8}  cluster")
+    print("-" * 80)
+    for row in rows:
+        print(
+            f"{row['t']:>6} {row['requests']:>6} {row['errors']:>4} "
+            f"{row['p50_ms'] or '-':>8} {row['p99_ms'] or '-':>8}  "
+            f"{format_cluster(row['cluster'])}"
+        )
+
+    print("\n📊 Scale-up summary")
+    events = summary.get("events", {})
+    for name, label in (
+        ("threshold", "Threshold crossed"),
+        ("scale_decided", "Scale-up decided"),
+        ("pod_serving", "New pod serving"),
+    ):
+        at = events.get(name)
+        print(f"   {label:<18} {'t=' + str(at) + 's' if at is not None else 'never'}")
+    if "reaction_seconds" in summary:
+        print(
+            f"   ⏱️  Reaction time: {summary['reaction_seconds']}s (threshold → serving)"
+        )
+    if "latency_penalty_ms" in summary:
+        print(
+            f"   🐢 p99 {summary['baseline_p99_ms']}ms → {summary['scaling_p99_ms']}ms "
+            f"while scaling (+{summary['latency_penalty_ms']}ms)"
+        )
+    if events and events.get("threshold") is None:
+        print("   ⚠️  Utilization never reached the HPA target; raise the load")
+
+    if args.json:
+        for row in rows:
+            del row["_latency"]
+        with open(args.json, "w") as f:
+            json.dump({"summary": summary, "timeline": rows}, f, indent=2)
+        print(f"\n💾 Timeline written to {args.json}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n❌ Cancelled by user")
+        sys.exit(1)
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Ingress Latency Probe
+Hits every ingress host concurrently and breaks each request into DNS,
+connect, TLS handshake, time-to-first-byte and total
+
+Hosts are discovered from the Ingresses in glasgow-prod and argocd (https when
+the host is listed under spec.tls). Each host is probed --repeats times: the
+first --cold requests open a fresh connection so DNS/connect/TLS are measured,
+the rest reuse a pooled keep-alive connection, which is what browsers and
+clients actually see. Certificates expiring within --expiry-days, failing
+verification, 404s from Traefik (no matching route) and 5xx are flagged.
+With --insecure the expiry is read from the raw certificate, since an
+unverified peer's parsed certificate is empty.
+
+Usage:
+    ./admin/ingress_probe.py
+    ./admin/ingress_probe.py --repeats 20 --cold 5 --json ingress.json
+    ./admin/ingress_probe.py --url http://127.0.0.1:8080/ --url https://localhost:8443/ --cafile ca.pem
+"""
+
+import argparse
+import calendar
+import json
+import socket
+import ssl
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from common import percentile
+
+NAMESPACES = ("glasgow-prod", "argocd")
+PHASES = ("dns", "connect", "tls", "ttfb", "total")
+
+
+def discover(namespaces):
+    """(url, source) for every ingress host, https when covered by spec.tls"""
+    targets = []
+    for namespace in namespaces:
+        try:
+            output = subprocess.check_output(
+                ["kubectl", "get", "ingress", "-n", namespace, "-o", "json"],
+                stderr=subprocess.DEVNULL,
+                timeout=15,
+            )
+        except Exception:
+            print(f"⚠️  Could not list ingresses in {namespace}")
+            continue
+        for ingress in json.loads(output)["items"]:
+            spec = ingress["spec"]
+            tls_hosts = {h for tls in spec.get("tls", []) for h in tls.get("hosts", [])}
+            for rule in spec.get("rules", []):
+                host = rule.get("host")
+                if not host:
+                    continue
+                paths = rule.get("http", {}).get("paths") or [{}]
+                path = paths[0].get("path") or "/"
+                scheme = "https" if host in tls_hosts else "http"
+                source = f"{namespace}/{ingress['metadata']['name']}"
+                targets.append((f"{scheme}://{host}{path}", source))
+    return targets
+
+
+def der_read(data, offset):
+    """(tag, value, next offset) of the DER element at offset"""
+    tag, length = data[offset], data[offset + 1]
+    offset += 2
+    if length & 0x80:
+        size = length & 0x7F
+        length = int.from_bytes(data[offset : offset + size], "big")
+        offset += size
+    return tag, data[offset : offset + length], offset + length
+
+
+def der_not_after(der):
+    """notAfter of a DER certificate as epoch seconds"""
+    _, certificate, _ = der_read(der, 0)
+    _, tbs, _ = der_read(certificate, 0)
+    fields, offset = [], 0
+    while len(fields) < 4:  # serial, signature, issuer, validity
+        tag, value, offset = der_read(tbs, offset)
+        if tag != 0xA0:  # explicit version
+            fields.append(value)
+    _, _, offset = der_read(fields[3], 0)  # notBefore
+    tag, value, _ = der_read(fields[3], offset)
+    layout = "%y%m%d%H%M%SZ" if tag == 0x17 else "%Y%m%d%H%M%SZ"  # UTCTime / GeneralizedTime
+    return calendar.timegm(time.strptime(value.decode(), layout))
+
+
+class Connection:
+    """One HTTP/1.1 connection with per-phase timings for its setup"""
+
+    def __init__(self, url, context, timeout):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.https = parts.scheme == "https"
+        self.port = parts.port or (443 if self.https else 80)
+        self.timings = {}
+        self.cert_expires = None
+
+        start = time.perf_counter()
+        family, kind, proto, _, address = socket.getaddrinfo(
+            self.host, self.port, type=socket.SOCK_STREAM
+        )[0]
+        self.timings["dns"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sock = socket.socket(family, kind, proto)
+        sock.settimeout(timeout)
+        sock.connect(address)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.timings["connect"] = time.perf_counter() - start
+
+        if self.https:
+            start = time.perf_counter()
+            try:
+                sock = context.wrap_socket(sock, server_hostname=self.host)
+            except BaseException:
+                sock.close()
+                raise
+            self.timings["tls"] = time.perf_counter() - start
+            cert = sock.getpeercert()
+            if cert and "notAfter" in cert:
+                self.cert_expires = ssl.cert_time_to_seconds(cert["notAfter"])
+            else:
+                # Unverified (--insecure): only the DER form is available
+                try:
+                    self.cert_expires = der_not_after(sock.getpeercert(binary_form=True))
+                except (TypeError, ValueError, IndexError):
+                    pass
+        self.sock = sock
+        self.reader = sock.makefile("rb")
+
+    def get(self, path, authority):
+        """Send one GET; returns (status, ttfb, total, keep_alive)"""
+        start = time.perf_counter()
+        self.sock.sendall(
+            f"GET {path} HTTP/1.1\r\nHost: {authority}\r\n"
+            f"User-Agent: glasgow-ingress-probe\r\nAccept: */*\r\n\r\n".encode()
+        )
+        status_line = self.reader.readline()
+        ttfb = time.perf_counter() - start
+        if not status_line:
+            raise ConnectionResetError("connection closed before response")
+        version, status = status_line.split()[:2]
+        headers = {}
+        while True:
+            line = self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        keep_alive = True
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int(self.reader.readline().split(b";")[0], 16)
+                self.reader.read(size + 2)
+                if size == 0:
+                    break
+        elif "content-length" in headers:
+            self.reader.read(int(headers["content-length"]))
+        else:
+            self.reader.read()
+            keep_alive = False
+        connection = headers.get("connection", "").lower()
+        if version == b"HTTP/1.0":
+            keep_alive = keep_alive and connection == "keep-alive"
+        else:
+            keep_alive = keep_alive and connection != "close"
+        return int(status), ttfb, time.perf_counter() - start, keep_alive
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+
+def probe(url, repeats, cold, context, timeout):
+    """Run repeats GETs against url, reusing the connection after `cold` fresh ones"""
+    parts = urlsplit(url)
+    path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+    samples = {phase: [] for phase in PHASES}
+    result = {"url": url, "statuses": {}, "errors": {}, "reused": 0}
+    expires = None
+    conn = None
+    for i in range(repeats):
+        try:
+            fresh = conn is None or i < cold
+            if fresh:
+                if conn:
+                    conn.close()
+                conn = Connection(url, context, timeout)
+                for phase, seconds in conn.timings.items():
+                    samples[phase].append(seconds)
+                expires = expires or conn.cert_expires
+            else:
+                result["reused"] += 1
+            status, ttfb, total, keep_alive = conn.get(path, parts.netloc)
+            setup = sum(conn.timings.values()) if fresh else 0
+            samples["ttfb"].append(ttfb)
+            samples["total"].append(setup + total)
+            result["statuses"][status] = result["statuses"].get(status, 0) + 1
+            if not keep_alive:
+                conn.close()
+                conn = None
+        except ssl.SSLCertVerificationError as e:
+            kind = f"certificate invalid: {e.verify_message}"
+            result["errors"][kind] = result["errors"].get(kind, 0) + 1
+            conn = None
+        except (OSError, ValueError) as e:
+            kind = type(e).__name__
+            result["errors"][kind] = result["errors"].get(kind, 0) + 1
+            if conn:
+                conn.close()
+            conn = None
+    if conn:
+        conn.close()
+    result["ms"] = {
+        phase: {
+            "p50": round(percentile(values, 50) * 1000, 2),
+            "p99": round(percentile(values, 99) * 1000, 2),
+        }
+        for phase, values in samples.items()
+        if values
+    }
+    if expires:
+        result["cert_days_left"] = round((expires - time.time()) / 86400, 1)
+    elif url.startswith("https") and not result["errors"]:
+        result["cert_days_left"] = None  # connected, but the expiry could not be read
+    return result
+
+
+def flags(result, expiry_days):
+    problems = []
+    for error, n in result["errors"].items():
+        problems.append(f"{error} x{n}")
+    statuses = result["statuses"]
+    if 404 in statuses:
+        problems.append("404: Traefik has no matching route (or the app returns 404)")
+    if any(status >= 500 for status in statuses):
+        problems.append("5xx from backend")
+    days = result.get("cert_days_left")
+    if days is not None and days < expiry_days:
+        problems.append(f"certificate expires in {days} days")
+    elif "cert_days_left" in result and days is None:
+        problems.append("certificate expiry not checked (could not read the certificate)")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent ingress latency probe")
+    parser.add_argument("--url", action="append", help="Probe these URLs instead of discovering")
+    parser.add_argument("--namespace", action="append", help="Default: glasgow-prod, argocd")
+    parser.add_argument("--repeats", type=int, default=10, help="Requests per host")
+    parser.add_argument("--cold", type=int, default=3, help="Of which on fresh connections")
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--expiry-days", type=float, default=14, help="Flag certs expiring sooner")
+    parser.add_argument("--cafile", help="Extra CA bundle to trust")
+    parser.add_argument("--insecure", action="store_true", help="Skip certificate verification")
+    parser.add_argument("--json", help="Write results as JSON")
+    args = parser.parse_args()
+
+    context = ssl.create_default_context(cafile=args.cafile)
+    if args.insecure:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+
+    if args.url:
+        targets = [(url, "cli") for url in args.url]
+    else:
+        targets = discover(args.namespace or NAMESPACES)
+    if not targets:
+        print("❌ No ingress hosts found")
+        sys.exit(1)
+
+    print(f"🌐 Probing {len(targets)} ingress host(s), {args.repeats} requests each...")
+    with ThreadPoolExecutor(max_workers=min(32, len(targets))) as pool:
+        results = list(
+            pool.map(
+                lambda t: probe(t[0], args.repeats, args.cold, context, args.timeout),
+                targets,
+            )
+        )
+
+    header = f"{'URL':<45} {'codes':<10}" + "".join(f"{p:>15}" for p in PHASES) + f"{'cert':>8}"
+    print(f"\n{header}\n{' ' * 56}" + "".join(f"{'p50/p99 ms':>15}" for _ in PHASES))
+    print("-" * len(header))
+    flagged = 0
+    for (url, source), result in zip(targets, results):
+        result["source"] = source
+        codes = ",".join(f"{s}" for s in sorted(result["statuses"])) or "-"
+        cells = ""
+        for phase in PHASES:
+            ms = result["ms"].get(phase)
+            cells += f"{ms['p50']:>7}/{ms['p99']:<7}" if ms else f"{'-':>15}"
+        days = result.get("cert_days_left")
+        print(f"{url[:45]:<45} {codes:<10}{cells}{(f'{days:g}d' if days is not None else '-'):>8}")
+        problems = flags(result, args.expiry_days)
+        result["flags"] = problems
+        if problems:
+            flagged += 1
+            for problem in problems:
+                print(f"   ⚠️  {problem}")
+
+    slowest = max(results, key=lambda r: r["ms"].get("total", {}).get("p99", 0))
+    if slowest["ms"]:
+        print(f"\n🐢 Slowest: {slowest['url']} (total p99 {slowest['ms']['total']['p99']}ms)")
+    print(f"{'✅' if not flagged else '⚠️ '} {len(results) - flagged}/{len(results)} hosts healthy")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+    sys.exit(1 if flagged else 0)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n❌ Cancelled by user")
+        sys.exit(1)
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Knative Cold-Start Profiler & Pre-Warmer for msv2-clap-inference
+
+profile   Wake the service with one request and break the cold start into
+          phases using the new pod's conditions, container state and events:
+          activation -> scheduling -> image pull -> container start ->
+          model load (start until Ready) -> first response/inference.
+prewarm   Build an hour-of-week demand profile from recent fastapi-msv2-api
+          request logs and ping the service ahead of busy hours, so the
+          scale-to-zero grace period (3600s) keeps it warm while people
+          actually search.
+standin   Local HTTP stand-in that behaves like a scale-to-zero service with
+          configurable start and model-load delays, for trying the tool.
+
+The service is cluster-local, so from a laptop go through Kourier:
+    kubectl port-forward -n kourier-system svc/kourier-internal 8081:80
+    ./admin/knative_coldstart.py profile --url http://127.0.0.1:8081 \\
+        --host-header msv2-clap-inference.glasgow-prod.svc.cluster.local
+    ./admin/knative_coldstart.py prewarm --url ... --dry-run
+    ./admin/knative_coldstart.py standin --start-delay 3 --load-delay 8
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+NAMESPACE = "glasgow-prod"
+SERVICE = "msv2-clap-inference"
+SERVICE_HOST = f"{SERVICE}.{NAMESPACE}.svc.cluster.local"
+GRACE_PERIOD = 3600  # autoscaling.knative.dev/scale-to-zero-grace-period
+
+
+def kubectl_json(args):
+    try:
+        output = subprocess.check_output(
+            ["kubectl"] + args + ["-o", "json"], stderr=subprocess.DEVNULL, timeout=20
+        )
+        return json.loads(output)
+    except Exception:
+        return None
+
+
+def parse_time(value):
+    """Parse a Kubernetes RFC3339 timestamp"""
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def timed_request(url, host_header=None, path="/health", body=None, timeout=900):
+    """Send one request, return (status, seconds until the full response)
+
+    HTTP errors are returned as their status; connection failures raise OSError.
+    """
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(url.rstrip("/") + path, data=data)
+    if host_header:
+        request.add_header("Host", host_header)
+    if data is not None:
+        request.add_header("Content-Type", "application/json")
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, time.perf_counter() - started
+
+
+def ready_pods(service=SERVICE, namespace=NAMESPACE):
+    pods = kubectl_json(
+        ["get", "pods", "-n", namespace, "-l", f"serving.knative.dev/service={service}"]
+    )
+    if pods is None:
+        return None
+    return [
+        pod
+        for pod in pods["items"]
+        if any(
+            c["type"] == "Ready" and c["status"] == "True"
+            for c in pod["status"].get("conditions", [])
+        )
+    ]
+
+
+def pod_phases(sent_at, service=SERVICE, namespace=NAMESPACE):
+    """Phase timestamps of the pod created by this cold start, or None"""
+    pods = kubectl_json(
+        ["get", "pods", "-n", namespace, "-l", f"serving.knative.dev/service={service}"]
+    )
+    if not pods or not pods["items"]:
+        return None
+    pod = max(pods["items"], key=lambda p: p["metadata"]["creationTimestamp"])
+    created = parse_time(pod["metadata"]["creationTimestamp"])
+    if created < sent_at - timedelta(seconds=5):
+        return None  # no new pod: the service was already warm
+
+    conditions = {c["type"]: c for c in pod["status"].get("conditions", [])}
+    marks = {
+        "request_sent": sent_at,
+        "pod_created": created,
+        "scheduled": parse_time(
+            conditions.get("PodScheduled", {}).get("lastTransitionTime")
+        ),
+        "ready": parse_time(conditions.get("Ready", {}).get("lastTransitionTime")),
+    }
+    for status in pod["status"].get("containerStatuses", []):
+        if status["name"] == "user-container":
+            running = status.get("state", {}).get("running", {})
+            marks["container_started"] = parse_time(running.get("startedAt"))
+
+    events = kubectl_json(
+        [
+            "get",
+            "events",
+            "-n",
+            namespace,
+            "--field-selector",
+            f"involvedObject.name={pod['metadata']['name']}",
+        ]
+    )
+    for event in (events or {}).get("items", []):
+        # Only the model container's pull, not queue-proxy's
+        if "user-container" not in event["involvedObject"].get("fieldPath", ""):
+            continue
+        at = parse_time(event.get("eventTime") or event.get("firstTimestamp"))
+        if event.get("reason") == "Pulling":
+            marks["pull_started"] = at
+        elif event.get("reason") == "Pulled":
+            marks["pull_finished"] = at
+    return marks
+
+
+def phase_durations(marks, response_at):
+    """Turn phase timestamps into (phase, seconds) rows"""
+    marks = dict(marks, response=response_at)
+    # Without a Pulled event the image was cached; start counts from scheduling
+    image_ready = "pull_finished" if marks.get("pull_finished") else "scheduled"
+    steps = [
+        ("activation", "request_sent", "pod_created"),
+        ("scheduling", "pod_created", "scheduled"),
+        ("image pull", "pull_started", "pull_finished"),
+        ("container start", image_ready, "container_started"),
+        ("model load", "container_started", "ready"),
+        ("first response", "ready", "response"),
+    ]
+    rows = []
+    for name, start, end in steps:
+        if marks.get(start) and marks.get(end):
+            rows.append((name, (marks[end] - marks[start]).total_seconds()))
+        else:
+            rows.append((name, None))
+    return rows
+
+
+def profile(args):
+    print(f"🧊 Cold-start profile for {SERVICE}")
+    warm = ready_pods()
+    if warm:
+        print(f"⚠️  {len(warm)} pod(s) already Ready: this will measure a warm request")
+    elif warm is None:
+        print("ℹ️  kubectl unavailable: only client-side timings will be reported")
+
+    sent_at = datetime.now(timezone.utc)
+    try:
+        status, wake_seconds = timed_request(args.url, args.host_header, args.path)
+    except OSError as e:
+        print(f"   ❌ {args.path} request failed: {e}")
+        sys.exit(1)
+    response_at = datetime.now(timezone.utc)
+    print(f"   🌐 {args.path} → HTTP {status} after {wake_seconds:.2f}s")
+
+    result = {"status": status, "wake_seconds": round(wake_seconds, 3), "phases": {}}
+    if args.inference_path:
+        body = json.loads(args.inference_body) if args.inference_body else None
+        try:
+            status, seconds = timed_request(
+                args.url, args.host_header, args.inference_path, body
+            )
+        except OSError as e:
+            result["first_inference_error"] = str(e)
+            print(f"   ❌ {args.inference_path} request failed: {e}")
+        else:
+            result["first_inference_seconds"] = round(seconds, 3)
+            print(f"   🧠 {args.inference_path} → HTTP {status} after {seconds:.2f}s")
+
+    marks = pod_phases(sent_at) if warm is not None else None
+    if marks:
+        print("\n   Phase             Seconds")
+        print("   " + "-" * 26)
+        for name, seconds in phase_durations(marks, response_at):
+            result["phases"][name] = seconds
+            shown = f"{seconds:>7.1f}" if seconds is not None else "    N/A"
+            print(f"   {name:<16} {shown}")
+    elif warm is not None and not warm:
+        print("   ⚠️  No new pod found for this request")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\n💾 Profile written to {args.json}")
+
+
+def request_history(deployment, since, pattern):
+    """Timestamps of log lines matching pattern, from every pod of the deployment"""
+    try:
+        output = subprocess.check_output(
+            [
+                "kubectl",
+                "logs",
+                "-l",
+                f"app={deployment}",
+                "-n",
+                NAMESPACE,
+                f"--since={since}",
+                "--tail=-1",
+                "--timestamps",
+                "--prefix",
+                "--all-containers",
+                "--max-log-requests=20",
+            ],
+            stderr=subprocess.PIPE,
+            timeout=120,
+        ).decode(errors="replace")
+    except subprocess.CalledProcessError as e:
+        print(f"   ❌ kubectl logs -l app={deployment} failed: {e.stderr.decode(errors='replace').strip()}")
+        return []
+    except (OSError, subprocess.TimeoutExpired) as e:
+        print(f"   ❌ kubectl logs -l app={deployment} failed: {e}")
+        return []
+    regex = re.compile(pattern)
+    stamps = []
+    for line in output.splitlines():
+        if line.startswith("["):
+            # --prefix: "[pod/<name>/<container>] <timestamp> <message>"
+            line = line.partition("] ")[2]
+        stamp, _, message = line.partition(" ")
+        if regex.search(message):
+            try:
+                # Trim nanoseconds to what fromisoformat accepts
+                stamps.append(parse_time(re.sub(r"(\.\d{6})\d+", r"\1", stamp)))
+            except ValueError:
+                continue
+    return stamps
+
+
+def demand_profile(stamps, weeks):
+    """Average requests per (weekday, hour) slot over the history window"""
+    counts = {}
+    for stamp in stamps:
+        local = stamp.astimezone()
+        slot = (local.weekday(), local.hour)
+        counts[slot] = counts.get(slot, 0) + 1
+    return {slot: n / weeks for slot, n in counts.items()}
+
+
+def busy_soon(profile_, now, lead_minutes, threshold):
+    """True when now, or now + lead, falls in a slot with expected demand"""
+    for moment in (now, now + timedelta(minutes=lead_minutes)):
+        if profile_.get((moment.weekday(), moment.hour), 0) >= threshold:
+            return True
+    return False
+
+
+def prewarm(args):
+    print(f"🔥 Pre-warm scheduler for {SERVICE}")
+    weeks = max(1, args.history_days / 7)
+    stamps = request_history(
+        args.deployment, f"{args.history_days * 24}h", args.pattern
+    )
+    profile_ = demand_profile(stamps, weeks)
+    busy = sorted(slot for slot, avg in profile_.items() if avg >= args.threshold)
+    days = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+    print(f"   📜 {len(stamps)} matching requests over {args.history_days} days")
+    print(
+        f"   📅 Busy hours: {', '.join(f'{days[d]} {h:02d}h' for d, h in busy) or 'none'}"
+    )
+    if not busy:
+        print(f"   ⚠️  No busy hours learned from app={args.deployment}: nothing will be pinged")
+    if args.dry_run:
+        return
+
+    # Re-ping before the grace period would let it scale to zero mid-window
+    keepalive = GRACE_PERIOD * 0.75
+    last_ping = 0.0
+    while True:
+        now = datetime.now().astimezone()
+        if busy_soon(profile_, now, args.lead, args.threshold):
+            if time.time() - last_ping >= keepalive:
+                try:
+                    status, seconds = timed_request(
+                        args.url, args.host_header, args.path
+                    )
+                    print(
+                        f"   🔥 {now:%a %H:%M} pinged: HTTP {status} in {seconds:.1f}s"
+                    )
+                    last_ping = time.time()
+                except OSError as e:
+                    print(f"   ⚠️  {now:%a %H:%M} ping failed: {e}")
+        time.sleep(60)
+
+
+def standin(args):
+    """Serve /health like a scale-to-zero service with a slow model load"""
+    state = {"warm_until": 0.0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def _handle(self):
+            with lock:
+                if time.time() > state["warm_until"]:
+                    print(f"🧊 cold start ({args.start_delay}s + {args.load_delay}s)")
+                    time.sleep(args.start_delay + args.load_delay)
+                state["warm_until"] = time.time() + args.idle_timeout
+            body = b'{"status":"ok"}'
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = do_POST = _handle
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), Handler)
+    print(
+        f"🧪 Stand-in on http://127.0.0.1:{args.port} (idle after {args.idle_timeout}s)"
+    )
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Knative cold-start profiler")
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    for name in ("profile", "prewarm"):
+        p = sub.add_parser(name)
+        p.add_argument("--url", required=True, help="Service or Kourier URL")
+        p.add_argument("--host-header", help=f"Host header, e.g. {SERVICE_HOST}")
+        p.add_argument("--path", default="/health", help="Wake-up path")
+
+    p = sub.choices["profile"]
+    p.add_argument("--inference-path", help="Also time a first inference call")
+    p.add_argument("--inference-body", help="JSON body for the inference call")
+    p.add_argument("--json", help="Write the profile as JSON")
+
+    p = sub.choices["prewarm"]
+    p.add_argument(
+        "--deployment", default="fastapi-msv2-api", help="Caller to learn from (its app= label)"
+    )
+    p.add_argument("--pattern", default="search", help="Regex for search requests")
+    p.add_argument("--history-days", type=int, default=14)
+    p.add_argument("--threshold", type=float, default=1, help="Avg requests/hour")
+    p.add_argument("--lead", type=int, default=15, help="Minutes to warm ahead")
+    p.add_argument("--dry-run", action="store_true", help="Print the busy hours")
+
+    p = sub.add_parser("standin")
+    p.add_argument("--port", type=int, default=8090)
+    p.add_argument("--start-delay", type=float, default=3)
+    p.add_argument("--load-delay", type=float, default=8)
+    p.add_argument("--idle-timeout", type=float, default=60)
+
+    args = parser.parse_args()
+    {"profile": profile, "prewarm": prewarm, "standin": standin}[args.mode](args)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n❌ Cancelled by user")
+        sys.exit(1)
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Glasgow GitOps Load Generator
+Open-model (constant arrival rate) HTTP load with latency percentiles
+
+Requests are started on a fixed schedule regardless of how fast earlier ones
+complete, and latency is measured from the *scheduled* start time. A slow
+server therefore shows up as higher latency instead of silently lowering the
+request rate (coordinated omission). Connections are pooled and kept alive.
+Requests still queued or in flight when the run ends are counted as
+unfinished failures, and those completing after their stage ended as late.
+
+Usage:
+    ./admin/load_test.py http://fastapi.192.168.1.20.nip.io/health --rate 50 --duration 60
+    ./admin/load_test.py URL --stage 30s:20 --stage 60s:100 --stage 30s:0 --json out.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import ssl
+import sys
+import time
+from urllib.parse import urlsplit
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram (~1% relative error), mergeable"""
+
+    GROWTH = 1.01
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        index = int(math.log(max(seconds, 1e-6) * 1e6, self.GROWTH))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other):
+        for index, n in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct):
+        """Latency in seconds at percentile pct, or None when empty"""
+        if not self.count:
+            return None
+        target = math.ceil(self.count * pct / 100)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= target:
+                return min(self.GROWTH ** (index + 1) / 1e6, self.max)
+        return self.max
+
+    def summary(self):
+        summary = {f"p{pct:g}_ms": to_ms(self.percentile(pct)) for pct in PERCENTILES}
+        summary["mean_ms"] = to_ms(self.total / self.count if self.count else None)
+        summary["max_ms"] = to_ms(self.max if self.count else None)
+        return summary
+
+
+def to_ms(seconds):
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+class StaleConnection(ConnectionError):
+    pass
+
+
+class ConnectionPool:
+    """Keep-alive HTTP/1.1 connections to a single origin"""
+
+    def __init__(self, url, size, timeout):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.https = parts.scheme == "https"
+        self.port = parts.port or (443 if self.https else 80)
+        self.path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.authority = parts.netloc
+        self.timeout = timeout
+        self.idle = []
+        self.slots = asyncio.Semaphore(size)
+        self.ssl = ssl.create_default_context() if self.https else None
+
+    async def _connect(self):
+        return await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=self.ssl), self.timeout
+        )
+
+    async def get(self):
+        """Issue one GET, return the status code"""
+        async with self.slots:
+            reused = bool(self.idle)
+            conn = self.idle.pop() if reused else await self._connect()
+            try:
+                status, keep_alive = await asyncio.wait_for(
+                    self._request(*conn), self.timeout
+                )
+            except StaleConnection:
+                conn[1].close()
+                if not reused:
+                    raise
+                # The server closed an idle keep-alive connection; retry once
+                conn = await self._connect()
+                status, keep_alive = await asyncio.wait_for(
+                    self._request(*conn), self.timeout
+                )
+            except BaseException:
+                conn[1].close()
+                raise
+            if keep_alive:
+                self.idle.append(conn)
+            else:
+                conn[1].close()
+            return status
+
+    async def _request(self, reader, writer):
+        writer.write(
+            f"GET {self.path} HTTP/1.1\r\nHost: {self.authority}\r\n"
+            f"User-Agent: glasgow-load-test\r\nAccept: */*\r\n\r\n".encode()
+        )
+        await writer.drain()
+        status_line = await reader.readline()
+        if not status_line:
+            raise StaleConnection("connection closed before response")
+        version, status = status_line.split()[:2]
+        status = int(status)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif "content-length" in headers:
+            await reader.readexactly(int(headers["content-length"]))
+        else:
+            await reader.read()  # body delimited by close
+            return status, False
+        connection = headers.get("connection", "").lower()
+        if version == b"HTTP/1.0":
+            return status, connection == "keep-alive"
+        return status, connection != "close"
+
+    def close(self):
+        for _, writer in self.idle:
+            writer.close()
+
+
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.latency = LatencyHistogram()
+        self.scheduled = 0
+        self.completed = 0
+        self.dropped = 0
+        self.late = 0
+        self.unfinished = 0
+        self.errors = {}
+        self.started = None
+        self.finished = None
+
+    def error(self, kind):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def report(self):
+        elapsed = (self.finished or time.perf_counter()) - (self.started or 0)
+        failed = sum(self.errors.values())
+        return {
+            "stage": self.name,
+            "scheduled": self.scheduled,
+            "completed": self.completed,
+            "dropped": self.dropped,
+            "late": self.late,
+            "unfinished": self.unfinished,
+            "error_rate": round(failed / self.scheduled, 4) if self.scheduled else 0,
+            "errors": self.errors,
+            "throughput_rps": round(self.completed / elapsed, 2) if elapsed else 0,
+            "latency": self.latency.summary(),
+        }
+
+
+async def fire(pool, scheduled_at, stats, inflight, observer=None):
+    """Run one request and record latency from its scheduled start"""
+    latency = None
+    try:
+        status = await pool.get()
+        if status >= 400:
+            stats.error(f"http_{status}")
+        else:
+            latency = time.perf_counter() - scheduled_at
+            stats.completed += 1
+            stats.latency.record(latency)
+            if stats.finished and time.perf_counter() > stats.finished:
+                stats.late += 1
+    except asyncio.CancelledError:
+        # Still queued or in flight when the run ended: an overload symptom,
+        # so it counts as a failure rather than vanishing from the totals
+        stats.unfinished += 1
+        stats.error("unfinished")
+    except asyncio.TimeoutError:
+        stats.error("timeout")
+    except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+        stats.error(type(e).__name__)
+    finally:
+        inflight.discard(asyncio.current_task())
+        if observer:
+            # latency is None for failed requests
+            observer(scheduled_at, latency)
+
+
+async def run_stages(url, stages, connections, timeout, max_inflight, observer=None):
+    """Drive each (duration, target_rate) stage, ramping linearly between rates
+
+    observer(scheduled_at, latency) is called after every request, if given.
+    """
+    pool = ConnectionPool(url, connections, timeout)
+    inflight = set()
+    results = []
+    rate = 0.0
+    try:
+        for i, (duration, target) in enumerate(stages, 1):
+            stats = StageStats(f"{i}:{duration:g}s@{target:g}rps")
+            start_rate = target if i == 1 else rate
+            stats.started = time.perf_counter()
+            end = stats.started + duration
+            # Arrival k is due when the expected count under the linear ramp,
+            # start_rate*t + slope*t**2/2, reaches k + 0.5 (inverted in closed
+            # form, so a ramp from 0 still sends its full share)
+            slope = (target - start_rate) / duration
+            arrivals = 0
+            while True:
+                due = arrivals + 0.5
+                discriminant = start_rate**2 + 2 * slope * due
+                if discriminant < 0:
+                    break  # a ramp down has sent everything it will
+                denominator = start_rate + math.sqrt(discriminant)
+                if denominator <= 0:
+                    break  # zero rate throughout
+                next_at = stats.started + 2 * due / denominator
+                if next_at >= end:
+                    break
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                arrivals += 1
+                stats.scheduled += 1
+                if len(inflight) >= max_inflight:
+                    stats.dropped += 1
+                    stats.error("dropped")
+                else:
+                    task = asyncio.ensure_future(
+                        fire(pool, next_at, stats, inflight, observer)
+                    )
+                    inflight.add(task)
+            # The stage lasts its full duration even after its last arrival
+            delay = end - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            rate = target
+            print(f"   ✅ stage {stats.name} scheduled {stats.scheduled} requests")
+            stats.finished = time.perf_counter()
+            results.append(stats)
+        if inflight:
+            await asyncio.wait(set(inflight), timeout=timeout + 1)
+        if inflight:
+            pending = set(inflight)
+            for task in pending:
+                task.cancel()
+            await asyncio.wait(pending)
+    finally:
+        pool.close()
+    return results
+
+
+def parse_stage(value):
+    """Parse 'DURATION:RATE', e.g. '30s:50' or '2m:100'"""
+    duration, _, rate = value.partition(":")
+    unit = {"s": 1, "m": 60, "h": 3600}.get(duration[-1], None)
+    seconds = float(duration[:-1]) * unit if unit else float(duration)
+    return seconds, float(rate)
+
+
+def print_report(label, report):
+    latency = report["latency"]
+    print(f"\n📊 {label}")
+    print(
+        f"   Requests: {report['completed']}/{report['scheduled']} ok, "
+        f"error rate {report['error_rate'] * 100:.2f}%, "
+        f"throughput {report['throughput_rps']:.1f} req/s"
+    )
+    if report["dropped"] or report["late"] or report["unfinished"]:
+        print(
+            f"   ⚠️  Overload: {report['dropped']} dropped at --max-inflight, "
+            f"{report['late']} finished after their stage ended, "
+            f"{report['unfinished']} still queued/in flight at the end"
+        )
+    if report["errors"]:
+        print(f"   Errors: {report['errors']}")
+    print(
+        "   Latency: "
+        + ", ".join(f"{k[:-3]} {v}ms" for k, v in latency.items() if v is not None)
+    )
+
+
+def run_test(args):
+    """Run the stages, print the human-readable report and return it as a dict"""
+    stages = args.stage or [(args.duration, args.rate)]
+    print(f"🚀 Load test on {args.url} ({len(stages)} stage(s))")
+    results = asyncio.run(
+        run_stages(args.url, stages, args.connections, args.timeout, args.max_inflight)
+    )
+
+    overall = StageStats("total")
+    overall.started = results[0].started
+    overall.finished = results[-1].finished
+    for stats in results:
+        overall.latency.merge(stats.latency)
+        overall.scheduled += stats.scheduled
+        overall.completed += stats.completed
+        overall.dropped += stats.dropped
+        overall.late += stats.late
+        overall.unfinished += stats.unfinished
+        for kind, n in stats.errors.items():
+            overall.errors[kind] = overall.errors.get(kind, 0) + n
+
+    report = {
+        "url": args.url,
+        "stages": [stats.report() for stats in results],
+        "total": overall.report(),
+    }
+    if len(results) > 1:
+        for stage in report["stages"]:
+            print_report(f"Stage {stage['stage']}", stage)
+    print_report("Total", report["total"])
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-model HTTP load generator")
+    parser.add_argument("url", help="Target URL, e.g. http://host/health")
+    parser.add_argument("--rate", type=float, default=15, help="Requests/second")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds")
+    parser.add_argument(
+        "--stage",
+        type=parse_stage,
+        action="append",
+        help="DURATION:RATE stage; later stages ramp linearly from the previous "
+        "stage's rate (repeatable, overrides --rate/--duration)",
+    )
+    parser.add_argument("--connections", type=int, default=50, help="Pool size")
+    parser.add_argument("--timeout", type=float, default=10, help="Per request")
+    parser.add_argument(
+        "--max-inflight",
+        type=int,
+        default=10000,
+        help="Requests beyond this many outstanding are counted as dropped",
+    )
+    parser.add_argument("--json", help="Write the report as JSON ('-' for stdout)")
+    args = parser.parse_args()
+
+    if args.json == "-":
+        # Keep stdout to the JSON document so it can be piped into jq
+        with contextlib.redirect_stdout(sys.stderr):
+            report = run_test(args)
+        print(json.dumps(report, indent=2))
+        return
+    report = run_test(args)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n❌ Cancelled by user")
+        sys.exit(1)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Node Metrics Client
+Reads the latest sample from the node-agent DaemonSet (components/node-agent)
+
+One HTTP GET per node replaces the top/free/df/thermal SSH round trips. The
+response is memoised per process for one agent interval, so the separate
+get_* helpers in quick_check.py and choose_master.py share a single request.
+Returns None when the agent is unreachable so callers can fall back to SSH.
+
+Usage:
+    ./admin/node_metrics.py            # print the latest sample of every node
+"""
+
+import json
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from common import WORKERS
+
+AGENT_PORT = 9101
+TIMEOUT = 1
+FAILURE_TTL = 30
+
+_cache = {}  # (ip, path) -> (fetched_at, body, ttl)
+
+
+def fetch(ip, path="/metrics"):
+    """Return the agent's JSON for path on ip, or None if unavailable"""
+    now = time.time()
+    cached = _cache.get((ip, path))
+    if cached and now - cached[0] < cached[2]:
+        return cached[1]
+    try:
+        url = f"http://{ip}:{AGENT_PORT}{path}"
+        with urllib.request.urlopen(url, timeout=TIMEOUT) as response:
+            body = json.load(response)
+    except (OSError, ValueError):
+        # Don't retry a dead agent from every get_* helper
+        _cache[(ip, path)] = (now, None, FAILURE_TTL)
+        return None
+    _cache[(ip, path)] = (now, body, body.get("interval", 5))
+    return body
+
+
+def latest(ip):
+    """Latest sample dict for ip (cpu_percent, mem_*, disk_percent, ...), or None"""
+    body = fetch(ip)
+    return body.get("latest") if body else None
+
+
+def fetch_all(hosts=WORKERS):
+    """Fetch every node's latest sample concurrently: {hostname: sample or None}"""
+    with ThreadPoolExecutor(max_workers=len(hosts)) as pool:
+        samples = pool.map(lambda host: latest(host[1]), hosts)
+        return {hostname: sample for (hostname, _), sample in zip(hosts, samples)}
+
+
+def main():
+    print(f"{'Node':<10} {'CPU':<7} {'RAM':<15} {'Disk':<7} {'Temp':<6}")
+    print("-" * 48)
+    for hostname, sample in fetch_all().items():
+        if not sample:
+            print(f"{hostname:<10} agent unreachable")
+            continue
+        temp = sample["temperature"]
+        temp_text = f"{temp:.0f}°C" if temp is not None else "N/A"
+        ram = f"{sample['mem_used_mb']}/{sample['mem_total_mb']}MB"
+        print(
+            f"{hostname:<10} {sample['cpu_percent']:<6.0f}% {ram:<15} "
+            f"{sample['disk_percent']:<6.0f}% {temp_text:<6}"
+        )
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit(1)
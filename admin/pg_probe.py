@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Postgres Health Probe
+Connection latency, slow statements, cache hit ratio, bloat, long-running
+transactions and unindexed pgvector columns for glasgow_db
+
+Connects with psycopg2 to --host (default: a `kubectl port-forward` to
+postgres-service that the probe starts and stops itself). Credentials come
+from PGUSER/PGPASSWORD, or are read from the postgres-secret in the cluster.
+
+Top statements need the pg_stat_statements extension, which in turn needs
+`shared_preload_libraries=pg_stat_statements` on the server; the probe says so
+when it is missing rather than failing.
+
+Usage:
+    ./admin/pg_probe.py                                 # port-forward automatically
+    ./admin/pg_probe.py --host 127.0.0.1 --port 5432    # local Postgres
+    ./admin/pg_probe.py --long-running 30 --top 20 --json pg.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+try:
+    import psycopg2
+except ImportError:
+    print("❌ psycopg2 is required: pip install psycopg2-binary")
+    sys.exit(1)
+
+from common import percentile, secret_value
+
+NAMESPACE = "glasgow-prod"
+DATABASE = "glasgow_db"
+SERVICE = "postgres-service"
+FORWARD_PORT = 15432
+ANN_METHODS = ("ivfflat", "hnsw")
+
+
+def start_port_forward(port):
+    """kubectl port-forward to postgres-service; returns the process"""
+    process = subprocess.Popen(
+        ["kubectl", "port-forward", f"svc/{SERVICE}", f"{port}:5432", "-n", NAMESPACE],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    # kubectl prints "Forwarding from ..." once the listener is up
+    line = process.stdout.readline()
+    if b"Forwarding" not in line:
+        process.terminate()
+        return None
+    return process
+
+
+def measure_latency(dsn, connects, round_trips):
+    """Fresh-connection latency and SELECT 1 round trips on one connection (ms)"""
+    connect_ms = []
+    for _ in range(connects):
+        start = time.perf_counter()
+        conn = psycopg2.connect(**dsn)
+        connect_ms.append((time.perf_counter() - start) * 1000)
+        conn.close()
+
+    conn = psycopg2.connect(**dsn)
+    rtt_ms = []
+    with conn.cursor() as cur:
+        for _ in range(round_trips):
+            start = time.perf_counter()
+            cur.execute("SELECT 1")
+            cur.fetchone()
+            rtt_ms.append((time.perf_counter() - start) * 1000)
+    conn.close()
+    summary = {}
+    for name, values in (("connect", connect_ms), ("round_trip", rtt_ms)):
+        summary[name] = {
+            f"p{pct}_ms": round(percentile(values, pct), 3) if values else None
+            for pct in (50, 99)
+        }
+    return summary
+
+
+def query(cur, sql, params=None):
+    cur.execute(sql, params)
+    columns = [c.name for c in cur.description]
+    return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+
+def top_statements(cur, limit):
+    """Top statements by total time, or None if pg_stat_statements is unusable"""
+    cur.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'")
+    if not cur.fetchone():
+        return None
+    try:
+        return query(
+            cur,
+            """
+            SELECT round(total_exec_time::numeric, 1) AS total_ms,
+                   calls,
+                   round(mean_exec_time::numeric, 2) AS mean_ms,
+                   rows,
+                   left(regexp_replace(query, '\\s+', ' ', 'g'), 100) AS query
+            FROM pg_stat_statements
+            WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+            ORDER BY total_exec_time DESC
+            LIMIT %s
+            """,
+            (limit,),
+        )
+    except psycopg2.Error:
+        # The extension exists but the library is not in shared_preload_libraries
+        return None
+
+
+def cache_hit_ratio(cur):
+    rows = query(
+        cur,
+        """
+        SELECT (SELECT sum(blks_hit)::float / nullif(sum(blks_hit + blks_read), 0)
+                FROM pg_stat_database WHERE datname = current_database()) AS heap_and_index,
+               (SELECT sum(idx_blks_hit)::float / nullif(sum(idx_blks_hit + idx_blks_read), 0)
+                FROM pg_statio_user_indexes) AS index
+        """,
+    )
+    return {k: round(v, 4) if v is not None else None for k, v in rows[0].items()}
+
+
+def table_bloat(cur, limit):
+    """Dead-tuple ratio per table (what autovacuum has not reclaimed yet)"""
+    return query(
+        cur,
+        """
+        SELECT schemaname || '.' || relname AS table,
+               n_live_tup AS live,
+               n_dead_tup AS dead,
+               round(n_dead_tup::numeric / nullif(n_live_tup + n_dead_tup, 0), 3) AS dead_ratio,
+               pg_size_pretty(pg_total_relation_size(relid)) AS size,
+               coalesce(greatest(last_autovacuum, last_vacuum)::text, 'never') AS last_vacuum
+        FROM pg_stat_user_tables
+        WHERE n_dead_tup > 0
+        ORDER BY n_dead_tup DESC
+        LIMIT %s
+        """,
+        (limit,),
+    )
+
+
+def long_running(cur, seconds):
+    return query(
+        cur,
+        """
+        SELECT pid, usename AS user, state,
+               extract(epoch FROM now() - xact_start)::int AS seconds,
+               coalesce(wait_event_type || ':' || wait_event, '') AS waiting,
+               left(regexp_replace(query, '\\s+', ' ', 'g'), 80) AS query
+        FROM pg_stat_activity
+        WHERE xact_start IS NOT NULL
+          AND pid <> pg_backend_pid()
+          AND now() - xact_start > make_interval(secs => %s)
+        ORDER BY xact_start
+        """,
+        (seconds,),
+    )
+
+
+def unindexed_vectors(cur):
+    """pgvector columns without an ivfflat/hnsw index on them"""
+    return query(
+        cur,
+        """
+        SELECT n.nspname || '.' || c.relname AS table,
+               a.attname AS column,
+               c.reltuples::bigint AS rows
+        FROM pg_attribute a
+        JOIN pg_class c ON c.oid = a.attrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        JOIN pg_type t ON t.oid = a.atttypid
+        WHERE t.typname = 'vector'
+          AND c.relkind IN ('r', 'p', 'm')
+          AND a.attnum > 0
+          AND NOT a.attisdropped
+          AND NOT EXISTS (
+              SELECT 1
+              FROM pg_index i
+              JOIN pg_class ic ON ic.oid = i.indexrelid
+              JOIN pg_am am ON am.oid = ic.relam
+              WHERE i.indrelid = c.oid
+                AND a.attnum = ANY (i.indkey::int2[])
+                AND am.amname IN %s
+          )
+        ORDER BY c.reltuples DESC
+        """,
+        (ANN_METHODS,),
+    )
+
+
+def print_table(rows, columns):
+    widths = {c: max(len(c), *(len(str(r[c])) for r in rows)) for c in columns}
+    print("   " + "  ".join(f"{c:<{widths[c]}}" for c in columns))
+    for row in rows:
+        print("   " + "  ".join(f"{str(row[c]):<{widths[c]}}" for c in columns))
+
+
+def report(results, args):
+    latency = results["latency"]
+    print("\n⏱️  Latency")
+    if latency["connect"]["p50_ms"] is None:
+        print("   Connect:    skipped (--connects 0)")
+    else:
+        print(
+            f"   Connect:    p50 {latency['connect']['p50_ms']}ms, "
+            f"p99 {latency['connect']['p99_ms']}ms ({args.connects} fresh connections)"
+        )
+    if latency["round_trip"]["p50_ms"] is None:
+        print("   Round trip: skipped (--round-trips 0)")
+    else:
+        print(
+            f"   Round trip: p50 {latency['round_trip']['p50_ms']}ms, "
+            f"p99 {latency['round_trip']['p99_ms']}ms (SELECT 1 x{args.round_trips}, reused)"
+        )
+
+    ratio = results["cache_hit_ratio"]
+    print("\n🧠 Cache hit ratio")
+    for name, value in ratio.items():
+        if value is None:
+            print(f"   {name}: no reads yet")
+            continue
+        icon = "✅" if value >= 0.99 else "⚠️ "
+        print(f"   {icon} {name}: {value * 100:.2f}%")
+    if ratio["heap_and_index"] is not None and ratio["heap_and_index"] < 0.99:
+        print("   💡 Below 99%: shared_buffers may be too small for the working set")
+
+    print("\n🐢 Top statements by total time")
+    statements = results["top_statements"]
+    if statements is None:
+        print("   ⚠️  pg_stat_statements is not installed or not preloaded. Add")
+        print("      args: [\"-c\", \"shared_preload_libraries=pg_stat_statements\"]")
+        print("      to the postgres container, then CREATE EXTENSION pg_stat_statements;")
+    elif statements:
+        print_table(statements, ["total_ms", "calls", "mean_ms", "rows", "query"])
+    else:
+        print("   No statements recorded yet")
+
+    print("\n🗑️  Bloat (dead tuples)")
+    bloat = results["bloat"]
+    if bloat:
+        print_table(bloat, ["table", "live", "dead", "dead_ratio", "size", "last_vacuum"])
+        if any((row["dead_ratio"] or 0) > 0.2 for row in bloat):
+            print("   ⚠️  Tables above 20% dead tuples: check autovacuum or VACUUM them")
+    else:
+        print("   ✅ No dead tuples")
+
+    print(f"\n⌛ Transactions open longer than {args.long_running}s")
+    if results["long_running"]:
+        print_table(results["long_running"], ["pid", "user", "state", "seconds", "waiting", "query"])
+    else:
+        print("   ✅ None")
+
+    print("\n🧭 pgvector columns without an ANN index")
+    if results["unindexed_vectors"]:
+        for row in results["unindexed_vectors"]:
+            # reltuples is -1 until the table has been analyzed
+            rows = f"~{row['rows']} rows" if row["rows"] >= 0 else "not analyzed"
+            print(f"   ⚠️  {row['table']}.{row['column']} ({rows})")
+        print("   💡 Similarity searches on these scan every row; add e.g.")
+        print("      CREATE INDEX ON <table> USING hnsw (<column> vector_cosine_ops);")
+    else:
+        print("   ✅ Every vector column has an ivfflat/hnsw index")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Postgres performance health probe")
+    parser.add_argument("--host", help="Connect here instead of port-forwarding")
+    parser.add_argument("--port", type=int, default=5432)
+    parser.add_argument("--dbname", default=os.environ.get("PGDATABASE", DATABASE))
+    parser.add_argument("--user", default=os.environ.get("PGUSER"))
+    parser.add_argument("--connects", type=int, default=10, help="Fresh connections to time")
+    parser.add_argument("--round-trips", type=int, default=200, help="SELECT 1 on one connection")
+    parser.add_argument("--top", type=int, default=10, help="Statements and tables to show")
+    parser.add_argument("--long-running", type=int, default=60, help="Seconds")
+    parser.add_argument("--json", help="Write results as JSON")
+    args = parser.parse_args()
+
+    forward = None
+    if args.host:
+        host, port = args.host, args.port
+    else:
+        print(f"🔌 Port-forwarding {SERVICE} to localhost:{FORWARD_PORT}...")
+        forward = start_port_forward(FORWARD_PORT)
+        if not forward:
+            print("❌ kubectl port-forward failed; use --host to connect directly")
+            sys.exit(1)
+        host, port = "127.0.0.1", FORWARD_PORT
+
+    dsn = {
+        "host": host,
+        "port": port,
+        "dbname": args.dbname,
+        "user": args.user or secret_value("postgres-secret", "POSTGRES_USER", NAMESPACE),
+        "password": os.environ.get("PGPASSWORD") or secret_value("postgres-secret", "POSTGRES_PASSWORD", NAMESPACE),
+        "connect_timeout": 5,
+        "application_name": "glasgow-pg-probe",
+    }
+    print(f"🐘 Probing {dsn['dbname']} on {host}:{port}")
+    try:
+        results = {"latency": measure_latency(dsn, args.connects, args.round_trips)}
+        conn = psycopg2.connect(**dsn)
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            results["cache_hit_ratio"] = cache_hit_ratio(cur)
+            results["top_statements"] = top_statements(cur, args.top)
+            results["bloat"] = table_bloat(cur, args.top)
+            results["long_running"] = long_running(cur, args.long_running)
+            results["unindexed_vectors"] = unindexed_vectors(cur)
+        conn.close()
+    except psycopg2.Error as e:
+        print(f"❌ {str(e).strip()}")
+        sys.exit(1)
+    finally:
+        if forward:
+            forward.terminate()
+
+    report(results, args)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2, default=str)
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n❌ Cancelled by user")
+        sys.exit(1)
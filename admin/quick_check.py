@@ -4,12 +4,17 @@ Glasgow GitOps Cluster Health Check
 Quick status check for all cluster components
 """
 
+import argparse
 import subprocess
 import sys
 import re
 import json
 from datetime import datetime
 
+import admin_daemon
+import node_metrics
+import result_cache
+
 USERNAME = "bsg"
 PASSWORD = "mlop!"
 HOSTS = [
@@ -21,6 +26,9 @@ HOSTS = [
 
 def run_command(cmd):
     """Run a command and return output"""
+    cached = admin_daemon.kubectl_get(cmd) if cmd.startswith("kubectl get ") else None
+    if cached is not None:
+        return cached
     try:
         result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
         return result.returncode == 0, result.stdout.strip(), result.stderr.strip()
@@ -43,131 +51,121 @@ def ping_host(ip):
         return False
 
 
+def ssh_output(ip, cmd):
+    """Run cmd on ip over SSH, via the admin daemon's warm session if running"""
+    output = admin_daemon.ssh(ip, cmd)
+    if output is not None:
+        return output
+    output = subprocess.check_output(
+        [
+            "sshpass",
+            "-p",
+            PASSWORD,
+            "ssh",
+            "-o",
+            "ConnectTimeout=2",
+            "-o",
+            "StrictHostKeyChecking=no",
+            f"{USERNAME}@{ip}",
+            cmd,
+        ],
+        stderr=subprocess.DEVNULL,
+    )
+    return output.decode().strip()
+
+
 def ssh_check(ip):
     try:
-        output = subprocess.check_output(
-            [
-                "sshpass",
-                "-p",
-                PASSWORD,
-                "ssh",
-                "-o",
-                "ConnectTimeout=2",
-                "-o",
-                "StrictHostKeyChecking=no",
-                f"{USERNAME}@{ip}",
-                "hostname",
-            ],
-            stderr=subprocess.DEVNULL,
-        )
-        return output.decode().strip()
+        return ssh_output(ip, "hostname")
     except subprocess.CalledProcessError:
         return None
 
 
-def get_cpu_temp(ip):
+@result_cache.cached("temperature")
+def read_cpu_temp(ip):
+    """CPU temperature in °C, or None"""
+    sample = node_metrics.latest(ip)
+    if sample and sample["temperature"] is not None:
+        return sample["temperature"]
     try:
-        output = subprocess.check_output(
-            [
-                "sshpass",
-                "-p",
-                PASSWORD,
-                "ssh",
-                "-o",
-                "ConnectTimeout=2",
-                "-o",
-                "StrictHostKeyChecking=no",
-                f"{USERNAME}@{ip}",
-                "cat /sys/class/thermal/thermal_zone0/temp",
-            ],
-            stderr=subprocess.DEVNULL,
-        )
-        temp_c = int(output.decode().strip()) / 1000
-        return f"{temp_c:.0f}°C"
+        output = ssh_output(ip, "cat /sys/class/thermal/thermal_zone0/temp")
+        return int(output) / 1000
     except Exception:
-        return "N/A"
+        return None
 
 
-def get_cpu_percent(ip):
+@result_cache.cached("cpu")
+def read_cpu_percent(ip):
+    """CPU usage percentage, or None"""
+    sample = node_metrics.latest(ip)
+    if sample:
+        return sample["cpu_percent"]
     try:
-        output = subprocess.check_output(
-            [
-                "sshpass",
-                "-p",
-                PASSWORD,
-                "ssh",
-                "-o",
-                "ConnectTimeout=2",
-                "-o",
-                "StrictHostKeyChecking=no",
-                f"{USERNAME}@{ip}",
-                "top -bn1 | grep 'Cpu(s)' | awk '{print $2 + $4}'",
-            ],
-            stderr=subprocess.DEVNULL,
-        )
-        cpu_usage = float(output.decode().strip())
-        return f"{cpu_usage:.0f}%"
+        output = ssh_output(ip, "top -bn1 | grep 'Cpu(s)' | awk '{print $2 + $4}'")
+        return float(output)
     except Exception:
-        return "N/A"
+        return None
 
 
-def get_ram_usage(ip):
+@result_cache.cached("memory")
+def read_ram_usage(ip):
+    """(used, total) memory in MB, or None"""
+    sample = node_metrics.latest(ip)
+    if sample:
+        return sample["mem_used_mb"], sample["mem_total_mb"]
     try:
-        output = subprocess.check_output(
-            [
-                "sshpass",
-                "-p",
-                PASSWORD,
-                "ssh",
-                "-o",
-                "ConnectTimeout=2",
-                "-o",
-                "StrictHostKeyChecking=no",
-                f"{USERNAME}@{ip}",
-                "free -m | awk '/Mem:/ {print $3 \" \" $2}'",
-            ],
-            stderr=subprocess.DEVNULL,
-        )
-        used, total = map(int, output.decode().strip().split())
-        usage_percent = (used / total) * 100
-        return f"{usage_percent:.0f}%"
+        output = ssh_output(ip, "free -m | awk '/Mem:/ {print $3 \" \" $2}'")
+        used, total = map(int, output.split())
+        return used, total
     except Exception:
-        return "N/A"
+        return None
 
 
-def get_disk_usage(ip):
+@result_cache.cached("disk")
+def read_disk_usage(ip):
+    """Root filesystem usage percentage, or None"""
+    sample = node_metrics.latest(ip)
+    if sample:
+        return round(sample["disk_percent"])
     try:
-        output = subprocess.check_output(
-            [
-                "sshpass",
-                "-p",
-                PASSWORD,
-                "ssh",
-                "-o",
-                "ConnectTimeout=2",
-                "-o",
-                "StrictHostKeyChecking=no",
-                f"{USERNAME}@{ip}",
-                "df -h / | awk 'NR==2 {print $5}'",
-            ],
-            stderr=subprocess.DEVNULL,
-        )
-        usage = output.decode().strip().replace("%", "")
-        return f"{usage}%"
+        output = ssh_output(ip, "df -h / | awk 'NR==2 {print $5}'")
+        return int(output.replace("%", ""))
     except Exception:
+        return None
+
+
+def get_cpu_temp(ip):
+    temp_c = read_cpu_temp(ip)
+    return f"{temp_c:.0f}°C" if temp_c is not None else "N/A"
+
+
+def get_cpu_percent(ip):
+    cpu_usage = read_cpu_percent(ip)
+    return f"{cpu_usage:.0f}%" if cpu_usage is not None else "N/A"
+
+
+def get_ram_usage(ip):
+    usage = read_ram_usage(ip)
+    if not usage:
         return "N/A"
+    used, total = usage
+    usage_percent = (used / total) * 100
+    return f"{usage_percent:.0f}%"
+
+
+def get_disk_usage(ip):
+    usage = read_disk_usage(ip)
+    return f"{usage}%" if usage is not None else "N/A"
 
 
 def kubectl_get_nodes():
     """Get Kubernetes node status"""
+    success, output, _ = run_command("kubectl get nodes -o json")
+    if not success:
+        return None
     try:
-        output = subprocess.check_output(
-            ["kubectl", "get", "nodes", "-o", "json"],
-            stderr=subprocess.DEVNULL,
-        )
-        nodes_data = json.loads(output.decode())
-        return nodes_data
-    except Exception:
+        return json.loads(output)
+    except ValueError:
         return None
 
 
@@ -192,32 +190,31 @@ def get_k8s_node_status(hostname, nodes_data):
     return "NotFound"
 
 
-def get_pod_count(hostname):
-    """Get running pod count for a node"""
+@result_cache.cached("pods")
+def read_pod_count(hostname):
+    """(running, total) pods scheduled on a node, or None"""
     try:
-        output = subprocess.check_output(
-            [
-                "kubectl",
-                "get",
-                "pods",
-                "--all-namespaces",
-                "--field-selector",
-                f"spec.nodeName={hostname}",
-                "-o",
-                "json",
-            ],
-            stderr=subprocess.DEVNULL,
+        success, output, _ = run_command(
+            f"kubectl get pods --all-namespaces --field-selector spec.nodeName={hostname} -o json"
         )
-        pods_data = json.loads(output.decode())
+        pods_data = json.loads(output)
         running_pods = sum(
             1
             for pod in pods_data.get("items", [])
             if pod["status"]["phase"] == "Running"
         )
         total_pods = len(pods_data.get("items", []))
-        return f"{running_pods}/{total_pods}"
+        return running_pods, total_pods
     except Exception:
+        return None
+
+
+def get_pod_count(hostname):
+    """Get running pod count for a node"""
+    counts = read_pod_count(hostname)
+    if not counts:
         return "N/A"
+    return f"{counts[0]}/{counts[1]}"
 
 
 def check_nodes():
@@ -378,9 +375,11 @@ def check_ingress():
 
 def get_node_system_summary():
     """Get concise CPU temp, RAM, SSD usage for each node using SSH (no colors, aligned)"""
-    print("\n🖥️  System Summary (via SSH):")
+    print("\n🖥️  System Summary (via node-agent, SSH fallback):")
     print(f"{'Node':<10} {'CPU Temp':<9} {'RAM Used':<9} {'SSD Used':<9}")
     print("-" * 40)
+    # One concurrent GET per node-agent; the get_* helpers reuse the result
+    node_metrics.fetch_all([(hostname, ip) for hostname, ip, _ in HOSTS])
     for hostname, ip, _ in HOSTS:
         cpu_temp = get_cpu_temp(ip)
         ram_used = get_ram_usage(ip)
@@ -389,6 +388,13 @@ def get_node_system_summary():
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Glasgow GitOps Cluster Health Check")
+    parser.add_argument(
+        "--fresh", action="store_true", help="Ignore cached probe results"
+    )
+    args = parser.parse_args()
+    result_cache.set_fresh(args.fresh)
+
     print(f"🏠 Glasgow GitOps Cluster Health Check")
     print(f"📅 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 50)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Probe Result Cache
+Shares recent probe results (temperature, RAM, disk, pod counts...) between
+admin script runs so back-to-back checks don't hit the nodes again
+
+Entries are JSON files keyed by (probe, host, args), written atomically
+(tempfile + rename) so concurrent scripts never read a torn entry. Each probe
+type has its own TTL; the directory is bounded by MAX_ENTRIES and evicted
+oldest-first under an flock. Pass --fresh to a script (or set GLASGOW_FRESH=1)
+to bypass cached values; fresh results are still stored for the next run.
+
+Usage:
+    ./admin/result_cache.py            # show cached entries and their age
+    ./admin/result_cache.py --clear
+"""
+
+import argparse
+import fcntl
+import functools
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+CACHE_DIR = os.path.expanduser("~/.cache/glasgow-admin/results")
+MAX_ENTRIES = 500
+DEFAULT_TTL = 30
+# Seconds a result stays valid, per probe type
+PROBE_TTLS = {
+    "cpu": 10,
+    "temperature": 15,
+    "pods": 15,
+    "memory": 30,
+    "uptime": 60,
+    "disk": 120,
+    "errors": 300,
+}
+
+FRESH = os.environ.get("GLASGOW_FRESH") == "1"
+
+
+def set_fresh(fresh):
+    """Ignore cached values for the rest of this process (the --fresh flag)"""
+    global FRESH
+    FRESH = fresh
+
+
+def entry_path(probe, host, args=()):
+    key = json.dumps([probe, host, list(args)])
+    digest = hashlib.sha256(key.encode()).hexdigest()[:32]
+    return os.path.join(CACHE_DIR, f"{probe}-{digest}.json")
+
+
+def get(probe, host, *args):
+    """Return the cached value if present and within the probe's TTL, else None"""
+    if FRESH:
+        return None
+    try:
+        with open(entry_path(probe, host, args)) as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - entry["stored"] > PROBE_TTLS.get(probe, DEFAULT_TTL):
+        return None
+    return entry["value"]
+
+
+def put(probe, host, value, *args):
+    """Atomically store a probe result"""
+    try:
+        os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"stored": time.time(), "host": host, "value": value}, f)
+        os.replace(tmp, entry_path(probe, host, args))
+    except OSError:
+        return
+    evict()
+
+
+def evict(max_entries=MAX_ENTRIES):
+    """Drop the oldest entries once the directory holds more than max_entries"""
+    try:
+        names = [n for n in os.listdir(CACHE_DIR) if n.endswith(".json")]
+    except OSError:
+        return
+    if len(names) <= max_entries:
+        return
+    with open(os.path.join(CACHE_DIR, ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        entries = []
+        for name in names:
+            path = os.path.join(CACHE_DIR, name)
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                continue  # already evicted by another process
+        entries.sort()
+        for _, path in entries[: len(entries) - max_entries]:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+def cached(probe, skip=(None,)):
+    """Decorate fn(host, *args) so its result is shared via the cache
+
+    Results equal to one of `skip` (failure sentinels) are not stored.
+    """
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(host, *args):
+            value = get(probe, host, *args)
+            if value is not None:
+                return tuple(value) if isinstance(value, list) else value
+            value = fn(host, *args)
+            if value not in skip:
+                put(probe, host, value, *args)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the probe result cache")
+    parser.add_argument("--clear", action="store_true", help="Delete all entries")
+    args = parser.parse_args()
+
+    if not os.path.isdir(CACHE_DIR):
+        print("ℹ️  Cache is empty")
+        return
+    names = sorted(n for n in os.listdir(CACHE_DIR) if n.endswith(".json"))
+    if args.clear:
+        for name in names:
+            os.unlink(os.path.join(CACHE_DIR, name))
+        print(f"🗑️  Removed {len(names)} cached results")
+        return
+
+    now = time.time()
+    print(f"{'Probe':<12} {'Host':<16} {'Age':>6}  Value")
+    print("-" * 50)
+    for name in names:
+        try:
+            with open(os.path.join(CACHE_DIR, name)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            continue
+        probe = name.rsplit("-", 1)[0]
+        age = now - entry["stored"]
+        stale = " (expired)" if age > PROBE_TTLS.get(probe, DEFAULT_TTL) else ""
+        print(f"{probe:<12} {entry['host']:<16} {age:>5.0f}s  {entry['value']}{stale}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""
+Resource Right-Sizing Recommender
+Compares measured per-container CPU/memory usage with the requests and limits
+declared in components/ and suggests a patch for each manifest
+
+`sample` polls the metrics API (metrics-server) every --interval seconds and
+appends one gzip member per sample to a compact history file (CPU in
+millicores and memory in MiB, as integers). `recommend` reads that history,
+or any canned file in the same format, maps pods back to the Deployments,
+StatefulSets, DaemonSets and Knative Services in components/, and computes
+p50/p95/peak per container:
+
+  cpu request     p95 + 20%            memory request  p95 + 20%
+  cpu limit       raised only if the   memory limit    peak + 30%
+                  peak hits it
+
+Under an HPA the request is also raised until p95 sits at 90% of the
+utilization target, so steady load does not trigger scale-ups. A peak is only
+trusted to lower a limit once the container has --min-span (a day) of
+samples, and a limit never drops below the current request. Changes under
+10% are left alone. Headroom freed is the request change times
+the replicas the workload normally runs (HPA minReplicas when it has one).
+Because HPAs scale on utilization relative to requests, the new utilization
+at p95 is shown next to the HPA target.
+
+History format (one JSON object per line, optionally gzipped):
+    {"t": 1760000000, "pods": {"fastapi-7d9c-abcde/fastapi": [35, 180]}}
+
+Usage:
+    ./admin/rightsize.py sample --duration 24h --interval 60
+    ./admin/rightsize.py recommend
+    ./admin/rightsize.py recommend --history canned.jsonl --json plan.json
+"""
+
+import argparse
+import gzip
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+
+import capacity_planner
+from capacity_planner import parse_cpu, parse_memory
+from common import percentile
+
+NAMESPACE = "glasgow-prod"
+HISTORY_PATH = os.path.expanduser("~/.cache/glasgow-admin/usage-history.jsonl.gz")
+HEADROOM = 1.2
+LIMIT_HEADROOM = 1.3
+MIN_CHANGE = 0.10
+MIN_SAMPLES = 10
+MIN_SPAN = "24h"
+
+
+def sample(args):
+    """Append metrics API samples to the history file until --duration elapses"""
+    os.makedirs(os.path.dirname(os.path.abspath(args.history)), exist_ok=True)
+    path = f"/apis/metrics.k8s.io/v1beta1/namespaces/{args.namespace}/pods"
+    deadline = time.time() + parse_duration(args.duration)
+    print(f"📈 Sampling {args.namespace} every {args.interval:g}s into {args.history}")
+    taken = 0
+    while time.time() < deadline:
+        started = time.time()
+        try:
+            output = subprocess.check_output(
+                ["kubectl", "get", "--raw", path], stderr=subprocess.DEVNULL, timeout=30
+            )
+            pods = {}
+            for pod in json.loads(output)["items"]:
+                for container in pod["containers"]:
+                    usage = container["usage"]
+                    pods[f"{pod['metadata']['name']}/{container['name']}"] = [
+                        math.ceil(parse_cpu_usage(usage["cpu"]) * 1000),
+                        math.ceil(parse_memory(usage["memory"]) / 2**20),
+                    ]
+            with gzip.open(args.history, "at") as f:
+                f.write(json.dumps({"t": int(started), "pods": pods}, separators=(",", ":")) + "\n")
+            taken += 1
+            print(f"   {time.strftime('%H:%M:%S')} {len(pods)} containers ({taken} samples)")
+        except Exception as e:
+            print(f"   ⚠️  Sample failed: {e}")
+        time.sleep(max(0, args.interval - (time.time() - started)))
+
+
+def parse_duration(value):
+    """'90s', '30m', '24h', '7d' -> seconds"""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    if value[-1] in units:
+        return float(value[:-1]) * units[value[-1]]
+    return float(value)
+
+
+def parse_cpu_usage(value):
+    """Metrics API CPU (nanocores '12345n', microcores 'u', or a quantity) -> cores"""
+    value = str(value)
+    if value.endswith("n"):
+        return float(value[:-1]) / 1e9
+    if value.endswith("u"):
+        return float(value[:-1]) / 1e6
+    return parse_cpu(value)
+
+
+def load_history(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    series = {}
+    first = last = None
+    with opener(path, "rt") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            first = record["t"] if first is None else min(first, record["t"])
+            last = record["t"] if last is None else max(last, record["t"])
+            for key, (cpu, memory) in record["pods"].items():
+                values = series.setdefault(key, ([], [], [record["t"], record["t"]]))
+                values[0].append(cpu)
+                values[1].append(memory)
+                values[2][0] = min(values[2][0], record["t"])
+                values[2][1] = max(values[2][1], record["t"])
+    return series, first, last
+
+
+def resource_files(directory):
+    """Local files listed as kustomization resources (patches excluded)"""
+    kustomization = os.path.join(directory, "kustomization.yaml")
+    if not os.path.exists(kustomization):
+        return []
+    with open(kustomization) as f:
+        config = capacity_planner.yaml.load(f, Loader=capacity_planner.Loader) or {}
+    files = []
+    for resource in config.get("resources", []):
+        path = os.path.join(directory, resource)
+        if "://" in resource:
+            continue
+        if os.path.isdir(path):
+            files += resource_files(path)
+        elif os.path.exists(path):
+            files.append(path)
+    return files
+
+
+def declared_workloads():
+    """name -> {kind, file, replicas, hpa, containers: {name: resources}}"""
+    workloads = {}
+    hpas = {}
+    components = capacity_planner.COMPONENTS_DIR
+    for component in sorted(os.listdir(components)):
+        for path in resource_files(os.path.join(components, component)):
+            for doc in capacity_planner.load_documents(path):
+                kind = doc.get("kind")
+                metadata = doc.get("metadata", {})
+                if kind == "HorizontalPodAutoscaler":
+                    hpas[doc["spec"]["scaleTargetRef"]["name"]] = doc["spec"]
+                    continue
+                knative = kind == "Service" and doc.get("apiVersion", "").startswith(
+                    "serving.knative.dev"
+                )
+                if kind not in capacity_planner.WORKLOAD_KINDS and not knative:
+                    continue
+                pod_spec = doc.get("spec", {}).get("template", {}).get("spec", {})
+                if not pod_spec.get("containers"):
+                    continue
+                workloads[metadata["name"]] = {
+                    "kind": "KnativeService" if knative else kind,
+                    "file": os.path.relpath(path, capacity_planner.REPO_ROOT),
+                    "replicas": doc.get("spec", {}).get("replicas", 1),
+                    # Knative names an unnamed container "user-container"
+                    "containers": {
+                        c.get("name", "user-container"): c.get("resources", {})
+                        for c in pod_spec["containers"]
+                    },
+                }
+    for name, spec in hpas.items():
+        if name in workloads:
+            workloads[name]["hpa"] = spec
+            workloads[name]["replicas"] = spec.get("minReplicas", 1)
+    return workloads
+
+
+def owning_workload(pod, workloads):
+    """Longest workload name that prefixes the pod name"""
+    best = None
+    for name in workloads:
+        if (pod == name or pod.startswith(name + "-")) and (not best or len(name) > len(best)):
+            best = name
+    return best
+
+
+def round_up(value, step):
+    return int(math.ceil(value / step) * step)
+
+
+def hpa_targets(workload):
+    """{'cpu': 80, 'memory': 80} averageUtilization targets of the workload's HPA"""
+    targets = {}
+    for metric in workload.get("hpa", {}).get("metrics", []):
+        if metric.get("type") == "Resource":
+            target = metric["resource"]["target"].get("averageUtilization")
+            if target:
+                targets[metric["resource"]["name"]] = target
+    return targets
+
+
+def request_for(p95, step, minimum, target=None):
+    """p95 plus headroom; under an HPA, keep p95 at 90% of its utilization target"""
+    request = p95 * HEADROOM
+    if target:
+        request = max(request, p95 / (target / 100 * 0.9))
+    return max(minimum, round_up(request, step))
+
+
+def recommend_container(usage, resources, targets=None, span=None, min_span=None):
+    """Usage stats, current and proposed resources, and the changes worth making
+
+    span is how many seconds the samples cover; under min_span the peak has
+    not seen a full cycle, so limits may be raised but not lowered.
+    """
+    cpu, memory = usage
+    stats = {
+        "cpu_m": {"p50": percentile(cpu, 50), "p95": percentile(cpu, 95), "peak": max(cpu)},
+        "memory_mi": {
+            "p50": percentile(memory, 50),
+            "p95": percentile(memory, 95),
+            "peak": max(memory),
+        },
+    }
+    requests = resources.get("requests", {})
+    limits = resources.get("limits", {})
+    current = {
+        "cpu_request": parse_cpu(requests["cpu"]) * 1000 if "cpu" in requests else None,
+        "cpu_limit": parse_cpu(limits["cpu"]) * 1000 if "cpu" in limits else None,
+        "memory_request": parse_memory(requests["memory"]) / 2**20 if "memory" in requests else None,
+        "memory_limit": parse_memory(limits["memory"]) / 2**20 if "memory" in limits else None,
+    }
+    proposed = dict(current)
+    targets = targets or {}
+    proposed["cpu_request"] = request_for(stats["cpu_m"]["p95"], 10, 10, targets.get("cpu"))
+    proposed["memory_request"] = request_for(
+        stats["memory_mi"]["p95"], 16, 16, targets.get("memory")
+    )
+    if current["cpu_limit"] is not None:
+        if stats["cpu_m"]["peak"] >= current["cpu_limit"] * 0.9:
+            proposed["cpu_limit"] = round_up(stats["cpu_m"]["peak"] * LIMIT_HEADROOM, 50)
+        proposed["cpu_limit"] = max(proposed["cpu_limit"], proposed["cpu_request"])
+    proposed["memory_limit"] = max(
+        round_up(stats["memory_mi"]["peak"] * LIMIT_HEADROOM, 32), proposed["memory_request"]
+    )
+    short = span is not None and min_span and span < min_span
+    for limit, request in (("cpu_limit", "cpu_request"), ("memory_limit", "memory_request")):
+        if current[limit] is None or proposed[limit] is None:
+            continue
+        floor = current[limit] if short else current[request] or 0
+        proposed[limit] = max(proposed[limit], min(floor, current[limit]))
+
+    changes = {}
+    for key, value in proposed.items():
+        old = current[key]
+        if value is None:
+            continue
+        if not old:
+            # Absent or zero (e.g. "0m"): any real value is a change, no ratio to take
+            if value != old:
+                changes[key] = value
+        elif abs(value - old) / old > MIN_CHANGE:
+            changes[key] = value
+    warnings = []
+    if current["memory_limit"] and stats["memory_mi"]["peak"] >= current["memory_limit"] * 0.9:
+        warnings.append(
+            f"memory peak {stats['memory_mi']['peak']}Mi is within 10% of the "
+            f"{current['memory_limit']:g}Mi limit (OOMKill risk)"
+        )
+    if current["cpu_limit"] and stats["cpu_m"]["peak"] >= current["cpu_limit"] * 0.9:
+        warnings.append(f"CPU peak {stats['cpu_m']['peak']}m hits the limit (throttling)")
+    if short:
+        warnings.append(
+            f"only {span / 3600:.1f}h of samples (< {min_span / 3600:g}h): limits are kept, "
+            "sample longer before lowering them"
+        )
+    # What the manifest should say: changed values, otherwise what it has now
+    patched = {
+        key: changes.get(key, current[key] if current[key] is not None else proposed[key])
+        for key in proposed
+    }
+    return {
+        "stats": stats,
+        "current": current,
+        "proposed": proposed,
+        "changes": changes,
+        "patched": patched,
+        "warnings": warnings,
+    }
+
+
+def quantity(value, unit):
+    return f"{value:g}{unit}" if value is not None else "-"
+
+
+def patch_yaml(workload_name, workload, containers):
+    """Strategic-merge patch text for the workload's changed containers"""
+    lines = [
+        f"# {workload['file']} ({workload['kind']}/{workload_name})",
+        "spec:",
+        "  template:",
+        "    spec:",
+        "      containers:",
+    ]
+    for name, rec in containers.items():
+        patched = rec["patched"]
+        requests = {
+            "cpu": quantity(patched["cpu_request"], "m"),
+            "memory": quantity(patched["memory_request"], "Mi"),
+        }
+        limits = {}
+        if patched["cpu_limit"] is not None:
+            limits["cpu"] = quantity(patched["cpu_limit"], "m")
+        limits["memory"] = quantity(patched["memory_limit"], "Mi")
+        lines += [
+            f"        - name: {name}",
+            "          resources:",
+            "            requests:",
+            *(f'              {k}: "{v}"' for k, v in requests.items()),
+            "            limits:",
+            *(f'              {k}: "{v}"' for k, v in limits.items()),
+        ]
+    return "\n".join(lines)
+
+
+def hpa_note(workload, rec):
+    """New utilization at p95 vs. the HPA targets"""
+    notes = []
+    for name, target in hpa_targets(workload).items():
+        key, stat = ("cpu_request", "cpu_m") if name == "cpu" else ("memory_request", "memory_mi")
+        old, new = rec["current"][key], rec["proposed"][key]
+        p95 = rec["stats"][stat]["p95"]
+        if old and new:
+            notes.append(
+                f"{name} p95 utilization {p95 / old * 100:.0f}% → {p95 / new * 100:.0f}% "
+                f"(HPA target {target}%)"
+            )
+    return notes
+
+
+def recommend(args):
+    if not os.path.exists(args.history):
+        print(f"❌ No usage history at {args.history}; run `sample` first or pass --history")
+        sys.exit(1)
+    series, first, last = load_history(args.history)
+    workloads = declared_workloads()
+    span = (last - first) / 3600 if first is not None else 0
+    print(f"📊 Usage history: {len(series)} containers over {span:.1f}h ({args.history})")
+
+    grouped = {}
+    unmatched = set()
+    for key, (cpu, memory, (first_seen, last_seen)) in series.items():
+        pod, _, container = key.partition("/")
+        owner = owning_workload(pod, workloads)
+        if not owner or container not in workloads[owner]["containers"]:
+            unmatched.add(pod)
+            continue
+        values = grouped.setdefault((owner, container), ([], [], [first_seen, last_seen]))
+        values[0].extend(cpu)
+        values[1].extend(memory)
+        values[2][0] = min(values[2][0], first_seen)
+        values[2][1] = max(values[2][1], last_seen)
+
+    plan = []
+    freed_cpu = freed_memory = 0.0
+    min_span = parse_duration(args.min_span)
+    for (owner, container), (cpu, memory, (first_seen, last_seen)) in sorted(grouped.items()):
+        workload = workloads[owner]
+        usage = (cpu, memory)
+        rec = recommend_container(
+            usage,
+            workload["containers"][container],
+            hpa_targets(workload),
+            span=last_seen - first_seen,
+            min_span=min_span,
+        )
+        rec.update(workload=owner, container=container, samples=len(usage[0]))
+        # Usage was sampled, so at least one replica runs whatever git says
+        replicas = rec["replicas"] = max(1, workload["replicas"])
+        cur, new = rec["current"], rec["proposed"]
+        rec["freed_cpu_m"] = rec["freed_memory_mi"] = 0
+        if "cpu_request" in rec["changes"]:
+            rec["freed_cpu_m"] = ((cur["cpu_request"] or 0) - new["cpu_request"]) * replicas
+        if "memory_request" in rec["changes"]:
+            rec["freed_memory_mi"] = ((cur["memory_request"] or 0) - new["memory_request"]) * replicas
+        freed_cpu += rec["freed_cpu_m"]
+        freed_memory += rec["freed_memory_mi"]
+        plan.append(rec)
+
+    header = (
+        f"{'Workload/container':<34} {'CPU p50/p95/peak':>18} {'req':>7} "
+        f"{'Mem p50/p95/peak':>20} {'req':>8} {'limit':>8}"
+    )
+    print(f"\n{header}\n{'-' * len(header)}")
+    for rec in plan:
+        cpu, mem, cur = rec["stats"]["cpu_m"], rec["stats"]["memory_mi"], rec["current"]
+        label = f"{rec['workload']}/{rec['container']}"
+        cpu_stats = f"{cpu['p50']}/{cpu['p95']}/{cpu['peak']}m"
+        mem_stats = f"{mem['p50']}/{mem['p95']}/{mem['peak']}Mi"
+        print(
+            f"{label[:34]:<34} {cpu_stats:>18} {quantity(cur['cpu_request'], 'm'):>7} "
+            f"{mem_stats:>20} {quantity(cur['memory_request'], 'Mi'):>8} "
+            f"{quantity(cur['memory_limit'], 'Mi'):>8}"
+        )
+
+    print("\n🩹 Suggested patches")
+    by_workload = {}
+    for rec in plan:
+        if rec["changes"] or rec["warnings"]:
+            by_workload.setdefault(rec["workload"], {})[rec["container"]] = rec
+    if not by_workload:
+        print("   ✅ Requests and limits already match usage (within 10%)")
+    for owner, containers in by_workload.items():
+        print()
+        for rec in containers.values():
+            if rec["samples"] < MIN_SAMPLES:
+                print(f"   ⚠️  only {rec['samples']} samples for {owner}/{rec['container']}; sample longer")
+            for warning in rec["warnings"]:
+                print(f"   ⚠️  {owner}/{rec['container']}: {warning}")
+            for note in hpa_note(workloads[owner], rec):
+                print(f"   📈 {owner}/{rec['container']}: {note}")
+            if rec["freed_cpu_m"] or rec["freed_memory_mi"]:
+                print(
+                    f"   💰 frees {rec['freed_cpu_m']:+g}m CPU, {rec['freed_memory_mi']:+g}Mi memory "
+                    f"across {rec['replicas']} replica(s)"
+                )
+        if any(rec["changes"] for rec in containers.values()):
+            changed = {c: r for c, r in containers.items() if r["changes"]}
+            print(patch_yaml(owner, workloads[owner], changed))
+
+    print(
+        f"\n💰 Total headroom freed: {freed_cpu:+g}m CPU, {freed_memory:+g}Mi memory "
+        "(negative = more needed)"
+    )
+    if unmatched:
+        print(f"ℹ️  No manifest found for: {', '.join(sorted(unmatched))}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(plan, f, indent=2)
+        print(f"\n💾 Plan written to {args.json}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Right-size requests and limits from usage")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--history", default=HISTORY_PATH, help="Usage history file")
+    sub = parser.add_subparsers(dest="action", required=True)
+    p = sub.add_parser("sample", parents=[common], help="Record usage from the metrics API")
+    p.add_argument("--namespace", default=NAMESPACE)
+    p.add_argument("--duration", default="24h", help="e.g. 30m, 24h, 7d")
+    p.add_argument("--interval", type=float, default=60, help="Seconds between samples")
+    p = sub.add_parser("recommend", parents=[common], help="Compare usage with declared resources")
+    p.add_argument("--json", help="Write the plan as JSON")
+    p.add_argument(
+        "--min-span", default=MIN_SPAN, help="History needed before limits are lowered (e.g. 24h, 7d)"
+    )
+    args = parser.parse_args()
+
+    if args.action == "sample":
+        sample(args)
+    else:
+        recommend(args)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n❌ Cancelled by user")
+        sys.exit(1)
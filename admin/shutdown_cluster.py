@@ -91,7 +91,7 @@ def main():
     print("\n📋 Draining all nodes...")
     
     # Drain all worker nodes first
-    for hostname, ip in HOSTS[:-1]:  # All except adama
+    for hostname, ip in HOSTS[:-1]:  # All except the control plane
         drain_node(hostname)
     
     # Drain control plane last
@@ -108,7 +108,8 @@ def main():
         time.sleep(2)
     
     print("\n🎉 All nodes are shutting down!")
-    print("💡 To restart: Power on all nodes, starting with adama (control plane)")
+    print(f"💡 To restart: Power on all nodes, starting with {HOSTS[-1][0]} (control plane),")
+    print("   then run ./admin/cluster_manager.py startup")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Longhorn Storage Benchmark
+Short, bounded random-read, random-write and fsync tests against each
+Longhorn volume, in parallel
+
+For every Longhorn PVC in the namespace a throwaway pod (python:3.11-alpine)
+mounts the claim on the node the volume is already attached to (RWO allows
+several pods on one node) and runs ENGINE_SCRIPT inside a scratch directory
+that is removed afterwards. With --storageclass a temporary PVC is created per
+node instead, so the class itself is measured; pods and temporary PVCs are
+always deleted. Results are shown next to each volume's replica nodes and the
+settings in components/longhorn/storageclass.yaml. I/O uses O_DIRECT so the
+page cache does not stand in for the volume.
+
+Usage:
+    ./admin/storage_bench.py                          # every Longhorn PVC in glasgow-prod
+    ./admin/storage_bench.py --pvc postgres-pvc --duration 10
+    ./admin/storage_bench.py --storageclass longhorn  # fresh volume on each node
+    ./admin/storage_bench.py --local /tmp/a --local /tmp/b   # directory stand-ins
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import yaml
+except ImportError:
+    print("❌ PyYAML is required: pip install pyyaml")
+    sys.exit(1)
+
+NAMESPACE = "glasgow-prod"
+LONGHORN_NAMESPACE = "longhorn-system"
+BENCH_IMAGE = "python:3.11-alpine"
+STORAGECLASS_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "components",
+    "longhorn",
+    "storageclass.yaml",
+)
+
+# Runs inside the bench pod (or locally): argv = dir file_mb block_kb seconds fsyncs
+ENGINE_SCRIPT = """
+import json, mmap, os, random, shutil, sys, tempfile, time
+root, file_mb, block_kb, seconds, fsyncs = sys.argv[1:6]
+size, block = int(file_mb) << 20, int(block_kb) << 10
+seconds, fsyncs = float(seconds), int(fsyncs)
+blocks = size // block
+scratch = tempfile.mkdtemp(prefix=".storage-bench-", dir=root)
+results = {}
+
+def timed(name, op, limit):
+    latencies = []
+    start = time.perf_counter()
+    while len(latencies) < limit and time.perf_counter() - start < seconds:
+        t = time.perf_counter()
+        op()
+        latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+    if not latencies:
+        results[name] = {}  # not one op finished within the time budget
+        return
+    latencies.sort()
+    results[name] = {
+        "ops": len(latencies),
+        "iops": round(len(latencies) / elapsed, 1),
+        "mb_s": round(len(latencies) * block / elapsed / 2**20, 2),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 3),
+    }
+
+try:
+    path = os.path.join(scratch, "data")
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    payload = os.urandom(block)
+    for i in range(blocks):
+        os.pwrite(fd, payload, i * block)
+    os.fsync(fd)
+    os.close(fd)
+
+    # O_DIRECT bypasses the page cache, so reads and writes hit the volume.
+    # It needs page-aligned buffers (anonymous mmap) and is refused by some
+    # filesystems (tmpfs, overlay); then writes fall back to O_DSYNC and each
+    # read first evicts its block with fadvise, reported as mode "dsync".
+    buffer = mmap.mmap(-1, block)
+    buffer.write(payload)
+    try:
+        fd = os.open(path, os.O_RDWR | os.O_DIRECT)
+        os.preadv(fd, [buffer], 0)
+        results["mode"] = "direct"
+    except (AttributeError, OSError):
+        fd = os.open(path, os.O_RDWR | os.O_DSYNC)
+        results["mode"] = "dsync"
+    evict = results["mode"] == "dsync" and getattr(os, "posix_fadvise", None)
+
+    def read():
+        offset = random.randrange(blocks) * block
+        if evict:
+            os.posix_fadvise(fd, offset, block, os.POSIX_FADV_DONTNEED)
+        os.preadv(fd, [buffer], offset)
+
+    timed("rand_read", read, 10**9)
+    timed("rand_write", lambda: os.pwritev(fd, [buffer], random.randrange(blocks) * block), 10**9)
+
+    def write_fsync():
+        os.pwritev(fd, [buffer], random.randrange(blocks) * block)
+        os.fdatasync(fd)
+
+    timed("fsync", write_fsync, fsyncs)
+    os.close(fd)
+finally:
+    shutil.rmtree(scratch, ignore_errors=True)
+print(json.dumps(results))
+"""
+
+
+def kubectl(*args, input_data=None, timeout=30):
+    """Run kubectl and return stdout, or None on failure"""
+    try:
+        result = subprocess.run(
+            ["kubectl", *args],
+            input=input_data,
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def kubectl_json(*args):
+    output = kubectl(*args, "-o", "json")
+    return json.loads(output) if output else {"items": []}
+
+
+def storageclass_settings(path=STORAGECLASS_FILE):
+    with open(path) as f:
+        sc = yaml.safe_load(f)
+    settings = dict(sc.get("parameters", {}))
+    for key in ("reclaimPolicy", "volumeBindingMode", "allowVolumeExpansion"):
+        if key in sc:
+            settings[key] = sc[key]
+    return sc["metadata"]["name"], settings
+
+
+def longhorn_volumes():
+    """Longhorn volume name -> {attached node, replica nodes}"""
+    volumes = {}
+    for volume in kubectl_json("get", "volumes.longhorn.io", "-n", LONGHORN_NAMESPACE)["items"]:
+        volumes[volume["metadata"]["name"]] = {
+            "node": volume.get("status", {}).get("currentNodeID") or None,
+            "replicas": [],
+        }
+    for replica in kubectl_json("get", "replicas.longhorn.io", "-n", LONGHORN_NAMESPACE)["items"]:
+        spec = replica.get("spec", {})
+        volume = volumes.setdefault(spec.get("volumeName"), {"node": None, "replicas": []})
+        if spec.get("nodeID"):
+            volume["replicas"].append(spec["nodeID"])
+    return volumes
+
+
+def pvc_targets(namespace, storageclass, only):
+    """Bound PVCs of the given StorageClass, as benchmark targets"""
+    volumes = longhorn_volumes()
+    targets = []
+    for pvc in kubectl_json("get", "pvc", "-n", namespace)["items"]:
+        name = pvc["metadata"]["name"]
+        if only and name not in only:
+            continue
+        if pvc["spec"].get("storageClassName") != storageclass:
+            continue
+        if pvc.get("status", {}).get("phase") != "Bound":
+            print(f"   ⚠️  {name}: not Bound, skipped")
+            continue
+        volume = volumes.get(pvc["spec"].get("volumeName"), {})
+        targets.append(
+            {
+                "name": name,
+                "pvc": name,
+                "node": volume.get("node"),
+                "replicas": volume.get("replicas", []),
+                "temporary": False,
+            }
+        )
+    return targets
+
+
+def storageclass_targets(storageclass, size):
+    """One temporary PVC per schedulable node"""
+    targets = []
+    for node in kubectl_json("get", "nodes")["items"]:
+        if node["spec"].get("unschedulable"):
+            continue
+        name = node["metadata"]["name"]
+        targets.append(
+            {
+                "name": f"{storageclass}@{name}",
+                "pvc": f"storage-bench-{name}-{uuid.uuid4().hex[:6]}",
+                "node": name,
+                "replicas": [],
+                "temporary": True,
+                "size": size,
+                "storageclass": storageclass,
+            }
+        )
+    return targets
+
+
+def bench_pod(target, pod_name, args):
+    spec = {
+        "restartPolicy": "Never",
+        "tolerations": [{"operator": "Exists"}],
+        "containers": [
+            {
+                "name": "bench",
+                "image": BENCH_IMAGE,
+                "command": ["python3", "-c", ENGINE_SCRIPT, "/data"]
+                + [str(v) for v in (args.file_mb, args.block_kb, args.duration, args.fsyncs)],
+                "volumeMounts": [{"name": "data", "mountPath": "/data"}],
+            }
+        ],
+        "volumes": [
+            {"name": "data", "persistentVolumeClaim": {"claimName": target["pvc"]}}
+        ],
+    }
+    if target["node"]:
+        spec["nodeName"] = target["node"]
+    return {
+        "apiVersion": "v1",
+        "kind": "Pod",
+        "metadata": {"name": pod_name, "labels": {"app": "storage-bench"}},
+        "spec": spec,
+    }
+
+
+def run_in_cluster(target, args):
+    """Run the engine in a pod mounting the target PVC; always clean up"""
+    pod_name = f"storage-bench-{uuid.uuid4().hex[:8]}"
+    ns = args.namespace
+    try:
+        if target["temporary"]:
+            pvc = {
+                "apiVersion": "v1",
+                "kind": "PersistentVolumeClaim",
+                "metadata": {"name": target["pvc"], "labels": {"app": "storage-bench"}},
+                "spec": {
+                    "accessModes": ["ReadWriteOnce"],
+                    "storageClassName": target["storageclass"],
+                    "resources": {"requests": {"storage": target["size"]}},
+                },
+            }
+            if kubectl("apply", "-n", ns, "-f", "-", input_data=json.dumps(pvc)) is None:
+                return {"error": "could not create temporary PVC"}
+        manifest = json.dumps(bench_pod(target, pod_name, args))
+        if kubectl("apply", "-n", ns, "-f", "-", input_data=manifest) is None:
+            return {"error": "could not create bench pod"}
+
+        deadline = time.time() + args.timeout
+        phase = None
+        while time.time() < deadline:
+            phase = (kubectl("get", "pod", pod_name, "-n", ns, "-o", "jsonpath={.status.phase}") or "").strip()
+            if phase in ("Succeeded", "Failed"):
+                break
+            time.sleep(2)
+        logs = kubectl("logs", pod_name, "-n", ns) or ""
+        if phase != "Succeeded":
+            return {"error": f"pod {phase or 'unknown'}: {logs.strip()[-200:]}"}
+        if target["temporary"]:
+            volume = kubectl("get", "pvc", target["pvc"], "-n", ns, "-o", "jsonpath={.spec.volumeName}")
+            target["replicas"] = longhorn_volumes().get((volume or "").strip(), {}).get("replicas", [])
+        return json.loads(logs.strip().splitlines()[-1])
+    except (ValueError, IndexError) as e:
+        return {"error": f"bad engine output: {e}"}
+    finally:
+        kubectl("delete", "pod", pod_name, "-n", ns, "--ignore-not-found", "--wait=false")
+        if target["temporary"]:
+            kubectl("delete", "pvc", target["pvc"], "-n", ns, "--ignore-not-found", "--wait=false")
+
+
+def run_local(target, args):
+    """Run the engine against a local directory (stand-in for a volume)"""
+    try:
+        output = subprocess.check_output(
+            [sys.executable, "-c", ENGINE_SCRIPT, target["pvc"]]
+            + [str(v) for v in (args.file_mb, args.block_kb, args.duration, args.fsyncs)],
+            stderr=subprocess.PIPE,
+            timeout=args.timeout,
+        )
+        return json.loads(output.decode().splitlines()[-1])
+    except subprocess.CalledProcessError as e:
+        return {"error": e.stderr.decode().strip()[-200:]}
+    except (OSError, ValueError, subprocess.TimeoutExpired) as e:
+        return {"error": str(e)}
+
+
+def print_results(results, sc_name, settings):
+    print(f"\n💾 StorageClass {sc_name}: " + ", ".join(f"{k}={v}" for k, v in settings.items()))
+    if str(settings.get("numberOfReplicas")) == "1":
+        print("   ⚠️  numberOfReplicas=1: every volume lives on a single node's disk")
+    header = f"{'Volume':<28} {'test':<11} {'IOPS':>9} {'MB/s':>8} {'p50 ms':>8} {'p99 ms':>8}"
+    print(f"\n{header}")
+    print("-" * len(header))
+    for target, result in results:
+        replicas = ", ".join(target["replicas"]) or "unknown"
+        if "error" in result:
+            print(f"{target['name']:<28} ❌ {result['error']}")
+            continue
+        for i, test in enumerate(("rand_read", "rand_write", "fsync")):
+            if test not in result:
+                continue
+            r = result[test]
+            label = target["name"] if i == 0 else ""
+            if i == 1 and result.get("mode") == "dsync":
+                label = "  (no O_DIRECT: O_DSYNC)"
+            if not r:
+                print(f"{label:<28} {test:<11} ⏱️  no operation finished within --duration")
+                continue
+            print(
+                f"{label:<28} {test:<11} {r['iops']:>9} {r['mb_s']:>8} "
+                f"{r['p50_ms']:>8} {r['p99_ms']:>8}"
+            )
+        where = f"attached to {target['node']}, " if target["node"] else ""
+        print(f"{'':<28} ↳ {where}replicas on {replicas}")
+
+    finished = [(t, r) for t, r in results if r.get("fsync")]
+    if len(finished) > 1:
+        slowest = max(finished, key=lambda tr: tr[1]["fsync"]["p99_ms"])
+        print(f"\n🐢 Slowest fsync p99: {slowest[0]['name']} ({slowest[1]['fsync']['p99_ms']}ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Longhorn volumes")
+    parser.add_argument("--namespace", default=NAMESPACE)
+    parser.add_argument("--pvc", action="append", help="Only these PVCs (repeatable)")
+    parser.add_argument("--storageclass", help="Benchmark a temporary volume per node instead")
+    parser.add_argument("--size", default="1Gi", help="Temporary PVC size")
+    parser.add_argument("--local", action="append", help="Benchmark a local directory")
+    parser.add_argument("--file-mb", type=int, default=64, help="Test file size")
+    parser.add_argument("--block-kb", type=int, default=4, help="I/O size")
+    parser.add_argument("--duration", type=float, default=5, help="Seconds per test")
+    parser.add_argument("--fsyncs", type=int, default=200, help="Max fsync ops")
+    parser.add_argument("--timeout", type=float, default=300, help="Per volume")
+    parser.add_argument("--json", help="Write results as JSON")
+    args = parser.parse_args()
+
+    sc_name, settings = storageclass_settings()
+    if args.local:
+        targets = [
+            {"name": path, "pvc": path, "node": None, "replicas": ["local"], "temporary": False}
+            for path in args.local
+        ]
+        runner = run_local
+    elif args.storageclass:
+        targets = storageclass_targets(args.storageclass, args.size)
+        runner = run_in_cluster
+    else:
+        targets = pvc_targets(args.namespace, sc_name, args.pvc)
+        runner = run_in_cluster
+    if not targets:
+        print("❌ Nothing to benchmark")
+        sys.exit(1)
+
+    print(f"⏱️  Benchmarking {len(targets)} volume(s) in parallel (~{args.duration * 3:g}s each)...")
+    with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+        results = list(zip(targets, pool.map(lambda t: runner(t, args), targets)))
+    print_results(results, sc_name, settings)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                [dict(target, result=result) for target, result in results], f, indent=2
+            )
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n❌ Cancelled by user")
+        sys.exit(1)
@@ -0,0 +1,64 @@
+"""Tests for drift_check's ignoreDifferences matching"""
+
+import copy
+
+import drift_check
+
+
+def longhorn_crd(printer_column, storage):
+    return {
+        "apiVersion": "apiextensions.k8s.io/v1",
+        "kind": "CustomResourceDefinition",
+        "metadata": {"name": "volumes.longhorn.io"},
+        "spec": {
+            "group": "longhorn.io",
+            "versions": [
+                {
+                    "name": name,
+                    "served": True,
+                    "storage": storage == name,
+                    "subresources": {"status": {}} if storage == name else {},
+                    "additionalPrinterColumns": [{"name": printer_column, "type": "string"}],
+                }
+                for name in ("v1beta1", "v1beta2")
+            ],
+        },
+    }
+
+
+def test_longhorn_rules_ignore_crd_version_fields():
+    rules = drift_check.load_apps()["longhorn"]["ignore"]
+    desired = longhorn_crd("State", "v1beta2")
+    live = copy.deepcopy(desired)
+    for version in live["spec"]["versions"]:
+        version["subresources"] = {"scale": {"specReplicasPath": ".spec.replicas"}}
+        version["additionalPrinterColumns"] = [{"name": "Robustness", "type": "integer"}]
+
+    ignored = drift_check.ignored_pointers(desired, rules, "longhorn-system")
+    changes = []
+    drift_check.diff(desired, live, "", ignored, changes)
+    assert changes == []
+
+    # Fields the rules do not name are still compared
+    live["spec"]["versions"][0]["served"] = False
+    changes = []
+    drift_check.diff(desired, live, "", ignored, changes)
+    assert [path for path, _, _ in changes] == ["/spec/versions[v1beta1]/served"]
+
+
+def test_rules_match_group_and_namespace():
+    rules = [
+        {"group": "apps", "kind": "Deployment", "namespace": "kube-system", "jsonPointers": ["/spec/replicas"]},
+    ]
+    deployment = {"apiVersion": "apps/v1", "kind": "Deployment", "metadata": {"name": "sealed-secrets"}}
+    assert drift_check.ignored_pointers(deployment, rules, "kube-system") == {("spec", "replicas")}
+    assert drift_check.ignored_pointers(deployment, rules, "glasgow-prod") == set()
+    other_group = dict(deployment, apiVersion="extensions/v1beta1")
+    assert drift_check.ignored_pointers(other_group, rules, "kube-system") == set()
+
+
+def test_pointer_matches_list_item_by_index_or_name():
+    segments = ("spec", "versions", (1, "v1beta2"), "subresources")
+    for pointer in ("/spec/versions/*/subresources", "/spec/versions/1/subresources", "/spec/versions/v1beta2/subresources"):
+        assert drift_check.pointer_matches(drift_check.parse_pointer(pointer), segments)
+    assert not drift_check.pointer_matches(drift_check.parse_pointer("/spec/versions/0/subresources"), segments)
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Thermal Throttling Detector
+Streams CPU temperature and frequency from every node at sub-second rate
+
+quick_check/choose_master read thermal_zone0 once, which misses the short
+excursions that make the mini-PCs throttle. Here each node gets one long-lived
+SSH session running a small sampler that prints, every --interval seconds,
+the hottest thermal zone, the average and lowest current CPU frequency and
+the kernel's thermal throttle counters (Intel package/core_throttle_count).
+All nodes are sampled concurrently.
+
+A throttling episode is a run of samples where the average frequency is
+below --drop of the maximum while the CPU is hot (within --margin of the
+passive trip point, or above --hot), or where the throttle counters move.
+Low clocks on a cool CPU are just the governor idling and are ignored.
+Episodes are printed as they end and appended, with wall-clock node
+timestamps, to ~/.cache/glasgow-admin/thermal-episodes.jsonl so slow
+requests can be matched against them.
+
+Usage:
+    ./admin/thermal_watch.py                          # all nodes until Ctrl-C
+    ./admin/thermal_watch.py --interval 0.2 --duration 600 --samples raw.csv
+    ./admin/thermal_watch.py --hosts boomer=192.168.1.21 --hot 75
+    ./admin/thermal_watch.py --hosts local=127.0.0.1 --sysfs /tmp/fake-sys   # testing
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+import common
+
+EPISODES_PATH = os.path.expanduser("~/.cache/glasgow-admin/thermal-episodes.jsonl")
+
+# Runs on the node: a "# max_mhz passive_trip zones cpus" header, then one
+# "time temp avg_mhz min_mhz throttle_count" line per sample
+SAMPLER_SCRIPT = r"""
+import glob, os, sys, time
+interval, root = float(sys.argv[1]), sys.argv[2]
+
+def read(path, default=None):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return default
+
+zones = [z for z in sorted(glob.glob(root + "/class/thermal/thermal_zone*")) if read(z + "/temp")]
+cpus = sorted(glob.glob(root + "/devices/system/cpu/cpu[0-9]*/cpufreq"))
+counters = glob.glob(root + "/devices/system/cpu/cpu*/thermal_throttle/*_throttle_count")
+max_mhz = max([int(read(c + "/cpuinfo_max_freq", 0)) for c in cpus] or [0]) / 1000
+trips = []
+for zone in zones:
+    for trip in glob.glob(zone + "/trip_point_*_type"):
+        if read(trip) == "passive":
+            trips.append(int(read(trip[:-4] + "temp", 0)) / 1000)
+print("#", max_mhz, min(trips) if trips else 0, len(zones), len(cpus), flush=True)
+next_at = time.time()
+while True:
+    temps = [int(read(z + "/temp", 0)) / 1000 for z in zones]
+    freqs = [int(read(c + "/scaling_cur_freq", 0)) / 1000 for c in cpus]
+    throttles = sum(int(read(c, 0)) for c in counters)
+    print(round(time.time(), 3), max(temps or [0]), round(sum(freqs) / len(freqs)) if freqs else 0,
+          round(min(freqs)) if freqs else 0, throttles, flush=True)
+    next_at += interval
+    time.sleep(max(0, next_at - time.time()))
+"""
+
+
+def stamp(t):
+    return datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+
+class Detector:
+    """Groups hot, down-clocked samples of one node into episodes"""
+
+    def __init__(self, node, args, on_episode):
+        self.node = node
+        self.drop = args.drop
+        self.hot = args.hot
+        self.margin = args.margin
+        self.gap = max(1.0, args.interval * 4)
+        self.on_episode = on_episode
+        self.max_mhz = 0
+        self.trip = 0
+        self.episode = None
+        self.last_throttles = None
+        self.stats = {"samples": 0, "max_temp": 0, "min_mhz": None, "episodes": 0, "throttled_s": 0.0}
+        self.latest = None
+
+    def header(self, max_mhz, trip):
+        self.max_mhz = max_mhz
+        self.trip = trip
+
+    def threshold(self):
+        return min(self.hot, self.trip - self.margin) if self.trip else self.hot
+
+    def sample(self, t, temp, avg_mhz, min_mhz, throttles):
+        self.latest = (t, temp, avg_mhz)
+        s = self.stats
+        s["samples"] += 1
+        s["max_temp"] = max(s["max_temp"], temp)
+        s["min_mhz"] = min_mhz if s["min_mhz"] is None else min(s["min_mhz"], min_mhz)
+        # Fall back to the highest clock seen when cpufreq has no cpuinfo_max_freq
+        self.max_mhz = max(self.max_mhz, avg_mhz)
+        events = throttles - self.last_throttles if self.last_throttles is not None else 0
+        self.last_throttles = throttles
+        slow = self.max_mhz and avg_mhz < self.max_mhz * self.drop
+        throttled = events > 0 or (slow and temp >= self.threshold())
+
+        if throttled:
+            if self.episode is None:
+                self.episode = {
+                    "node": self.node, "start": t, "end": t, "peak_temp": temp,
+                    "min_mhz": avg_mhz, "max_mhz": self.max_mhz, "throttle_events": 0, "samples": 0,
+                }
+            e = self.episode
+            e["end"] = t
+            e["peak_temp"] = max(e["peak_temp"], temp)
+            e["min_mhz"] = min(e["min_mhz"], avg_mhz)
+            e["throttle_events"] += events
+            e["samples"] += 1
+        elif self.episode and t - self.episode["end"] > self.gap:
+            self.close()
+
+    def close(self):
+        if not self.episode:
+            return
+        e = self.episode
+        self.episode = None
+        e["duration_s"] = round(e["end"] - e["start"], 3)
+        e["freq_drop_pct"] = round((1 - e["min_mhz"] / e["max_mhz"]) * 100, 1) if e["max_mhz"] else None
+        self.stats["episodes"] += 1
+        self.stats["throttled_s"] += e["duration_s"]
+        self.on_episode(e)
+
+
+def kill_session(process):
+    """Kill the sampler session with everything it started (a local `sh -c` forks)"""
+    if process.poll() is None:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+def follow(node, ip, args, detector, raw, stop, processes):
+    """One SSH session per node, parsing sampler lines until stop
+
+    The session is added to processes so main can kill it on stop rather
+    than wait for the next line (or for ssh to exit) here.
+    """
+    command = f"python3 -u - {args.interval} {args.sysfs}"
+    process = subprocess.Popen(
+        common.ssh_argv(ip, command),
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        start_new_session=True,
+    )
+    processes.append(process)
+    try:
+        if stop.is_set():
+            return
+        process.stdin.write(SAMPLER_SCRIPT)
+        process.stdin.close()
+        for line in process.stdout:
+            if stop.is_set():
+                break
+            fields = line.split()
+            if not fields:
+                continue
+            if fields[0] == "#":
+                max_mhz, trip, zones, cpus = float(fields[1]), float(fields[2]), fields[3], fields[4]
+                detector.header(max_mhz, trip)
+                print(f"   {node}: {zones} thermal zones, {cpus} CPUs, max {max_mhz:.0f} MHz"
+                      + (f", passive trip {trip:.0f}°C" if trip else ""))
+                continue
+            t, temp, avg_mhz, min_mhz, throttles = (float(f) for f in fields)
+            detector.sample(t, temp, avg_mhz, min_mhz, int(throttles))
+            if raw:
+                raw(f"{node},{t},{temp},{avg_mhz:.0f},{min_mhz:.0f},{int(throttles)}\n")
+    except BrokenPipeError:
+        pass  # ssh exited before taking the script; reported below
+    finally:
+        kill_session(process)
+        error = process.stderr.read().strip()
+        process.wait()
+        if not stop.is_set():
+            print(f"   ⚠️  {node}: sampler exited {error[-200:]}")
+        detector.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect CPU thermal throttling on every node")
+    parser.add_argument("--hosts", type=common.parse_hosts, help="name=ip,... (default: all workers)")
+    parser.add_argument("--interval", type=float, default=0.25, help="Seconds between samples")
+    parser.add_argument("--duration", type=float, help="Stop after this many seconds")
+    parser.add_argument("--drop", type=float, default=0.8, help="Throttled below this fraction of max clock")
+    parser.add_argument("--hot", type=float, default=85, help="°C considered hot without a passive trip point")
+    parser.add_argument("--margin", type=float, default=5, help="°C below the passive trip point counted as hot")
+    parser.add_argument("--status-every", type=float, default=10, help="Seconds between status lines")
+    parser.add_argument("--samples", help="Also write every sample to this CSV")
+    parser.add_argument("--episodes", default=EPISODES_PATH, help="Episode log (JSON lines)")
+    parser.add_argument("--sysfs", default="/sys", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    hosts = args.hosts or common.WORKERS
+    os.makedirs(os.path.dirname(args.episodes), exist_ok=True)
+    log = open(args.episodes, "a")
+    lock = threading.Lock()
+
+    def on_episode(e):
+        with lock:
+            log.write(json.dumps(e) + "\n")
+            log.flush()
+            print(
+                f"🔥 {e['node']} throttled {stamp(e['start'])} -> {stamp(e['end'])[11:]} "
+                f"({e['duration_s']}s): peak {e['peak_temp']:.0f}°C, clock down to {e['min_mhz']:.0f} MHz "
+                f"(-{e['freq_drop_pct']}%)"
+                + (f", {e['throttle_events']} throttle events" if e["throttle_events"] else "")
+            )
+
+    raw = None
+    raw_file = None
+    if args.samples:
+        raw_file = open(args.samples, "w")
+        raw_file.write("node,time,temp_c,avg_mhz,min_mhz,throttle_count\n")
+
+        def raw(line):
+            with lock:
+                raw_file.write(line)
+
+    stop = threading.Event()
+    processes = []
+    detectors = {name: Detector(name, args, on_episode) for name, _ in hosts}
+    threads = [
+        threading.Thread(
+            target=follow,
+            args=(name, ip, args, detectors[name], raw, stop, processes),
+            daemon=True,
+        )
+        for name, ip in hosts
+    ]
+    print(f"🌡️  Sampling {len(hosts)} node(s) every {args.interval}s (Ctrl-C to stop)")
+    for thread in threads:
+        thread.start()
+    start = time.time()
+    try:
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(min(args.status_every, args.duration or args.status_every))
+            if args.duration and time.time() - start >= args.duration:
+                break
+            status = []
+            for name, d in detectors.items():
+                if d.latest:
+                    status.append(f"{name} {d.latest[1]:.0f}°C {d.latest[2]:.0f}MHz")
+            print(f"   {time.strftime('%H:%M:%S')} " + " | ".join(status))
+    except KeyboardInterrupt:
+        pass
+    elapsed = time.time() - start
+    stop.set()
+    for process in processes:
+        kill_session(process)
+    for thread in threads:
+        thread.join(timeout=3)
+    for d in detectors.values():
+        d.close()
+    log.close()
+    if raw_file:
+        raw_file.close()
+
+    print(f"\n{'NODE':<12}{'samples':>9}{'rate/s':>8}{'max °C':>8}{'min MHz':>9}{'episodes':>10}{'throttled':>11}")
+    print("-" * 67)
+    for name, d in detectors.items():
+        s = d.stats
+        print(
+            f"{name:<12}{s['samples']:>9}{s['samples'] / elapsed:>8.1f}{s['max_temp']:>8.0f}"
+            f"{(s['min_mhz'] or 0):>9.0f}{s['episodes']:>10}{s['throttled_s']:>10.1f}s"
+        )
+    if any(d.stats["episodes"] for d in detectors.values()):
+        print(f"\n📝 Episodes logged to {args.episodes}")
+    else:
+        print("\n✅ No throttling detected")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n❌ Cancelled by user")
+        sys.exit(1)
@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""
+Traefik Access-Log Analyzer
+Per-route latency percentiles, status mix and request rate from Traefik
+access logs in one streaming pass
+
+Every line is folded into log-bucketed latency sketches (DDSketch style, 1%
+relative error by default), so memory stays constant however many lines go
+through and sketches from different files or processes merge exactly by
+adding bucket counts. Routes are keyed by host and a normalized path (query
+strings dropped, segments with 3+ digits, uuids or hashes replaced by ":id"); past
+--max-routes per host, new paths are counted under "/…other".
+
+Besides whole-run totals, each route keeps fifteen-second slots and the
+overall stream keeps ten-second slots, so request rate, percentiles and the
+status mix can be reported over sliding windows (1m, 5m, 15m by default)
+ending at the newest log timestamp. A window takes the whole slots that start
+inside it and is labelled with the seconds those slots actually cover. Both
+Traefik's JSON format (enabled by components/ingress/traefik-access-log.yaml)
+and the default common log format are understood; other lines are skipped.
+
+Several files are parsed in parallel processes (--jobs) and merged. With
+--follow the live Traefik logs are tailed and the window report is printed
+every --every seconds.
+
+Usage:
+    ./admin/traefik_logs.py access.log access.log.1.gz
+    ./admin/traefik_logs.py --jobs 4 logs/*.gz --top 30 --slow-ms 500
+    ./admin/traefik_logs.py --follow --every 30
+    kubectl logs -n kube-system deploy/traefik | ./admin/traefik_logs.py -
+"""
+
+import argparse
+import gzip
+import json
+import math
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+WINDOWS = (60, 300, 900)
+GLOBAL_SLOT = 10
+ROUTE_SLOT = 15
+STATUS_CLASSES = ("2xx", "3xx", "4xx", "5xx")
+OTHER_PATH = "/…other"
+
+# <ip> - <user> [<time>] "<method> <path> <proto>" <status> <size> "<ref>" "<ua>" <n> "<router>" "<url>" <ms>ms
+CLF = re.compile(
+    r'\S+ \S+ \S+ \[([^\]]+)\] "(\S+) (\S+)[^"]*" (\d{3}) \S+ "[^"]*" "[^"]*" \S+ "([^"]*)" "([^"]*)" (\d+)ms'
+)
+ID_SEGMENT = re.compile(
+    r"/(?:[^/]*\d{3,}[^/]*|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|[0-9a-fA-F]{16,}|[A-Za-z0-9_-]{24,})(?=/|$)"
+)
+
+
+class Sketch:
+    """Log-bucketed latency histogram with bounded relative error; mergeable"""
+
+    def __init__(self, accuracy=0.01):
+        self.accuracy = accuracy
+        self.log_gamma = math.log((1 + accuracy) / (1 - accuracy))
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        index = math.ceil(math.log(ms) / self.log_gamma) if ms > 0.001 else -1000
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def merge(self, other):
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                # Midpoint of the bucket keeps the estimate within `accuracy`
+                return min(2 * math.exp(index * self.log_gamma) / (1 + math.exp(self.log_gamma)), self.max)
+        return self.max
+
+
+class Stats:
+    """Latency sketch and status counts for one route or slot"""
+
+    def __init__(self, accuracy):
+        self.sketch = Sketch(accuracy)
+        self.status = [0, 0, 0, 0, 0]  # 2xx 3xx 4xx 5xx other
+
+    def add(self, status, ms):
+        self.sketch.add(ms)
+        self.status[status // 100 - 2 if 200 <= status < 600 else 4] += 1
+
+    def merge(self, other):
+        self.sketch.merge(other.sketch)
+        self.status = [a + b for a, b in zip(self.status, other.status)]
+
+
+class Series:
+    """Stats in fixed time slots keyed by slot start; old slots are dropped"""
+
+    def __init__(self, width, keep, accuracy):
+        self.width = width
+        self.keep = keep
+        self.accuracy = accuracy
+        self.slots = {}
+
+    def slot(self, t):
+        start = int(t // self.width) * self.width
+        stats = self.slots.get(start)
+        if stats is None:
+            stats = self.slots[start] = Stats(self.accuracy)
+            if len(self.slots) > self.keep:
+                self.prune(start)
+        return stats
+
+    def prune(self, newest):
+        for start in [s for s in self.slots if s <= newest - self.keep * self.width]:
+            del self.slots[start]
+
+    def merge(self, other):
+        for start, stats in other.slots.items():
+            self.slots.setdefault(start, Stats(self.accuracy)).merge(stats)
+        if self.slots:
+            self.prune(max(self.slots))
+
+    def oldest(self, end, seconds):
+        """Start of the first slot inside (end - seconds, end], or of the newest slot"""
+        return min(math.ceil((end - seconds) / self.width), int(end // self.width)) * self.width
+
+    def window(self, end, seconds):
+        """Merged stats of the whole slots starting inside (end - seconds, end]"""
+        oldest = self.oldest(end, seconds)
+        merged = Stats(self.accuracy)
+        for start, stats in self.slots.items():
+            if oldest <= start <= end:
+                merged.merge(stats)
+        return merged
+
+    def span(self, end, seconds, first):
+        """Whole seconds covered by window(end, seconds): its slots, from no earlier than first"""
+        return int(end) + 1 - max(self.oldest(end, seconds), int(first))
+
+
+class Route:
+    def __init__(self, accuracy, keep):
+        self.total = Stats(accuracy)
+        self.recent = Series(ROUTE_SLOT, keep, accuracy)
+
+    def merge(self, other):
+        self.total.merge(other.total)
+        self.recent.merge(other.recent)
+
+
+class Analyzer:
+    """Folds parsed requests into per-route and overall stats"""
+
+    def __init__(self, accuracy=0.01, max_routes=200, horizon=max(WINDOWS)):
+        self.accuracy = accuracy
+        self.max_routes = max_routes
+        self.route_slots = -(-horizon // ROUTE_SLOT) + 1
+        self.overall = Stats(accuracy)
+        self.recent = Series(GLOBAL_SLOT, -(-horizon // GLOBAL_SLOT) + 1, accuracy)
+        self.routes = {}
+        self.per_host = {}
+        self.paths = {}
+        self.lines = 0
+        self.skipped = 0
+        self.first = None
+        self.last = None
+        self.times = {}
+
+    def normalize(self, path):
+        normalized = self.paths.get(path)
+        if normalized is None:
+            if len(self.paths) > 50000:
+                self.paths.clear()
+            normalized = ID_SEGMENT.sub("/:id", path.split("?", 1)[0]) or "/"
+            self.paths[path] = normalized
+        return normalized
+
+    def route(self, host, path):
+        key = (host, path)
+        route = self.routes.get(key)
+        if route is None:
+            seen = self.per_host.get(host, 0)
+            if seen >= self.max_routes:
+                key = (host, OTHER_PATH)
+                route = self.routes.get(key)
+            if route is None:
+                route = self.routes[key] = Route(self.accuracy, self.route_slots)
+                self.per_host[host] = seen + 1
+        return route
+
+    def timestamp(self, text, layout):
+        # Many lines share a second: parse each distinct second once
+        second = text[:19] if layout is None else text
+        t = self.times.get(second)
+        if t is None:
+            if len(self.times) > 4096:
+                self.times.clear()
+            if layout is None:
+                t = datetime.strptime(second + "+0000", "%Y-%m-%dT%H:%M:%S%z").timestamp()
+            else:
+                t = datetime.strptime(text, layout).timestamp()
+            self.times[second] = t
+        return t
+
+    def feed(self, line):
+        self.lines += 1
+        if line.startswith("{"):
+            try:
+                entry = json.loads(line)
+                status = int(entry["DownstreamStatus"])
+                ms = entry["Duration"] / 1e6
+                host = entry.get("RequestHost") or entry.get("RouterName") or "-"
+                path = entry.get("RequestPath") or "/"
+                t = self.timestamp(entry["StartUTC"], None)
+            except (ValueError, KeyError, TypeError):
+                self.skipped += 1
+                return
+        else:
+            match = CLF.match(line)
+            if not match:
+                self.skipped += 1
+                return
+            when, _, path, status, router, _, ms = match.groups()
+            status = int(status)
+            ms = float(ms)
+            # The common format has no Host; the router name identifies the ingress
+            host = router.split("@", 1)[0] or "-"
+            try:
+                t = self.timestamp(when, "%d/%b/%Y:%H:%M:%S %z")
+            except ValueError:
+                self.skipped += 1
+                return
+        self.add(t, host, self.normalize(path), status, ms)
+
+    def add(self, t, host, path, status, ms):
+        if self.first is None or t < self.first:
+            self.first = t
+        if self.last is None or t > self.last:
+            self.last = t
+        self.overall.add(status, ms)
+        self.recent.slot(t).add(status, ms)
+        route = self.route(host, path)
+        route.total.add(status, ms)
+        route.recent.slot(t).add(status, ms)
+
+    def merge(self, other):
+        self.lines += other.lines
+        self.skipped += other.skipped
+        self.overall.merge(other.overall)
+        self.recent.merge(other.recent)
+        for key, route in other.routes.items():
+            host = key[0]
+            if key not in self.routes and self.per_host.get(host, 0) >= self.max_routes:
+                key = (host, OTHER_PATH)
+            if key in self.routes:
+                self.routes[key].merge(route)
+            else:
+                self.routes[key] = route
+                self.per_host[host] = self.per_host.get(host, 0) + 1
+        for t in (other.first, other.last):
+            if t is not None:
+                self.first = t if self.first is None else min(self.first, t)
+                self.last = t if self.last is None else max(self.last, t)
+
+
+def open_log(path):
+    if path == "-":
+        return sys.stdin
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", errors="replace")
+    return open(path, errors="replace")
+
+
+def analyze_file(path, accuracy, max_routes, horizon):
+    analyzer = Analyzer(accuracy, max_routes, horizon)
+    with open_log(path) as f:
+        for line in f:
+            analyzer.feed(line)
+    # Only the stats travel back to the parent process
+    analyzer.paths.clear()
+    analyzer.times.clear()
+    return analyzer
+
+
+def fmt_ms(value):
+    if value is None:
+        return "-"
+    return f"{value / 1000:.2f}s" if value >= 1000 else f"{value:.1f}ms"
+
+
+def mix(status):
+    total = sum(status) or 1
+    return " ".join(f"{label}:{count * 100 / total:.0f}%" for label, count in zip(STATUS_CLASSES, status) if count)
+
+
+def label(seconds):
+    return f"{seconds // 60}m" if seconds % 60 == 0 else f"{seconds}s"
+
+
+def report_windows(analyzer, windows):
+    print(f"\n🪟 Sliding windows ending {datetime.fromtimestamp(analyzer.last):%Y-%m-%d %H:%M:%S}")
+    print(f"{'window':<8}{'requests':>10}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'5xx':>7}  status mix")
+    print("-" * 80)
+    for seconds in windows:
+        stats = analyzer.recent.window(analyzer.last, seconds)
+        span = analyzer.recent.span(analyzer.last, seconds, analyzer.first)
+        s = stats.sketch
+        errors = stats.status[3] * 100 / s.count if s.count else 0
+        print(
+            f"{label(span):<8}{s.count:>10}{s.count / span:>9.1f}"
+            f"{fmt_ms(s.quantile(0.5)):>9}{fmt_ms(s.quantile(0.95)):>9}{fmt_ms(s.quantile(0.99)):>9}"
+            f"{errors:>6.1f}%  {mix(stats.status)}"
+        )
+
+
+def report_routes(analyzer, top, slow_ms, min_requests, window):
+    rows = []
+    span = window
+    for (host, path), route in analyzer.routes.items():
+        s = route.total.sketch
+        if s.count < min_requests:
+            continue
+        recent = route.recent.window(analyzer.last, window).sketch.count
+        span = route.recent.span(analyzer.last, window, analyzer.first)
+        rows.append((s.quantile(0.99), host, path, route, recent / span))
+    rows.sort(key=lambda row: row[0], reverse=True)
+
+    print(f"\n🐢 Slowest routes by p99 (rate over the last {label(span)})")
+    print(f"{'ROUTE':<52}{'requests':>9}{'req/s':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'5xx':>6}  status mix")
+    print("-" * 113)
+    flagged = []
+    for p99, host, path, route, rate in rows[:top]:
+        s = route.total.sketch
+        errors = route.total.status[3] * 100 / s.count
+        name = f"{host}{path}"
+        name = name if len(name) <= 50 else name[:49] + "…"
+        slow = p99 >= slow_ms
+        if slow:
+            flagged.append((host, path, p99))
+        print(
+            f"{'🔴' if slow else '  '}{name:<50}{s.count:>9}{rate:>8.2f}"
+            f"{fmt_ms(s.quantile(0.5)):>9}{fmt_ms(s.quantile(0.95)):>9}{fmt_ms(p99):>9}"
+            f"{errors:>5.0f}%  {mix(route.total.status)}"
+        )
+    if len(rows) > top:
+        print(f"   … {len(rows) - top} more routes (--top)")
+    return flagged
+
+
+def report(analyzer, args):
+    if not analyzer.overall.sketch.count:
+        print(f"❌ No access-log entries among {analyzer.lines} lines")
+        return False
+    s = analyzer.overall.sketch
+    span = analyzer.last - analyzer.first + 1
+    print(
+        f"\n📊 {s.count:,} requests over {span / 60:.1f} min on {len(analyzer.routes)} routes, "
+        f"p50 {fmt_ms(s.quantile(0.5))} p95 {fmt_ms(s.quantile(0.95))} p99 {fmt_ms(s.quantile(0.99))}"
+        + (f" ({analyzer.skipped:,} other lines skipped)" if analyzer.skipped else "")
+    )
+    report_windows(analyzer, args.windows)
+    flagged = report_routes(analyzer, args.top, args.slow_ms, args.min_requests, args.windows[0])
+    if flagged:
+        print(f"\n⚠️  {len(flagged)} route(s) with p99 >= {args.slow_ms:g}ms")
+    else:
+        print(f"\n✅ No route with p99 >= {args.slow_ms:g}ms")
+    return True
+
+
+def follow(args):
+    """Tail the live Traefik pods and print a report every --every seconds"""
+    analyzer = Analyzer(args.accuracy, args.max_routes, max(args.windows))
+    process = subprocess.Popen(
+        [
+            "kubectl", "logs", "-f", "-n", args.namespace, "-l", args.selector,
+            "--tail=0", "--max-log-requests=10", "--prefix=false",
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+        errors="replace",
+    )
+    print(f"👀 Following Traefik access logs ({args.selector}), report every {args.every:g}s (Ctrl-C to stop)")
+    next_report = time.time() + args.every
+    try:
+        for line in process.stdout:
+            analyzer.feed(line)
+            if time.time() >= next_report:
+                report(analyzer, args)
+                next_report = time.time() + args.every
+    except KeyboardInterrupt:
+        pass
+    finally:
+        process.kill()
+        process.wait()
+    report(analyzer, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-route latency percentiles from Traefik access logs")
+    parser.add_argument("files", nargs="*", help="Access log files (.gz ok, - for stdin)")
+    parser.add_argument("--follow", action="store_true", help="Tail the live Traefik pods instead of files")
+    parser.add_argument("--every", type=float, default=30, help="Seconds between reports with --follow")
+    parser.add_argument("--namespace", default="kube-system", help="Traefik namespace for --follow")
+    parser.add_argument(
+        "--selector", default="app.kubernetes.io/name=traefik", help="Traefik pod selector for --follow"
+    )
+    parser.add_argument("--jobs", type=int, default=1, help="Files parsed in parallel processes")
+    parser.add_argument(
+        "--windows",
+        type=lambda v: sorted(int(x) for x in v.split(",")),
+        default=list(WINDOWS),
+        help="Sliding windows in seconds (default: 60,300,900)",
+    )
+    parser.add_argument("--top", type=int, default=20, help="Routes to list")
+    parser.add_argument("--slow-ms", type=float, default=1000, help="Flag routes whose p99 is at least this")
+    parser.add_argument("--min-requests", type=int, default=20, help="Ignore routes with fewer requests")
+    parser.add_argument("--max-routes", type=int, default=200, help="Distinct paths kept per host")
+    parser.add_argument("--accuracy", type=float, default=0.01, help="Relative error of the latency sketches")
+    args = parser.parse_args()
+
+    if args.follow:
+        follow(args)
+        return
+    if not args.files:
+        parser.error("give log files, - for stdin, or --follow")
+
+    start = time.time()
+    horizon = max(args.windows)
+    analyzer = Analyzer(args.accuracy, args.max_routes, horizon)
+    if args.jobs > 1 and len(args.files) > 1 and "-" not in args.files:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            for part in pool.map(
+                analyze_file, args.files, *([x] * len(args.files) for x in (args.accuracy, args.max_routes, horizon))
+            ):
+                analyzer.merge(part)
+    else:
+        for path in args.files:
+            analyzer.merge(analyze_file(path, args.accuracy, args.max_routes, horizon))
+    elapsed = time.time() - start
+    print(f"⏱️  Parsed {analyzer.lines:,} lines in {elapsed:.1f}s ({analyzer.lines / max(elapsed, 1e-9):,.0f} lines/s)")
+    if not report(analyzer, args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n❌ Cancelled by user")
+        sys.exit(1)
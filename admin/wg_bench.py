@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+WireGuard Tunnel Benchmark
+Compares latency, jitter, throughput and MTU through the tunnel vs directly
+
+A small server (`serve`: UDP echo + TCP sink/source on one port) runs on the
+node hosting the wireguard pod. Because that pod uses hostNetwork, the node
+answers both on its tunnel address (10.8.0.1) and its LAN address, so from a
+VPN client the same server is measured through each path:
+
+  - UDP echo RTT, jitter (mean change between consecutive RTTs) and loss
+  - UDP payload sweep with Don't Fragment set: the largest size that gets
+    through is the effective path MTU; sizes that only pass fragmented are
+    flagged (WireGuard's 60-80 bytes of overhead inside a 1500 byte path)
+  - TCP upload/download throughput with 1..N concurrent streams
+
+and the tunnel's overhead is reported as a percentage of the direct path.
+
+--start-server launches the server on the wireguard node over SSH for the
+length of the run. Everything also runs against loopback for testing.
+
+Usage:
+    ./admin/wg_bench.py --start-server                     # from a machine on the VPN
+    ./admin/wg_bench.py --tunnel 10.8.0.1 --direct 192.168.1.20 --streams 1,4,8
+    ./admin/wg_bench.py serve --port 5201 &                # loopback test
+    ./admin/wg_bench.py --tunnel 127.0.0.1 --direct 127.0.0.2 --seconds 2
+"""
+
+import argparse
+import errno
+import json
+import os
+import select
+import socket
+import socketserver
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+import common
+from common import percentile
+
+PORT = 5201
+TUNNEL_ADDRESS = "10.8.0.1"
+SIZES = (64, 512, 1024, 1200, 1280, 1372, 1392, 1412, 1440, 1472)
+BLOCK = 1 << 17
+IP_MTU_DISCOVER = getattr(socket, "IP_MTU_DISCOVER", 10)
+IP_PMTUDISC_DONT, IP_PMTUDISC_DO = 0, 2
+
+
+class StreamHandler(socketserver.BaseRequestHandler):
+    """'U' + duration: count bytes until EOF; 'D' + duration: send for duration"""
+
+    def handle(self):
+        sock = self.request
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        header = sock.recv(9, socket.MSG_WAITALL)
+        if len(header) != 9:
+            return
+        mode, seconds = header[:1], struct.unpack(">d", header[1:])[0]
+        if mode == b"U":
+            total = 0
+            start = time.perf_counter()
+            while True:
+                chunk = sock.recv(BLOCK)
+                if not chunk:
+                    break
+                total += len(chunk)
+            sock.sendall(struct.pack(">Qd", total, time.perf_counter() - start))
+        elif mode == b"D":
+            payload = b"\0" * BLOCK
+            end = time.perf_counter() + min(seconds, 60)
+            try:
+                while time.perf_counter() < end:
+                    sock.sendall(payload)
+            except OSError:
+                pass
+
+
+class Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+def serve(port, exit_after=None):
+    tcp = Server(("0.0.0.0", port), StreamHandler)
+    udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    udp.bind(("0.0.0.0", port))
+    threading.Thread(target=tcp.serve_forever, daemon=True).start()
+    print(f"📡 wg_bench server on :{port} (TCP + UDP)", flush=True)
+    deadline = time.time() + exit_after if exit_after else None
+    while deadline is None or time.time() < deadline:
+        readable, _, _ = select.select([udp], [], [], 1)
+        if readable:
+            data, address = udp.recvfrom(65535)
+            udp.sendto(data, address)
+    tcp.shutdown()
+
+
+def udp_probe(host, port, size, count, interval, df, timeout=1.0):
+    """Send count echo packets of size bytes; returns rtts (ms), lost, too_big"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.IPPROTO_IP, IP_MTU_DISCOVER, IP_PMTUDISC_DO if df else IP_PMTUDISC_DONT)
+    sock.setblocking(False)
+    sent, rtts = {}, []
+    padding = b"\0" * max(0, size - 12)
+    start = time.perf_counter()
+    for seq in range(count):
+        now = time.perf_counter()
+        try:
+            sock.sendto(struct.pack(">Id", seq, now) + padding, (host, port))
+            sent[seq] = now
+        except OSError as e:
+            if e.errno == errno.EMSGSIZE:  # larger than the known path MTU
+                sock.close()
+                return [], count, True
+            raise
+        deadline = start + (seq + 1) * interval
+        while True:
+            wait = deadline - time.perf_counter()
+            readable, _, _ = select.select([sock], [], [], max(0, wait))
+            if not readable:
+                break
+            data = sock.recv(65535)
+            got, stamp = struct.unpack(">Id", data[:12])
+            if sent.pop(got, None) is not None:
+                rtts.append((time.perf_counter() - stamp) * 1000)
+    deadline = time.perf_counter() + timeout
+    while sent and time.perf_counter() < deadline:
+        readable, _, _ = select.select([sock], [], [], max(0, deadline - time.perf_counter()))
+        if readable:
+            data = sock.recv(65535)
+            got, stamp = struct.unpack(">Id", data[:12])
+            if sent.pop(got, None) is not None:
+                rtts.append((time.perf_counter() - stamp) * 1000)
+    sock.close()
+    return rtts, len(sent), False
+
+
+def jitter(rtts):
+    """Mean absolute difference between consecutive RTTs (RFC 3550 style)"""
+    if len(rtts) < 2:
+        return None
+    return sum(abs(b - a) for a, b in zip(rtts, rtts[1:])) / (len(rtts) - 1)
+
+
+def stream(host, port, mode, seconds, results, index):
+    """One TCP stream; stores (bytes, seconds), or the OSError that ended it"""
+    try:
+        with socket.create_connection((host, port), timeout=seconds + 10) as sock:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.sendall(mode + struct.pack(">d", seconds))
+            if mode == b"U":
+                payload = b"\0" * BLOCK
+                end = time.perf_counter() + seconds
+                while time.perf_counter() < end:
+                    sock.sendall(payload)
+                sock.shutdown(socket.SHUT_WR)
+                reply = sock.recv(16, socket.MSG_WAITALL)
+                if len(reply) != 16:
+                    raise ConnectionError("server closed before reporting the byte count")
+                total, elapsed = struct.unpack(">Qd", reply)
+            else:
+                total = 0
+                start = time.perf_counter()
+                while True:
+                    chunk = sock.recv(BLOCK)
+                    if not chunk:
+                        break
+                    total += len(chunk)
+                elapsed = time.perf_counter() - start
+    except OSError as e:
+        results[index] = e
+        return
+    results[index] = (total, elapsed)
+
+
+def throughput(host, port, mode, streams, seconds):
+    """Aggregate Mbit/s over `streams` concurrent TCP connections"""
+    results = [None] * streams
+    threads = [
+        threading.Thread(target=stream, args=(host, port, mode, seconds, results, i))
+        for i in range(streams)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    errors = [r for r in results if isinstance(r, OSError)]
+    if errors:
+        raise errors[0]
+    done = [r for r in results if r]
+    if not done:
+        return None
+    return sum(total for total, _ in done) * 8 / max(elapsed for _, elapsed in done) / 1e6
+
+
+def measure_path(host, args):
+    """All measurements for one path"""
+    result = {"host": host}
+    rtts, lost, _ = udp_probe(host, args.port, 64, args.pings, args.interval, df=True)
+    result["rtt"] = {
+        "p50": percentile(rtts, 50),
+        "p99": percentile(rtts, 99),
+        "jitter": jitter(rtts),
+        "loss": lost / args.pings,
+    }
+    result["sizes"] = {}
+    for size in args.sizes:
+        rtts, lost, too_big = udp_probe(host, args.port, size, args.count, 0.005, df=True)
+        entry = {"df_loss": lost / args.count, "too_big": too_big, "p50": percentile(rtts, 50)}
+        if too_big or lost == args.count:
+            rtts, lost, _ = udp_probe(host, args.port, size, args.count, 0.005, df=False)
+            entry["fragmented_loss"] = lost / args.count
+            entry["fragmented_p50"] = percentile(rtts, 50)
+        result["sizes"][size] = entry
+    passing = [s for s, e in result["sizes"].items() if not e["too_big"] and e["df_loss"] < 1]
+    result["max_payload"] = max(passing) if passing else None
+    result["throughput"] = {}
+    for streams in args.streams:
+        try:
+            result["throughput"][streams] = {
+                "up": throughput(host, args.port, b"U", streams, args.seconds),
+                "down": throughput(host, args.port, b"D", streams, args.seconds),
+            }
+        except OSError as e:
+            result["throughput"][streams] = {"error": str(e)}
+    return result
+
+
+def overhead(tunnel, direct, lower_is_better=False):
+    if tunnel is None or not direct:
+        return None
+    return (tunnel - direct) / direct * 100 if lower_is_better else (direct - tunnel) / direct * 100
+
+
+def fmt(value, spec=".2f", suffix=""):
+    return f"{value:{spec}}{suffix}" if value is not None else "-"
+
+
+def report(tunnel, direct):
+    paths = [("tunnel", tunnel), ("direct", direct)]
+    print(f"\n{'':<22}{'tunnel':>14}{'direct':>14}{'overhead':>12}")
+    print("-" * 62)
+    for label, key, lower in (("RTT p50 ms", "p50", True), ("RTT p99 ms", "p99", True), ("jitter ms", "jitter", True)):
+        t, d = tunnel["rtt"][key], direct["rtt"][key]
+        print(f"{label:<22}{fmt(t):>14}{fmt(d):>14}{fmt(overhead(t, d, lower), '+.0f', '%'):>12}")
+    print(f"{'loss':<22}{tunnel['rtt']['loss']:>14.1%}{direct['rtt']['loss']:>14.1%}")
+    for streams in tunnel["throughput"]:
+        for name, path in paths:
+            error = path["throughput"].get(streams, {}).get("error")
+            if error:
+                print(f"{'x' + str(streams) + ' streams':<22}❌ {name}: {error}")
+        for mode in ("up", "down"):
+            t = tunnel["throughput"][streams].get(mode)
+            d = direct["throughput"].get(streams, {}).get(mode)
+            label = f"{mode} x{streams} Mbit/s"
+            print(f"{label:<22}{fmt(t, '.0f'):>14}{fmt(d, '.0f'):>14}{fmt(overhead(t, d), '.0f', '%'):>12}")
+
+    print(f"\n📦 UDP payload sweep (Don't Fragment){'':<6}" + "".join(f" {p:>15}" for p, _ in paths))
+    for size in tunnel["sizes"]:
+        cells = ""
+        for _, path in paths:
+            e = path["sizes"][size]
+            if e["too_big"]:
+                cell = "too big"
+            elif e["df_loss"] >= 1:
+                cell = "dropped"
+            else:
+                cell = f"{fmt(e['p50'])}ms" + (f" {e['df_loss']:.0%}" if e["df_loss"] else "")
+            if "fragmented_loss" in e:
+                cell += "/frag ok" if e["fragmented_loss"] < 1 else "/frag lost"
+            cells += f" {cell:>15}"
+        print(f"   {size:>5} B payload ({size + 28} B packet){'':<10}{cells}")
+
+    print()
+    for name, path in paths:
+        if path["max_payload"]:
+            print(f"📏 {name}: largest unfragmented packet {path['max_payload'] + 28} B")
+    t_max, d_max = tunnel["max_payload"], direct["max_payload"]
+    blackholed = [
+        s for s, e in tunnel["sizes"].items()
+        if not e["too_big"] and e["df_loss"] >= 1 and (t_max is None or s > t_max)
+    ]
+    if blackholed and (not t_max or min(blackholed) > t_max):
+        print(
+            f"⚠️  Packets above {t_max + 28 if t_max else '?'} B vanish in the tunnel without an ICMP error "
+            "(PMTU black hole): large TCP transfers will stall"
+        )
+    if t_max and d_max and t_max < d_max:
+        mtu = t_max + 28
+        print(
+            f"💡 Set the tunnel MTU to {mtu} (WG_MTU in components/wireguard/deployment.yaml, "
+            f"MTU = {mtu} in client configs) so nothing above it is sent"
+        )
+    frag = [s for s, e in tunnel["sizes"].items() if e.get("fragmented_loss", 1) < 1]
+    if frag:
+        print(f"⚠️  {len(frag)} size(s) only pass fragmented through the tunnel: expect extra latency and loss")
+    best = max(tunnel["throughput"], key=lambda s: tunnel["throughput"][s].get("down") or 0)
+    single = tunnel["throughput"][min(tunnel["throughput"])].get("down")
+    top = tunnel["throughput"][best].get("down")
+    if single and top and top > single * 1.3:
+        print(
+            f"💡 {best} streams move {top / single:.1f}x more than one: single-flow throughput is "
+            "latency/window bound, not link bound"
+        )
+
+
+def wireguard_node():
+    """hostIP of the wireguard pod (it runs with hostNetwork)"""
+    try:
+        output = subprocess.check_output(
+            ["kubectl", "get", "pods", "-n", "glasgow-prod", "-l", "app=wireguard",
+             "-o", "jsonpath={.items[0].status.hostIP}"],
+            stderr=subprocess.DEVNULL, timeout=15, text=True,
+        )
+        return output.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def start_remote_server(ip, port, seconds):
+    """Ship this script to the node and serve for `seconds` over one SSH session"""
+    source = common.bundled_source(os.path.abspath(__file__))
+    thread = threading.Thread(
+        target=common.ssh_command,
+        args=(ip, f"python3 - serve --port {port} --exit-after {int(seconds)}"),
+        kwargs={"timeout": seconds + 30, "input_data": source},
+        daemon=True,
+    )
+    thread.start()
+    deadline = time.time() + 20
+    while time.time() < deadline:
+        try:
+            socket.create_connection((ip, port), timeout=1).close()
+            return True
+        except OSError:
+            time.sleep(0.5)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WireGuard tunnel vs direct benchmark")
+    sub = parser.add_subparsers(dest="command")
+    p = sub.add_parser("serve", help="Run the echo/throughput server")
+    p.add_argument("--port", type=int, default=PORT)
+    p.add_argument("--exit-after", type=float, help="Stop after this many seconds")
+    parser.add_argument("--tunnel", default=TUNNEL_ADDRESS, help="Server address inside the tunnel")
+    parser.add_argument("--direct", help="Server address outside the tunnel (default: wireguard node)")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--start-server", action="store_true", help="Start the server on the node over SSH")
+    parser.add_argument("--pings", type=int, default=200, help="RTT samples per path")
+    parser.add_argument("--interval", type=float, default=0.01, help="Seconds between pings")
+    parser.add_argument("--count", type=int, default=20, help="Packets per payload size")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="UDP payload sizes")
+    parser.add_argument("--streams", default="1,4,8", help="Concurrent TCP streams to test")
+    parser.add_argument("--seconds", type=float, default=5, help="Per throughput test")
+    parser.add_argument("--json", help="Write results as JSON")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.port, args.exit_after)
+        return
+    args.sizes = [int(s) for s in args.sizes.split(",")]
+    args.streams = [int(s) for s in args.streams.split(",")]
+    args.direct = args.direct or wireguard_node()
+    if not args.direct:
+        print("❌ Could not find the wireguard node; pass --direct")
+        sys.exit(1)
+
+    if args.start_server:
+        budget = (args.pings * args.interval + len(args.sizes) * 3 + len(args.streams) * 2 * args.seconds + 30) * 2
+        print(f"🚀 Starting server on {args.direct}:{args.port}...")
+        if not start_remote_server(args.direct, args.port, budget):
+            print("❌ Server did not come up")
+            sys.exit(1)
+
+    results = {}
+    for name, host in (("tunnel", args.tunnel), ("direct", args.direct)):
+        print(f"⏱️  Measuring {name} path ({host})...")
+        try:
+            results[name] = measure_path(host, args)
+        except OSError as e:
+            print(f"❌ {name} path unreachable: {e}")
+            sys.exit(1)
+    report(results["tunnel"], results["direct"])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n❌ Cancelled by user")
+        sys.exit(1)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Glasgow Node Metrics Agent
+Samples CPU, memory, disk and temperature locally and serves them over HTTP
+
+Reads /proc/stat, /proc/meminfo, statvfs and every thermal zone on a fixed
+interval instead of running `top -bn1`/`free`/`df` over SSH. CPU usage is the
+delta between two /proc/stat samples, so it covers the whole interval rather
+than a single biased snapshot.
+
+Endpoints:
+    GET /metrics   latest sample
+    GET /history   the last HISTORY samples (ring buffer)
+
+Runs as the node-agent DaemonSet (see daemonset.yaml), or as a systemd unit:
+
+    [Unit]
+    Description=Glasgow node metrics agent
+
+    [Service]
+    ExecStart=/usr/bin/python3 /opt/glasgow/node_agent.py
+    Restart=always
+    DynamicUser=yes
+
+    [Install]
+    WantedBy=multi-user.target
+"""
+
+import glob
+import json
+import os
+import socket
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PORT = int(os.environ.get("NODE_AGENT_PORT", "9101"))
+INTERVAL = float(os.environ.get("NODE_AGENT_INTERVAL", "5"))
+HISTORY = int(os.environ.get("NODE_AGENT_HISTORY", "120"))
+# Host filesystem root to statvfs; the DaemonSet mounts it at /host
+ROOT = os.environ.get("NODE_AGENT_ROOT", "/")
+HOSTNAME = os.environ.get("NODE_NAME", socket.gethostname())
+
+
+def read_cpu_times():
+    """Return (busy, total) jiffies from the aggregate cpu line of /proc/stat"""
+    with open("/proc/stat") as f:
+        fields = [int(x) for x in f.readline().split()[1:9]]
+    # user nice system idle iowait irq softirq steal
+    idle = fields[3] + fields[4]
+    total = sum(fields)
+    return total - idle, total
+
+
+def read_memory():
+    """Return (used_mb, total_mb) from /proc/meminfo"""
+    info = {}
+    with open("/proc/meminfo") as f:
+        for line in f:
+            key, value = line.split(":", 1)
+            info[key] = int(value.split()[0])
+    total = info["MemTotal"]
+    available = info.get("MemAvailable", info.get("MemFree", 0))
+    return (total - available) // 1024, total // 1024
+
+
+def read_disk(path):
+    """Return df-style used percentage for the filesystem holding path"""
+    st = os.statvfs(path)
+    used = st.f_blocks - st.f_bfree
+    usable = used + st.f_bavail
+    return round(used / usable * 100, 1) if usable else 0.0
+
+
+def read_temperatures():
+    """Return {zone type: °C} for every readable thermal zone"""
+    temps = {}
+    for zone in sorted(glob.glob("/sys/class/thermal/thermal_zone*")):
+        try:
+            with open(os.path.join(zone, "temp")) as f:
+                celsius = int(f.read().strip()) / 1000.0
+            with open(os.path.join(zone, "type")) as f:
+                name = f.read().strip()
+        except (OSError, ValueError):
+            continue
+        temps[f"{os.path.basename(zone)}:{name}"] = celsius
+    return temps
+
+
+def read_uptime():
+    with open("/proc/uptime") as f:
+        return float(f.read().split()[0])
+
+
+class Sampler:
+    """Background sampler holding the latest sample and a ring buffer"""
+
+    def __init__(self, interval=INTERVAL, history=HISTORY):
+        self.interval = interval
+        self.history = deque(maxlen=history)
+        self.lock = threading.Lock()
+        self.prev_cpu = read_cpu_times()
+
+    def sample(self):
+        busy, total = read_cpu_times()
+        prev_busy, prev_total = self.prev_cpu
+        self.prev_cpu = (busy, total)
+        delta = total - prev_total
+        cpu = (busy - prev_busy) / delta * 100 if delta else 0.0
+        mem_used, mem_total = read_memory()
+        temps = read_temperatures()
+        return {
+            "timestamp": time.time(),
+            "cpu_percent": round(cpu, 1),
+            "load": os.getloadavg(),
+            "mem_used_mb": mem_used,
+            "mem_total_mb": mem_total,
+            "disk_percent": read_disk(ROOT),
+            "temperature": max(temps.values()) if temps else None,
+            "temperatures": temps,
+            "uptime": read_uptime(),
+        }
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                sample = self.sample()
+            except Exception as e:
+                print(f"⚠️  Sampling failed: {e}", flush=True)
+                continue
+            with self.lock:
+                self.history.append(sample)
+
+    def latest(self):
+        with self.lock:
+            return self.history[-1] if self.history else None
+
+    def samples(self):
+        with self.lock:
+            return list(self.history)
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        sampler = self.server.sampler
+        body = {"hostname": HOSTNAME, "interval": sampler.interval}
+        status = 200
+        if self.path == "/metrics":
+            body["latest"] = sampler.latest()
+            if body["latest"] is None:
+                status = 503  # no CPU delta yet
+        elif self.path == "/history":
+            body["samples"] = sampler.samples()
+        else:
+            self.send_error(404)
+            return
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    sampler = Sampler()
+    threading.Thread(target=sampler.run, daemon=True).start()
+    server = ThreadingHTTPServer(("", PORT), Handler)
+    server.sampler = sampler
+    print(
+        f"📡 node-agent on :{PORT} (every {INTERVAL:g}s, {HISTORY} samples)", flush=True
+    )
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
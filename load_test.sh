@@ -1,21 +1,9 @@
 #!/bin/bash
-# A simple script to generate load on the FastAPI health endpoint.
+# Generate load on the FastAPI health endpoint.
+# Thin wrapper around admin/load_test.py (open-model, keep-alive, latency
+# percentiles); extra arguments are passed through, e.g. --rate 50 --json out.json
 
 URL="http://fastapi.192.168.1.20.nip.io/health"
-CONCURRENT_REQUESTS=15
+RATE=15
 
-echo "Starting load test on $URL with $CONCURRENT_REQUESTS concurrent requests."
-echo "Press [CTRL+C] to stop."
-
-# Start background loops
-for i in $(seq 1 $CONCURRENT_REQUESTS)
-do
-  # Each loop continuously curls the URL
-  while true
-  do
-    curl -s -o /dev/null "$URL"
-  done &
-done
-
-# Wait for all background jobs to finish (which they won't, until CTRL+C)
-wait
+exec python3 "$(dirname "$0")/admin/load_test.py" "$URL" --rate "$RATE" --duration 60 "$@"